@@ -3,14 +3,15 @@ Aplicacion Flask para el Sistema de Prediccion de Riesgo Crediticio
 """
 from flask import Flask, render_template, request, jsonify
 import pandas as pd
-import numpy as np
 import joblib
 import json
 import config
 from src.data_processing import DataProcessor
 from src.model import CreditRiskModel
 from src.visualizations import CreditRiskVisualizer
-from src.data_structures import CreditRiskBST
+from src.data_structures import CreditRiskBST, RiskWatchlist
+from src.risk_index import RiskScoreIndex
+import atexit
 import os
 
 # Inicializar Flask
@@ -31,6 +32,10 @@ def load_model_resources():
         model.load_model(config.MODEL_FILE)
         resources['model_loaded'] = True
 
+    if os.path.exists(config.NEIGHBORS_FILE):
+        model.load_neighbor_index(config.NEIGHBORS_FILE)
+        resources['neighbors_loaded'] = True
+
     if os.path.exists(config.SCALER_FILE):
         resources['scaler'] = joblib.load(config.SCALER_FILE)
 
@@ -53,6 +58,18 @@ except Exception as e:
     print("  Ejecuta 'python train_model.py' primero para entrenar el modelo")
     model_resources = {}
 
+# Lista de seguimiento de prestamos abiertos ordenada por riesgo
+watchlist = RiskWatchlist()
+
+# Indice de scores de riesgo: se construye una vez por version del dataset
+try:
+    risk_index = RiskScoreIndex.load_or_build()
+    atexit.register(risk_index.flush)
+    print(f"✓ Indice de riesgo listo: {risk_index.size()} clientes")
+except Exception as e:
+    print(f"⚠ Advertencia: No se pudo preparar el indice de riesgo: {e}")
+    risk_index = None
+
 
 @app.route('/')
 def index():
@@ -105,9 +122,15 @@ def predict():
             # Realizar prediccion usando processor para transformar las features
             result = model.predict_single(features, processor, model_resources['scaler'])
 
+            # Prestamos historicos similares para explicar la prediccion
+            similar = None
+            if 'neighbors_loaded' in model_resources:
+                similar = model.find_similar_loans(features, processor, model_resources['scaler'])
+
             return render_template('results.html',
                                  features=features,
-                                 prediction=result)
+                                 prediction=result,
+                                 similar=similar)
         except Exception as e:
             return render_template('error.html', error=str(e))
 
@@ -116,22 +139,57 @@ def predict():
 
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
-    """API endpoint para predicciones"""
+    """
+    API endpoint para predicciones
+
+    Con ?mode=probability solo retorna la probabilidad de default
+    """
     try:
         data = request.get_json()
+        loan_id = data.pop('loan_id', None)
+        probability_only = request.args.get('mode') == 'probability'
 
         # Verificar que el modelo esté cargado
         if 'scaler' not in model_resources:
             return jsonify({'error': 'El modelo no ha sido entrenado. Ejecuta train_model.py primero.'}), 503
 
         # Realizar prediccion usando processor para transformar las features
-        result = model.predict_single(data, processor, model_resources['scaler'])
+        result = model.predict_single(data, processor, model_resources['scaler'],
+                                      probability_only=probability_only)
+
+        # Agregar el solicitante al indice de riesgo
+        if risk_index is not None:
+            risk_index.add_applicant(data, result['probability_default'])
+
+        # Actualizar la lista de seguimiento si se identifica el prestamo
+        if loan_id is not None:
+            watchlist.track(str(loan_id), result)
 
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
+@app.route('/api/watchlist', methods=['GET'])
+def api_watchlist():
+    """API endpoint con los prestamos seguidos de mayor riesgo"""
+    n = request.args.get('n', 10, type=int)
+    riskiest = [
+        {'loan_id': loan_id, 'probability_default': probability, 'prediction': prediction}
+        for loan_id, probability, prediction in watchlist.riskiest(n)
+    ]
+    return jsonify({'total': len(watchlist), 'loans': riskiest})
+
+
+@app.route('/api/watchlist/<loan_id>', methods=['DELETE'])
+def api_watchlist_remove(loan_id):
+    """API endpoint para quitar un prestamo de la lista de seguimiento"""
+    if not watchlist.contains(loan_id):
+        return jsonify({'error': f'Prestamo {loan_id} no encontrado'}), 404
+    watchlist.remove(loan_id)
+    return jsonify({'removed': loan_id})
+
+
 @app.route('/stats')
 def stats():
     """Estadisticas del dataset"""
@@ -151,59 +209,51 @@ def stats():
         return render_template('error.html', error=str(e))
 
 
+def parse_range_cursor(value):
+    """
+    Interpreta el parametro after_key de /arbol: 'score' (despues de todos
+    los clientes con ese score) o 'score:seq' (cursor devuelto por
+    range_page, puede cortar una racha de scores iguales)
+    """
+    if not value:
+        return None
+    score, _, seq = value.partition(':')
+    if not seq:
+        return int(score)
+    return int(score), int(seq)
+
+
+def format_range_cursor(cursor):
+    """Cursor (score, seq) como valor del parametro after_key"""
+    if cursor is None:
+        return None
+    return f"{cursor[0]}:{cursor[1]}"
+
+
 @app.route('/arbol')
 def arbol():
     """Pagina de demostracion del Arbol Binario de Busqueda"""
     try:
-        # Intentar cargar datos procesados, si no existen usar datos raw
-        if os.path.exists(config.PROCESSED_DATA_FILE):
-            df = pd.read_csv(config.PROCESSED_DATA_FILE)
-        elif os.path.exists(config.RAW_DATA_FILE):
-            df = pd.read_csv(config.RAW_DATA_FILE)
-            # Limpiar datos basicos (eliminar nulos)
-            df = df.dropna()
-        else:
+        if risk_index is None:
             raise FileNotFoundError("No se encontraron archivos de datos")
 
-        # Crear scores de riesgo simulados basados en loan_status y otras features
-        # Score de riesgo: 0-100 (mayor = mas riesgo)
-        np.random.seed(42)
-
-        # Calcular score basado en features relevantes
-        risk_scores = []
-        for idx, row in df.iterrows():
-            base_score = row['loan_status'] * 50  # 0 o 50 segun default
-            # Ajustar por tasa de interes (normalizada)
-            interest_factor = min(row['loan_int_rate'] / 25 * 30, 30)
-            # Ajustar por porcentaje de ingreso
-            income_factor = min(row['loan_percent_income'] * 50, 20)
-            # Agregar variacion aleatoria
-            noise = np.random.uniform(-5, 5)
-
-            score = base_score + interest_factor + income_factor + noise
-            score = max(0, min(100, score))  # Limitar entre 0 y 100
-            risk_scores.append(int(score))
-
-        # Construir el BST con una muestra de datos (para visualizacion)
-        sample_size = min(50, len(df))
-        sample_indices = np.random.choice(len(df), sample_size, replace=False)
-
+        # Construir el BST de visualizacion con una muestra del indice
         bst = CreditRiskBST()
-        for idx in sample_indices:
-            score = risk_scores[idx]
-            client_data = {
-                'index': int(idx),
-                'loan_amnt': float(df.iloc[idx]['loan_amnt']),
-                'income': float(df.iloc[idx]['person_income'])
-            }
-            bst.insert_client(score, client_data)
+        for score, client_info in risk_index.sample(50, seed=42):
+            bst.insert_client(score, client_info)
 
         # Obtener parametros de busqueda en rango
         range_min = request.args.get('min_score', 0, type=int)
         range_max = request.args.get('max_score', 100, type=int)
+        range_limit = request.args.get('limit', config.RANGE_PAGE_SIZE, type=int)
+        range_after = parse_range_cursor(request.args.get('after_key', None))
 
-        # Busqueda en rango
-        range_results = bst.range_search(range_min, range_max)
+        # Busqueda en rango sobre el indice completo: el total sale de la
+        # lista ordenada de scores y solo se arma la pagina que se muestra
+        range_count = risk_index.count_range(range_min, range_max)
+        range_results, next_cursor = risk_index.range_page(range_min, range_max,
+                                                           range_limit,
+                                                           after_key=range_after)
 
         # Estadisticas del arbol
         tree_stats = {
@@ -221,8 +271,8 @@ def arbol():
             'levelorder': bst.level_order()
         }
 
-        # Distribucion de riesgo
-        distribution = bst.get_risk_distribution()
+        # Distribucion de riesgo de todo el indice
+        distribution = risk_index.get_risk_distribution()
 
         # Convertir arbol a JSON para D3.js
         def tree_to_dict(node):
@@ -249,9 +299,14 @@ def arbol():
                                stats=tree_stats,
                                traversals=traversals,
                                distribution=distribution,
+                               risk_thresholds={'low': bst.low_threshold,
+                                                'high': bst.high_threshold},
                                range_results=range_results,
+                               range_count=range_count,
                                range_min=range_min,
-                               range_max=range_max)
+                               range_max=range_max,
+                               range_limit=range_limit,
+                               next_cursor=format_range_cursor(next_cursor))
 
     except Exception as e:
         return render_template('arbol.html', tree_data=False, error=str(e))
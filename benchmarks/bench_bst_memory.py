@@ -0,0 +1,93 @@
+"""
+Benchmark de memoria del CreditRiskBST
+Compara el layout original (nodo con __dict__ + dict por fila) contra el
+compacto (nodos con __slots__ + posición de fila en el DataFrame compartido)
+
+Uso:
+    python benchmarks/bench_bst_memory.py
+"""
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+from src.data_structures import build_credit_bst_from_dataframe
+
+
+class LegacyTreeNode:
+    """Nodo sin __slots__, como en la implementación original"""
+
+    def __init__(self, key, data=None):
+        self.key = key
+        self.data = data
+        self.left = None
+        self.right = None
+
+
+def build_legacy_tree(df, score_column='risk_score'):
+    """Reproduce el build original: iterrows + row.to_dict() por nodo"""
+    root = None
+    for _, row in df.iterrows():
+        node = LegacyTreeNode(row[score_column], row.to_dict())
+        if root is None:
+            root = node
+            continue
+        current = root
+        while True:
+            if node.key < current.key:
+                if current.left is None:
+                    current.left = node
+                    break
+                current = current.left
+            else:
+                if current.right is None:
+                    current.right = node
+                    break
+                current = current.right
+    return root
+
+
+def measure(builder):
+    """Retorna (resultado, MB retenidos, segundos) de construir una estructura"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = builder()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1024 ** 2, elapsed
+
+
+def main():
+    df = pd.read_csv(config.RAW_DATA_FILE).dropna().reset_index(drop=True)
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    df['risk_score'] = rng.uniform(0, 100, len(df))
+    data_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+
+    print("=" * 60)
+    print(f"BENCHMARK DE MEMORIA BST ({len(df)} clientes)")
+    print("=" * 60)
+    print(f"DataFrame de origen: {data_mb:8.2f} MB")
+
+    _, legacy_mb, legacy_s = measure(lambda: build_legacy_tree(df))
+    print(f"Layout original (dict + __dict__): {legacy_mb:8.2f} MB  {legacy_s:6.2f} s")
+
+    _, dict_mb, dict_s = measure(lambda: build_credit_bst_from_dataframe(df))
+    print(f"__slots__ + dict por fila:         {dict_mb:8.2f} MB  {dict_s:6.2f} s")
+
+    _, compact_mb, compact_s = measure(
+        lambda: build_credit_bst_from_dataframe(df, row_ids=True)
+    )
+    print(f"__slots__ + row ids (compacto):    {compact_mb:8.2f} MB  {compact_s:6.2f} s")
+
+    print(f"\nReducción de memoria: {legacy_mb / compact_mb:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
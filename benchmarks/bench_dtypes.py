@@ -0,0 +1,75 @@
+"""
+Benchmark de memoria y tiempo del pipeline de datos según los dtypes
+Compara la lectura con los tipos por defecto de pandas (object/int64/float64)
+contra el esquema compacto (category/int32/float32/int8) en carga,
+limpieza, codificación y escalado
+
+Uso:
+    python benchmarks/bench_dtypes.py [--repeat 3]
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_processing import DataProcessor
+
+
+def run_pipeline(compact_dtypes):
+    """Ejecuta carga -> limpieza -> codificación -> split/escalado sin caché"""
+    processor = DataProcessor(compact_dtypes=compact_dtypes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = processor.load_data()
+        df_clean = processor.clean_data(df)
+        df_encoded = processor.encode_categorical(df_clean)
+        X_train, X_test, _, _ = processor.prepare_features(df_encoded)
+    return df, X_train, X_test
+
+
+def measure(compact_dtypes, repeat):
+    """Retorna (MB del DataFrame raw, MB de X escalado, MB pico, segundos)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_pipeline(compact_dtypes)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    df, X_train, X_test = run_pipeline(compact_dtypes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    raw_mb = df.memory_usage(deep=True).sum() / 1024 ** 2
+    matrix_mb = (X_train.nbytes + X_test.nbytes) / 1024 ** 2
+    return raw_mb, matrix_mb, peak / 1024 ** 2, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DE DTYPES DEL PIPELINE DE DATOS")
+    print("=" * 60)
+    print(f"{'esquema':<10} {'raw (MB)':>9} {'X (MB)':>8} {'pico (MB)':>10} {'tiempo (s)':>11}")
+
+    results = {}
+    for name, compact in (('default', False), ('compacto', True)):
+        results[name] = measure(compact, args.repeat)
+        raw_mb, matrix_mb, peak_mb, seconds = results[name]
+        print(f"{name:<10} {raw_mb:>9.2f} {matrix_mb:>8.2f} {peak_mb:>10.2f} {seconds:>11.3f}")
+
+    default, compact = results['default'], results['compacto']
+    print(f"\nMemoria del DataFrame raw: {default[0] / compact[0]:.1f}x menor")
+    print(f"Memoria pico del pipeline: {default[2] / compact[2]:.1f}x menor")
+    print(f"Tiempo del pipeline:       {default[3] / compact[3]:.2f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark de la evaluación del modelo
+Compara las métricas de sklearn (una función por métrica) y un barrido de
+umbrales con llamadas repetidas contra el conteo único de la matriz de
+confusión y el barrido vectorizado de threshold_sweep, verificando que
+los resultados coinciden
+
+Uso:
+    python benchmarks/bench_evaluation.py [--n 1000000] [--thresholds 20]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import (accuracy_score, classification_report, confusion_matrix,
+                             f1_score, precision_score, recall_score, roc_auc_score)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.model import (classification_report_from_confusion, confusion_counts,
+                       metrics_from_confusion, threshold_sweep)
+
+
+def timed(fn):
+    """Retorna (resultado, segundos) de ejecutar fn"""
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--thresholds', type=int, default=20)
+    args = parser.parse_args()
+
+    # Scores con la forma de un bosque: probabilidades en pasos de 1/100 árboles
+    rng = np.random.default_rng(42)
+    y_true = (rng.random(args.n) < 0.22).astype(np.int64)
+    y_score = np.clip(0.3 * y_true + rng.normal(0.3, 0.2, args.n), 0, 1).round(2)
+    y_pred = (y_score > 0.5).astype(np.int64)
+
+    print("=" * 60)
+    print(f"BENCHMARK DE EVALUACIÓN ({args.n} predicciones)")
+    print("=" * 60)
+
+    def sklearn_metrics():
+        return {
+            'accuracy': accuracy_score(y_true, y_pred),
+            'precision': precision_score(y_true, y_pred),
+            'recall': recall_score(y_true, y_pred),
+            'f1_score': f1_score(y_true, y_pred),
+            'roc_auc': roc_auc_score(y_true, y_score),
+            'confusion_matrix': confusion_matrix(y_true, y_pred).tolist(),
+            'classification_report': classification_report(y_true, y_pred)
+        }
+
+    def single_pass_metrics():
+        tn, fp, fn, tp = confusion_counts(y_true, y_pred)
+        return {
+            **metrics_from_confusion(tn, fp, fn, tp),
+            'roc_auc': threshold_sweep(y_true, y_score)['roc_auc'],
+            'confusion_matrix': [[tn, fp], [fn, tp]],
+            'classification_report': classification_report_from_confusion(tn, fp, fn, tp)
+        }
+
+    expected, sk_s = timed(sklearn_metrics)
+    result, new_s = timed(single_pass_metrics)
+    for name in ('accuracy', 'precision', 'recall', 'f1_score', 'roc_auc'):
+        assert np.isclose(expected[name], result[name]), name
+    assert expected['confusion_matrix'] == result['confusion_matrix']
+    assert expected['classification_report'].split() == result['classification_report'].split()
+    print(f"Métricas sklearn:           {sk_s:8.3f} s")
+    print(f"Conteo único + barrido:     {new_s:8.3f} s  ({sk_s / new_s:.1f}x)")
+
+    # Barrido: llamadas a sklearn por umbral vs un solo ordenamiento
+    cuts = np.linspace(0, 1, args.thresholds)
+
+    def sklearn_sweep():
+        return [(precision_score(y_true, y_score >= t, zero_division=0),
+                 recall_score(y_true, y_score >= t),
+                 f1_score(y_true, y_score >= t, zero_division=0)) for t in cuts]
+
+    loop, loop_s = timed(sklearn_sweep)
+    sweep, sweep_s = timed(lambda: threshold_sweep(y_true, y_score))
+
+    # Para cada corte, el umbral del barrido es el menor score >= corte
+    thresholds = sweep['thresholds'][::-1]
+    for cut, values in zip(cuts, loop):
+        pos = np.searchsorted(thresholds, cut)
+        if pos == len(thresholds):
+            continue
+        i = len(thresholds) - 1 - pos
+        assert np.allclose(values, (sweep['precision'][i], sweep['recall'][i], sweep['f1'][i]))
+
+    print(f"\nBarrido sklearn ({args.thresholds} umbrales): {loop_s:8.3f} s")
+    print(f"threshold_sweep ({len(sweep['thresholds'])} umbrales, todos): {sweep_s:8.3f} s "
+          f"({loop_s / sweep_s:.1f}x)")
+    print("\n✓ Resultados idénticos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Micro-benchmark de los heaps
+Compara el MinHeap original (reacomodos recursivos con llamadas a parent y
+swap) contra el BinaryHeap iterativo, tanto por inserciones sucesivas como
+con la construcción O(n) de from_iterable
+
+Uso:
+    python benchmarks/bench_heaps.py [--n 200000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_structures import MinHeap
+
+
+class LegacyMinHeap:
+    """Copia de la implementación original (recursiva)"""
+
+    def __init__(self):
+        self.heap = []
+
+    def parent(self, i):
+        return (i - 1) // 2
+
+    def left_child(self, i):
+        return 2 * i + 1
+
+    def right_child(self, i):
+        return 2 * i + 2
+
+    def swap(self, i, j):
+        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+
+    def insert(self, key):
+        self.heap.append(key)
+        self._heapify_up(len(self.heap) - 1)
+
+    def _heapify_up(self, i):
+        parent = self.parent(i)
+        if i > 0 and self.heap[i] < self.heap[parent]:
+            self.swap(i, parent)
+            self._heapify_up(parent)
+
+    def extract_min(self):
+        if len(self.heap) == 1:
+            return self.heap.pop()
+        min_val = self.heap[0]
+        self.heap[0] = self.heap.pop()
+        self._heapify_down(0)
+        return min_val
+
+    def _heapify_down(self, i):
+        min_index = i
+        left = self.left_child(i)
+        right = self.right_child(i)
+        if left < len(self.heap) and self.heap[left] < self.heap[min_index]:
+            min_index = left
+        if right < len(self.heap) and self.heap[right] < self.heap[min_index]:
+            min_index = right
+        if min_index != i:
+            self.swap(i, min_index)
+            self._heapify_down(min_index)
+
+
+def timed(func):
+    """Retorna (resultado, segundos) de una ejecución"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def fill_by_insert(heap, values):
+    for value in values:
+        heap.insert(value)
+    return heap
+
+
+def drain(heap, count):
+    return [heap.extract_min() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=200_000)
+    args = parser.parse_args()
+
+    values = np.random.default_rng(42).uniform(0, 100, args.n).tolist()
+    expected = sorted(values)
+
+    print("=" * 60)
+    print(f"MICRO-BENCHMARK DE HEAPS (n={args.n:,})")
+    print("=" * 60)
+
+    legacy, legacy_build = timed(lambda: fill_by_insert(LegacyMinHeap(), values))
+    legacy_out, legacy_drain = timed(lambda: drain(legacy, args.n))
+
+    current, insert_build = timed(lambda: fill_by_insert(MinHeap(), values))
+    current_out, current_drain = timed(lambda: drain(current, args.n))
+
+    floyd, floyd_build = timed(lambda: MinHeap.from_iterable(values))
+    floyd_out = drain(floyd, args.n)
+
+    assert legacy_out == current_out == floyd_out == expected
+
+    print(f"{'':28}{'construir':>12}{'extraer todo':>14}")
+    print(f"{'Original (recursivo)':28}{legacy_build:11.3f}s{legacy_drain:13.3f}s")
+    print(f"{'Iterativo (insert)':28}{insert_build:11.3f}s{current_drain:13.3f}s")
+    print(f"{'Iterativo (from_iterable)':28}{floyd_build:11.3f}s{'':>14}")
+    print(f"\nAceleración extracción: {legacy_drain / current_drain:.1f}x")
+    print(f"Aceleración construcción (Floyd vs original): {legacy_build / floyd_build:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark del KDTreeIndex
+Compara consultas multi-atributo por rango (person_income, loan_amnt,
+loan_int_rate) y k vecinos más cercanos contra un escaneo completo con
+pandas/NumPy, para libros de distinto tamaño (dataset replicado con ruido)
+
+Uso:
+    python benchmarks/bench_kdtree.py [--sizes 1 4 16] [--queries 200]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import config
+from src.data_structures import KDTreeIndex
+
+
+def replicate(df, factor, rng):
+    """Replica el dataset factor veces agregando ruido a las columnas numéricas"""
+    if factor == 1:
+        return df.reset_index(drop=True)
+    big = pd.concat([df] * factor, ignore_index=True)
+    for col in config.NUMERICAL_COLUMNS:
+        big[col] = big[col] * rng.uniform(0.97, 1.03, len(big))
+    return big
+
+
+def mean_us(func, items):
+    """Latencia media en microsegundos de func(item)"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(config.RANDOM_STATE)
+    base = pd.read_csv(config.RAW_DATA_FILE).dropna()
+
+    print("=" * 72)
+    print("BENCHMARK KD-TREE vs ESCANEO COMPLETO")
+    print("=" * 72)
+    print(f"{'filas':>10}{'build (ms)':>12}{'rango scan':>12}{'rango kd':>12}"
+          f"{'kNN scan':>12}{'kNN kd':>12}  (us/consulta)")
+
+    for factor in args.sizes:
+        df = replicate(base, factor, rng)
+        start = time.perf_counter()
+        index = KDTreeIndex.from_dataframe(df)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = []
+        for _ in range(args.queries):
+            income = rng.uniform(20000, 100000)
+            amount = rng.uniform(2000, 20000)
+            rate = rng.uniform(6, 18)
+            queries.append({
+                'person_income': (income, income * 1.1),
+                'loan_amnt': (amount, amount * 1.2),
+                'loan_int_rate': (rate, rate + 1),
+            })
+
+        def pandas_scan(bounds):
+            mask = np.ones(len(df), dtype=bool)
+            for col, (lo, hi) in bounds.items():
+                mask &= df[col].between(lo, hi).to_numpy()
+            return np.flatnonzero(mask)
+
+        for bounds in queries[:10]:
+            assert np.array_equal(pandas_scan(bounds), index.range_query(bounds))
+
+        values = df[index.columns].to_numpy(dtype=np.float64)
+        scaled = values / index.scale
+        targets = values[rng.integers(0, len(values), args.queries)]
+
+        def brute_knn(point, k=5):
+            diff = scaled - point / index.scale
+            distances = np.sqrt((diff * diff).sum(axis=1))
+            nearest = np.argpartition(distances, k)[:k]
+            return nearest[np.argsort(distances[nearest])]
+
+        print(f"{len(df):>10,}{build_ms:>12.1f}"
+              f"{mean_us(pandas_scan, queries):>12.0f}"
+              f"{mean_us(index.range_query, queries):>12.0f}"
+              f"{mean_us(brute_knn, targets):>12.0f}"
+              f"{mean_us(lambda point: index.nearest(point, 5), targets):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
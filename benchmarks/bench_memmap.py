@@ -0,0 +1,93 @@
+"""
+Benchmark de memoria de los procesos de tuning: arrays copiados vs memmap
+Lanza pools de 1..N procesos (spawn) inicializados como en
+HyperparameterSearch y mide la memoria proporcional (PSS) sumada de los
+procesos tras leer la matriz completa; las páginas compartidas de un memmap
+se reparten entre los procesos que las usan
+
+Uso:
+    python benchmarks/bench_memmap.py [--workers 4] [--scale 20]
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.pipeline_cache import WORKER_DATA, init_worker
+from src.tuning import load_training_arrays
+
+
+def pss_mb():
+    """Memoria proporcional (PSS) del proceso en MB (Linux, /proc/self/smaps_rollup)"""
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def touch_data(barrier):
+    """Lee toda la matriz del proceso y retorna su PSS"""
+    float(np.asarray(WORKER_DATA['X']).sum())
+    barrier.wait()
+    memory = pss_mb()
+    barrier.wait()
+    return memory
+
+
+def pool_memory(workers, initargs):
+    """
+    PSS sumada de todos los procesos de un pool, tomada cuando todos están
+    vivos (cada tarea espera en una barrera a las demás)
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        barrier = manager.Barrier(workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=init_worker,
+                                 initargs=initargs) as executor:
+            futures = [executor.submit(touch_data, barrier) for _ in range(workers)]
+            return sum(future.result() for future in futures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--scale', type=int, default=20,
+                        help="Veces que se replica la matriz de entrenamiento")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, _ = load_training_arrays()
+    X = np.ascontiguousarray(np.tile(X, (args.scale, 1)), dtype=np.float32)
+    y = np.tile(y, args.scale).astype(np.int8)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        x_path, y_path = str(Path(tmp) / "X.npy"), str(Path(tmp) / "y.npy")
+        np.save(x_path, X)
+        np.save(y_path, y)
+
+        print("=" * 60)
+        print(f"BENCHMARK DE MEMMAP ({X.shape[0]} x {X.shape[1]} float32, "
+              f"{X.nbytes / 1024 ** 2:.1f} MB)")
+        print("=" * 60)
+        print("Memoria de los datos = PSS del pool - PSS de un pool sin datos")
+        print(f"{'procesos':>8} {'copias (MB)':>12} {'memmap (MB)':>12}")
+        empty = (np.empty((0, X.shape[1]), dtype=np.float32), np.empty(0, dtype=np.int8))
+        for workers in range(1, args.workers + 1):
+            baseline = pool_memory(workers, ({'X': empty[0], 'y': empty[1]},))
+            copied = pool_memory(workers, ({'X': X, 'y': y},)) - baseline
+            mapped = pool_memory(workers, ({'X': x_path, 'y': y_path},)) - baseline
+            print(f"{workers:>8} {copied:>12.1f} {mapped:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark del índice de scores: CreditRiskBST vs SortedRiskIndex
+Compara tiempo de construcción, latencia de consultas y memoria sobre los
+scores de riesgo del dataset (opcionalmente replicado con --repeat)
+
+Uso:
+    python benchmarks/bench_sorted_index.py [--repeat 1] [--queries 1000]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_structures import SortedRiskIndex, build_balanced_credit_bst
+from src.risk_index import compute_risk_scores, load_scoring_data
+
+
+def measure_build(builder):
+    """Retorna (estructura, segundos, MB retenidos) de una construcción"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = builder()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current / 1024 ** 2
+
+
+def query_latency(func, ranges):
+    """Latencia media en microsegundos de func(lo, hi) sobre los rangos"""
+    start = time.perf_counter()
+    for lo, hi in ranges:
+        func(lo, hi)
+    return (time.perf_counter() - start) / len(ranges) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args()
+
+    df, _ = load_scoring_data()
+    scores = np.tile(compute_risk_scores(df), args.repeat)
+    row_ids = np.arange(len(scores))
+
+    rng = np.random.default_rng(42)
+    starts = rng.integers(0, 95, args.queries)
+    ranges = [(int(lo), int(lo) + 5) for lo in starts]
+
+    print("=" * 60)
+    print(f"BENCHMARK DE ÍNDICES DE RIESGO ({len(scores):,} clientes)")
+    print("=" * 60)
+
+    scores_list = scores.tolist()
+    ids_list = row_ids.tolist()
+    bst, bst_build, bst_mb = measure_build(
+        lambda: build_balanced_credit_bst(scores_list, ids_list)
+    )
+    index, index_build, index_mb = measure_build(
+        lambda: SortedRiskIndex(scores, row_ids)
+    )
+
+    assert index.get_risk_distribution() == bst.get_risk_distribution()
+    assert index.count_range(40, 45) == len(bst.range_search(40, 45))
+
+    rows = [
+        ('Construcción (ms)', bst_build * 1000, index_build * 1000),
+        ('Memoria (MB)', bst_mb, index_mb),
+        ('range_search ancho 5 (us)',
+         query_latency(bst.range_search, ranges),
+         query_latency(index.range_search, ranges)),
+        ('range_search limit=20 (us)',
+         query_latency(lambda lo, hi: bst.range_search(lo, hi, limit=20), ranges),
+         query_latency(lambda lo, hi: index.range_search(lo, hi, limit=20), ranges)),
+        ('Conteo en rango (us)',
+         query_latency(lambda lo, hi: len(bst.range_search(lo, hi)), ranges),
+         query_latency(index.count_range, ranges)),
+        ('Distribución (us)',
+         query_latency(lambda lo, hi: bst.get_risk_distribution(), ranges),
+         query_latency(lambda lo, hi: index.get_risk_distribution(), ranges)),
+    ]
+
+    print(f"{'':30}{'CreditRiskBST':>15}{'SortedRiskIndex':>17}")
+    for label, bst_value, index_value in rows:
+        print(f"{label:30}{bst_value:15.2f}{index_value:17.2f}")
+
+
+if __name__ == "__main__":
+    main()
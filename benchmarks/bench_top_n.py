@@ -0,0 +1,75 @@
+"""
+Benchmark de selección top-k
+Compara get_top_n_min / get_top_n_max originales (heap completo con todos
+los elementos) contra la selección con heap acotado a k y el camino rápido
+con np.argpartition para arrays de NumPy
+
+Uso:
+    python benchmarks/bench_top_n.py [--n 1000000] [--k 10]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_structures import MaxHeap, MinHeap, get_top_n_max, get_top_n_min
+
+
+def legacy_top_n_min(data, n):
+    """Implementación original: inserta todo en un MinHeap y extrae n"""
+    heap = MinHeap()
+    for item in data:
+        heap.insert(item)
+    return [heap.extract_min() for _ in range(min(n, heap.size()))]
+
+
+def legacy_top_n_max(data, n):
+    """Implementación original: inserta todo en un MaxHeap y extrae n"""
+    heap = MaxHeap()
+    for item in data:
+        heap.insert(item)
+    return [heap.extract_max() for _ in range(min(n, heap.size()))]
+
+
+def timed(func):
+    """Retorna (resultado, segundos) de una ejecución"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=1_000_000)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    array = rng.uniform(0, 30, args.n)
+    values = array.tolist()
+
+    print("=" * 60)
+    print(f"BENCHMARK TOP-K (n={args.n:,}, k={args.k})")
+    print("=" * 60)
+
+    for label, legacy, current in (
+        ('min', legacy_top_n_min, get_top_n_min),
+        ('max', legacy_top_n_max, get_top_n_max),
+    ):
+        expected, legacy_s = timed(lambda: legacy(values, args.k))
+        bounded, bounded_s = timed(lambda: current(values, args.k))
+        fast, fast_s = timed(lambda: current(array, args.k))
+        assert bounded == expected and fast == expected
+
+        print(f"\nget_top_n_{label}:")
+        print(f"  Heap completo (original): {legacy_s:8.3f} s")
+        print(f"  Heap acotado a k:         {bounded_s:8.3f} s  ({legacy_s / bounded_s:.0f}x)")
+        print(f"  np.argpartition:          {fast_s:8.3f} s  ({legacy_s / fast_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark de escalamiento del entrenamiento
+Preprocesa el dataset una sola vez y mide el tiempo de fit y evaluate del
+Random Forest para n_jobs = 1..N núcleos
+
+Uso:
+    python benchmarks/bench_training.py [--max-jobs 4] [--repeat 1]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_processing import DataProcessor
+from src.model import CreditRiskModel
+
+
+def best_time(fn, repeat):
+    """Retorna el mejor tiempo (s) de repeat ejecuciones de fn"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--max-jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    # Silenciar la salida del pipeline de datos
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = DataProcessor()
+        X_train, X_test, y_train, y_test, _ = processor.process_pipeline()
+
+    print("=" * 60)
+    print(f"BENCHMARK DE ENTRENAMIENTO ({len(X_train)} train / {len(X_test)} test)")
+    print("=" * 60)
+    print(f"{'n_jobs':>6} {'fit (s)':>10} {'eval (s)':>10} {'filas/s':>12} {'speedup':>8}")
+
+    base_fit = None
+    for n_jobs in range(1, args.max_jobs + 1):
+        model = CreditRiskModel()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fit_s = best_time(lambda: model.train(X_train, y_train, n_jobs=n_jobs),
+                              args.repeat)
+            eval_s = best_time(lambda: model.evaluate(X_test, y_test, n_jobs=n_jobs),
+                               args.repeat)
+        if base_fit is None:
+            base_fit = fit_s
+        print(f"{n_jobs:>6} {fit_s:>10.3f} {eval_s:>10.3f} "
+              f"{len(X_train) / fit_s:>12,.0f} {base_fit / fit_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,10 +17,31 @@ TEMPLATES_DIR = BASE_DIR / "templates"
 RAW_DATA_FILE = RAW_DATA_DIR / "credit_risk_dataset.csv"
 PROCESSED_DATA_FILE = PROCESSED_DATA_DIR / "clean_data.csv"
 
+# Matrices de features escaladas en .npy (float32) abiertas como memmap,
+# compartidas entre procesos en lugar de copiarse a cada uno
+MEMMAP_FEATURES = os.getenv('MEMMAP_FEATURES', 'False') == 'True'
+FEATURES_DIR = PROCESSED_DATA_DIR
+
+# Exploración de datos en process_pipeline: 'full', 'sample' u 'off'
+EXPLORE_MODE = os.getenv('EXPLORE_MODE', 'sample')
+EXPLORE_SAMPLE_SIZE = 10000
+EXPLORE_REPORT_FILE = PROCESSED_DATA_DIR / "data_profile.json"
+
+# Caché de etapas del pipeline de procesamiento
+PIPELINE_CACHE_DIR = DATA_DIR / "cache"
+
 # Archivos de modelos
 MODEL_FILE = MODELS_DIR / "credit_risk_model.pkl"
 SCALER_FILE = MODELS_DIR / "scaler.pkl"
 ENCODERS_FILE = MODELS_DIR / "label_encoders.pkl"
+RISK_INDEX_FILE = MODELS_DIR / "risk_index.npz"
+NEIGHBORS_FILE = MODELS_DIR / "neighbor_index.pkl"
+THRESHOLD_FILE = MODELS_DIR / "decision_threshold.pkl"
+COMPACT_MODEL_FILE = MODELS_DIR / "credit_risk_model_compact.npz"
+DISTILLED_MODEL_FILE = MODELS_DIR / "distilled_scorer.pkl"
+PERMUTATION_RESULTS_FILE = MODELS_DIR / "permutation_importance.json"
+FEATURE_NAMES_FILE = MODELS_DIR / "feature_names.pkl"
+MODEL_VERSIONS_DIR = MODELS_DIR / "versions"
 
 # Configuración del modelo
 RANDOM_STATE = 42
@@ -31,6 +52,60 @@ MODEL_PARAMS = {
     'random_state': RANDOM_STATE
 }
 
+# Paralelismo (núcleos) para entrenar y evaluar el bosque; -1 = todos
+N_JOBS = int(os.getenv('N_JOBS', -1))
+EVAL_N_JOBS = int(os.getenv('EVAL_N_JOBS', -1))
+
+# Umbral de decisión: ALTO RIESGO si probabilidad de default >= umbral
+# Estrategia al entrenar: 'default' (DECISION_THRESHOLD), 'f1' o 'cost'
+# (umbral del barrido de evaluación con máximo F1 o mínimo costo)
+DECISION_THRESHOLD = 0.5
+THRESHOLD_STRATEGY = os.getenv('THRESHOLD_STRATEGY', 'default')
+
+# Compactación del bosque (train_model.py --compact)
+# Pérdida máxima admitida de AUC y accuracy de validación al podar/fusionar
+COMPACT_TOLERANCE = 0.005
+# Diferencia máxima de probabilidad para fusionar hojas hermanas
+COMPACT_MERGE_TOLERANCE = 0.01
+# Mínimo de árboles que conserva la poda: con pocas filas de validación la
+# poda greedy sobreajusta y el bosque podado no generaliza
+COMPACT_MIN_TREES = 25
+# Servir con el bosque compacto si existe (opcional: la poda se valida con
+# pocas filas, activarlo tras revisar el reporte de train_model.py --compact)
+USE_COMPACT_MODEL = os.getenv('USE_COMPACT_MODEL', 'False') == 'True'
+
+# Importancia por permutación (train_model.py --permutation-importance)
+PERMUTATION_N_REPEATS = 5
+
+# Scorer destilado del bosque (train_model.py --distill)
+DISTILL_MAX_DEPTH = 8
+DISTILL_MIN_SAMPLES_LEAF = 20
+# Coincidencia mínima de la cascada con las decisiones del bosque
+DISTILL_TARGET_AGREEMENT = 0.999
+# Servir en cascada (scorer + bosque cerca del umbral) si existe el scorer
+USE_DISTILLED_SCORER = os.getenv('USE_DISTILLED_SCORER', 'True') == 'True'
+
+# Costos de error para el barrido de umbrales de decisión
+# (aprobar a quien hace default suele costar más que rechazar a un buen cliente)
+COST_FALSE_POSITIVE = 1.0
+COST_FALSE_NEGATIVE = 5.0
+
+# Reentrenamiento incremental (train_model.py --incremental)
+INCREMENTAL_NEW_TREES = 20
+INCREMENTAL_MAX_TREES = None  # None = sin límite; si no, se retiran los árboles más antiguos
+# Filas mínimas del lote para eliminar outliers por IQR (en lotes menores
+# los cuartiles no son fiables y se conservan todas las filas)
+INCREMENTAL_OUTLIER_MIN_ROWS = 1000
+
+# Búsqueda de hiperparámetros (tune_model.py)
+TUNING_CV_FOLDS = 5
+TUNING_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [8, 10, 14, None],
+    'min_samples_leaf': [1, 5]
+}
+TUNING_RESULTS_FILE = MODELS_DIR / "tuning_results.json"
+
 # Columnas del dataset
 TARGET_COLUMN = 'loan_status'
 CATEGORICAL_COLUMNS = [
@@ -39,6 +114,8 @@ CATEGORICAL_COLUMNS = [
     'loan_grade',
     'cb_person_default_on_file'
 ]
+# Código asignado a categorías no vistas en el entrenamiento
+UNKNOWN_CATEGORY_CODE = -1
 NUMERICAL_COLUMNS = [
     'person_age',
     'person_income',
@@ -48,6 +125,36 @@ NUMERICAL_COLUMNS = [
     'loan_percent_income',
     'cb_person_cred_hist_length'
 ]
+# Columnas numéricas enteras (se leen como int32; el resto como float32,
+# exacto para los valores del CSV: enteros < 2**24 y decimales cortos)
+INTEGER_COLUMNS = [
+    'person_age',
+    'person_income',
+    'loan_amnt',
+    'cb_person_cred_hist_length'
+]
+
+# Préstamos similares mostrados junto a cada predicción
+SIMILAR_LOANS_K = 5
+SIMILAR_LOANS_COLUMNS = [
+    'person_age',
+    'person_income',
+    'loan_intent',
+    'loan_grade',
+    'loan_amnt',
+    'loan_int_rate'
+]
+
+# Umbrales de riesgo del BST (score 0-100)
+# bajo: score <= RISK_LOW_THRESHOLD, alto: score > RISK_HIGH_THRESHOLD
+RISK_LOW_THRESHOLD = 30
+RISK_HIGH_THRESHOLD = 70
+
+# Altas de la API acumuladas antes de persistir el índice de riesgo
+RISK_INDEX_SAVE_EVERY = 50
+
+# Clientes por página en la búsqueda en rango de /arbol
+RANGE_PAGE_SIZE = 12
 
 # Configuración Flask
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
@@ -0,0 +1,291 @@
+"""
+Bosque compacto para inferencia
+Representa un RandomForestClassifier binario como arrays planos (umbrales y
+valores de hoja float32, índices int16) que se recorren de forma vectorizada
+para todas las filas y todos los árboles a la vez. Opcionalmente fusiona
+hojas hermanas con probabilidades equivalentes y descarta árboles que
+aportan poco al AUC de validación.
+"""
+import numpy as np
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+
+def _float32_floor(values):
+    """
+    Redondea a float32 hacia abajo: para un x float32 (como los que usa
+    sklearn al predecir), x <= t equivale a x <= floor32(t)
+    """
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _extract_tree(estimator, merge_tolerance=0.0):
+    """
+    Extrae un árbol de sklearn fusionando de abajo hacia arriba las hojas
+    hermanas cuya probabilidad de default difiere en <= merge_tolerance
+
+    Returns:
+        Tupla (left, right, feature, threshold, value) con los nodos
+        renumerados en preorden; las hojas tienen feature = -1
+    """
+    tree = estimator.tree_
+    left = tree.children_left.copy()
+    right = tree.children_right.copy()
+    counts = tree.value[:, 0, :]
+    value = counts[:, 1] / counts.sum(axis=1)
+    weight = tree.weighted_n_node_samples.astype(np.float64)
+
+    # Los hijos siempre tienen índice mayor que el padre: recorrer en orden
+    # inverso procesa cada nodo después de sus hijos
+    if merge_tolerance > 0:
+        for node in range(tree.node_count - 1, -1, -1):
+            l, r = left[node], right[node]
+            if l == -1 or left[l] != -1 or left[r] != -1:
+                continue
+            if abs(value[l] - value[r]) <= merge_tolerance:
+                value[node] = (value[l] * weight[l] + value[r] * weight[r]) / (weight[l] + weight[r])
+                left[node] = right[node] = -1
+
+    # Renumerar en preorden solo los nodos alcanzables
+    order = []
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if left[node] != -1:
+            stack.append(right[node])
+            stack.append(left[node])
+    order = np.array(order)
+    new_index = np.full(tree.node_count, -1, dtype=np.int64)
+    new_index[order] = np.arange(len(order))
+
+    is_leaf = left[order] == -1
+    new_left = np.where(is_leaf, -1, new_index[left[order]])
+    new_right = np.where(is_leaf, -1, new_index[right[order]])
+    feature = np.where(is_leaf, -1, tree.feature[order])
+    threshold = np.where(is_leaf, 0.0, tree.threshold[order])
+    return new_left, new_right, feature, threshold, value[order]
+
+
+class CompactForest:
+    """
+    Random Forest binario en arrays planos para inferencia rápida
+
+    Expone predict_proba/predict y classes_ como el RandomForestClassifier
+    del que proviene, por lo que puede usarse como CreditRiskModel.model
+    para servir predicciones (no para reentrenar).
+    """
+
+    def __init__(self, left, right, feature, threshold, value, tree_offsets, max_depth,
+                 classes=(0, 1)):
+        """
+        Args:
+            left, right: Hijos de cada nodo, locales a su árbol (-1 en hojas)
+            feature: Feature de cada nodo (-1 en hojas)
+            threshold: Umbral float32 de cada nodo
+            value: Probabilidad de default float32 de cada nodo
+            tree_offsets: Índice del primer nodo de cada árbol
+            max_depth: Profundidad máxima de los árboles
+            classes: Clases del modelo original
+        """
+        tree_sizes = np.diff(np.r_[tree_offsets, len(value)])
+        index_dtype = np.int16 if tree_sizes.max(initial=0) <= np.iinfo(np.int16).max else np.int32
+        self.left = np.asarray(left, dtype=index_dtype)
+        self.right = np.asarray(right, dtype=index_dtype)
+        self.feature = np.asarray(feature, dtype=np.int16)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.tree_offsets = np.asarray(tree_offsets, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_jobs = None  # compatibilidad con CreditRiskModel.evaluate
+
+        # Hijos con índices globales intercalados [izq, der] para el recorrido
+        # (solo en memoria); las hojas apuntan a sí mismas
+        offsets = np.repeat(self.tree_offsets,
+                            np.diff(np.r_[self.tree_offsets, len(self.value)]))
+        is_leaf = self.feature < 0
+        node = np.arange(len(self.value))
+        self._children = np.empty(2 * len(self.value), dtype=np.int32)
+        self._children[0::2] = np.where(is_leaf, node, self.left.astype(np.int64) + offsets)
+        self._children[1::2] = np.where(is_leaf, node, self.right.astype(np.int64) + offsets)
+        self._feature = np.where(is_leaf, 0, self.feature).astype(np.int32)
+
+    @classmethod
+    def from_random_forest(cls, forest, merge_tolerance=0.0, trees=None):
+        """
+        Convierte un RandomForestClassifier binario ajustado
+
+        Args:
+            forest: RandomForestClassifier ajustado
+            merge_tolerance: Diferencia máxima de probabilidad para fusionar
+                             hojas hermanas (0 = sin fusión)
+            trees: Índices de los árboles a conservar (default: todos)
+
+        Returns:
+            CompactForest
+        """
+        if len(forest.classes_) != 2:
+            raise ValueError("Solo se admiten bosques de clasificación binaria")
+        if trees is None:
+            trees = range(len(forest.estimators_))
+
+        parts = [_extract_tree(forest.estimators_[i], merge_tolerance) for i in trees]
+        sizes = [len(part[4]) for part in parts]
+        left, right, feature, threshold, value = (np.concatenate(column) for column in zip(*parts))
+        return cls(left, right, feature, _float32_floor(threshold), value,
+                   np.r_[0, np.cumsum(sizes)[:-1]],
+                   max(forest.estimators_[i].tree_.max_depth for i in trees),
+                   forest.classes_)
+
+    @property
+    def n_trees(self):
+        """Número de árboles"""
+        return len(self.tree_offsets)
+
+    @property
+    def n_nodes(self):
+        """Número total de nodos"""
+        return len(self.value)
+
+    def tree_probabilities(self, X, chunk_size=512):
+        """
+        Probabilidad de default que asigna cada árbol a cada fila
+
+        Recorre todos los árboles a la vez, un nivel por iteración, en
+        bloques de chunk_size filas para que los índices quepan en caché.
+
+        Args:
+            X: Matriz (n_filas, n_features)
+            chunk_size: Filas por bloque
+
+        Returns:
+            Array float32 (n_filas, n_árboles)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+
+        result = np.empty((n_rows, self.n_trees), dtype=np.float32)
+        for start in range(0, n_rows, chunk_size):
+            block = X[start:start + chunk_size]
+            flat = block.ravel()
+            row_base = (np.arange(len(block), dtype=np.int32) * n_features)[:, None]
+
+            nodes = np.broadcast_to(self.tree_offsets, (len(block), self.n_trees)).copy()
+            for _ in range(self.max_depth):
+                go_right = flat.take(row_base + self._feature.take(nodes)) > self.threshold.take(nodes)
+                nodes = self._children.take(2 * nodes + go_right)
+            result[start:start + len(block)] = self.value.take(nodes)
+        return result
+
+    def predict_proba(self, X):
+        """
+        Probabilidades [no default, default] como RandomForestClassifier
+
+        Returns:
+            Array (n_filas, 2)
+        """
+        p1 = self.tree_probabilities(X).mean(axis=1, dtype=np.float64)
+        return np.column_stack([1 - p1, p1])
+
+    def predict(self, X):
+        """Clase predicha con la regla de predict() de sklearn (p1 > p0)"""
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+    def select_trees(self, trees):
+        """
+        Retorna un nuevo CompactForest con solo los árboles indicados
+        """
+        trees = list(trees)
+        ends = np.r_[self.tree_offsets[1:], self.n_nodes]
+        spans = [np.arange(self.tree_offsets[t], ends[t]) for t in trees]
+        nodes = np.concatenate(spans)
+        sizes = [len(span) for span in spans]
+        return CompactForest(self.left[nodes], self.right[nodes], self.feature[nodes],
+                             self.threshold[nodes], self.value[nodes],
+                             np.r_[0, np.cumsum(sizes)[:-1]], self.max_depth, self.classes_)
+
+    def prune_trees(self, X_valid, y_valid, tolerance, decision_threshold=0.5, min_trees=1):
+        """
+        Descarta árboles mientras el AUC y la accuracy de validación no caigan
+        más de tolerance respecto del bosque completo
+
+        Los árboles se prueban de menor a mayor AUC individual; las
+        probabilidades por árbol se calculan una sola vez.
+
+        Args:
+            X_valid, y_valid: Datos de validación
+            tolerance: Pérdida máxima admitida de AUC y de accuracy
+            decision_threshold: Umbral para la accuracy
+            min_trees: Mínimo de árboles a conservar
+
+        Returns:
+            Tupla (CompactForest podado, lista de árboles conservados)
+        """
+        y_valid = np.asarray(y_valid)
+        P = self.tree_probabilities(X_valid).astype(np.float64)
+
+        def score(proba):
+            return (roc_auc_score(y_valid, proba),
+                    accuracy_score(y_valid, proba >= decision_threshold))
+
+        base_auc, base_acc = score(P.mean(axis=1))
+        individual = [roc_auc_score(y_valid, P[:, t]) for t in range(self.n_trees)]
+
+        kept = set(range(self.n_trees))
+        total = P.sum(axis=1)
+        for t in np.argsort(individual, kind='stable'):
+            if len(kept) <= max(min_trees, 1):
+                break
+            candidate = (total - P[:, t]) / (len(kept) - 1)
+            auc, acc = score(candidate)
+            if auc >= base_auc - tolerance and acc >= base_acc - tolerance:
+                kept.discard(t)
+                total -= P[:, t]
+
+        kept = sorted(kept)
+        return self.select_trees(kept), kept
+
+    def save(self, filepath):
+        """
+        Guarda el bosque en un .npz sin comprimir (carga sin pickle)
+
+        Args:
+            filepath: Ruta o archivo binario abierto (ej: io.BytesIO)
+        """
+        if hasattr(filepath, 'write'):
+            self._savez(filepath)
+            return
+        with open(filepath, 'wb') as f:
+            self._savez(f)
+
+    def _savez(self, f):
+        np.savez(f, left=self.left, right=self.right, feature=self.feature,
+                     threshold=self.threshold, value=self.value,
+                     tree_offsets=self.tree_offsets, max_depth=self.max_depth,
+                     classes=self.classes_)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Carga un bosque guardado con save
+
+        Args:
+            filepath: Ruta o archivo binario abierto
+
+        Returns:
+            CompactForest
+        """
+        with np.load(filepath) as arrays:
+            return cls(arrays['left'], arrays['right'], arrays['feature'],
+                       arrays['threshold'], arrays['value'], arrays['tree_offsets'],
+                       int(arrays['max_depth']), arrays['classes'])
+
+    def nbytes(self):
+        """Bytes de los arrays persistidos"""
+        return sum(array.nbytes for array in (self.left, self.right, self.feature,
+                                              self.threshold, self.value, self.tree_offsets))
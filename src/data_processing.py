@@ -4,10 +4,38 @@ Maneja la carga, limpieza, transformación y preparación de datos
 """
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+import json
+import os
+from pathlib import Path
 import joblib
 import config
+from src.timing import StageTimer
+from src.encoders import CategoricalEncoder
+from src.pipeline_cache import StageCache, dataset_fingerprint, stage_key
+
+
+def get_dtype_schema(integer_fallback=False):
+    """
+    Esquema de tipos compacto para leer el dataset: categóricas como
+    'category', numéricas como float32/int32 y target como int8
+
+    Args:
+        integer_fallback: Si es True, las columnas enteras se leen como
+                          float32 (admite valores faltantes)
+
+    Returns:
+        Diccionario {columna: dtype} para pd.read_csv
+    """
+    schema = {col: 'category' for col in config.CATEGORICAL_COLUMNS}
+    for col in config.NUMERICAL_COLUMNS:
+        if col in config.INTEGER_COLUMNS and not integer_fallback:
+            schema[col] = np.int32
+        else:
+            schema[col] = np.float32
+    schema[config.TARGET_COLUMN] = np.int8
+    return schema
 
 
 class DataProcessor:
@@ -15,15 +43,21 @@ class DataProcessor:
     Clase para procesar y limpiar el dataset de riesgo crediticio
     """
 
-    def __init__(self):
+    def __init__(self, timer=None, compact_dtypes=True):
+        self.timer = timer if timer is not None else StageTimer()
+        self.compact_dtypes = compact_dtypes
         self.label_encoders = {}
         self.scaler = StandardScaler()
         self.feature_names = None
+        self.train_index = None
 
     def load_data(self, filepath=None):
         """
         Carga el dataset desde un archivo CSV
 
+        Con compact_dtypes se aplica get_dtype_schema al leer (si una columna
+        entera tiene valores faltantes se lee como float32).
+
         Args:
             filepath: Ruta al archivo CSV (opcional, usa config por defecto)
 
@@ -34,22 +68,37 @@ class DataProcessor:
             filepath = config.RAW_DATA_FILE
 
         print(f"Cargando datos desde: {filepath}")
-        df = pd.read_csv(filepath)
+        if not self.compact_dtypes:
+            df = pd.read_csv(filepath)
+        else:
+            try:
+                df = pd.read_csv(filepath, dtype=get_dtype_schema())
+            except ValueError:
+                print("⚠ Advertencia: columnas enteras con valores faltantes, se leen como float32")
+                df = pd.read_csv(filepath, dtype=get_dtype_schema(integer_fallback=True))
         print(f"Datos cargados: {df.shape[0]} filas, {df.shape[1]} columnas")
         return df
 
-    def explore_data(self, df):
+    def explore_data(self, df, sample_size=None):
         """
         Exploración inicial del dataset
 
         Args:
             df: DataFrame a explorar
+            sample_size: Si se indica y el dataset es mayor, las estadísticas
+                         se calculan sobre una muestra aleatoria de ese tamaño
 
         Returns:
-            Diccionario con información del dataset
+            Diccionario con información del dataset ('shape' siempre es el
+            del dataset completo)
         """
+        shape = df.shape
+        if sample_size is not None and len(df) > sample_size:
+            df = df.sample(n=sample_size, random_state=config.RANDOM_STATE)
+
         info = {
-            'shape': df.shape,
+            'shape': shape,
+            'profiled_rows': len(df),
             'columns': df.columns.tolist(),
             'dtypes': df.dtypes.to_dict(),
             'missing_values': df.isnull().sum().to_dict(),
@@ -65,12 +114,42 @@ class DataProcessor:
 
         return info
 
-    def clean_data(self, df):
+    def save_profile(self, info, filepath=None):
+        """
+        Guarda el perfil de explore_data como reporte JSON
+
+        Args:
+            info: Diccionario retornado por explore_data
+            filepath: Ruta del reporte (opcional, usa config por defecto)
+        """
+        if filepath is None:
+            filepath = config.EXPLORE_REPORT_FILE
+
+        def to_json(value):
+            if isinstance(value, dict):
+                return {str(k): to_json(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [to_json(v) for v in value]
+            if isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, float) and np.isnan(value):
+                return None
+            if isinstance(value, (str, int, float, bool)) or value is None:
+                return value
+            return str(value)
+
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(to_json(info), f, indent=2, ensure_ascii=False)
+        print(f"✓ Perfil del dataset guardado en: {filepath}")
+
+    def clean_data(self, df, remove_outliers=True):
         """
         Limpia el dataset: maneja valores faltantes, duplicados y outliers
 
         Args:
             df: DataFrame a limpiar
+            remove_outliers: Si se eliminan outliers por IQR (poco fiable en
+                             lotes pequeños de datos nuevos)
 
         Returns:
             DataFrame limpio
@@ -97,7 +176,8 @@ class DataProcessor:
             print(f"✓ Eliminadas {initial_rows - len(df_clean)} filas con valores faltantes")
 
         # 3. Eliminar outliers extremos usando IQR
-        df_clean = self._remove_outliers(df_clean)
+        if remove_outliers:
+            df_clean = self._remove_outliers(df_clean)
 
         # 4. Validar rangos de valores
         df_clean = self._validate_ranges(df_clean)
@@ -189,7 +269,7 @@ class DataProcessor:
 
     def encode_categorical(self, df):
         """
-        Codifica variables categóricas usando Label Encoding
+        Codifica variables categóricas (códigos alfabéticos, como Label Encoding)
 
         Args:
             df: DataFrame con variables categóricas
@@ -202,8 +282,9 @@ class DataProcessor:
         print("\n=== Codificando variables categóricas ===")
         for col in config.CATEGORICAL_COLUMNS:
             if col in df_encoded.columns:
-                le = LabelEncoder()
-                df_encoded[col] = le.fit_transform(df_encoded[col])
+                le = CategoricalEncoder()
+                codes = le.fit_transform(df_encoded[col])
+                df_encoded[col] = codes.astype(np.int8) if self.compact_dtypes else codes.astype(np.int64)
                 self.label_encoders[col] = le
                 print(f"✓ {col}: {len(le.classes_)} categorías")
 
@@ -225,6 +306,10 @@ class DataProcessor:
         # Separar features y target
         X = df.drop(columns=[config.TARGET_COLUMN])
         y = df[config.TARGET_COLUMN]
+        if self.compact_dtypes:
+            # Un solo dtype float32 (el que usan internamente los árboles) evita
+            # que la mezcla int32/float32 se promueva a float64 al escalar
+            X = X.astype(np.float32)
 
         # Guardar nombres de features
         self.feature_names = X.columns.tolist()
@@ -241,6 +326,9 @@ class DataProcessor:
         print(f"✓ Test set: {X_test.shape[0]} muestras")
         print(f"✓ Distribución de clases en train: {y_train.value_counts().to_dict()}")
 
+        # Guardar el índice de las filas de train (para ubicar los datos originales)
+        self.train_index = X_train.index
+
         # Escalar features numéricas
         if scale:
             X_train = self.scaler.fit_transform(X_train)
@@ -249,24 +337,139 @@ class DataProcessor:
 
         return X_train, X_test, y_train, y_test
 
-    def save_processed_data(self, df, filepath=None):
+    def save_processed_data(self, df, filepath=None, key=None):
         """
         Guarda el dataset procesado
 
         Args:
             df: DataFrame procesado
             filepath: Ruta donde guardar (opcional, usa config por defecto)
+            key: Clave de la versión de los datos (se guarda junto al CSV,
+                 con extensión .key)
         """
         if filepath is None:
             filepath = config.PROCESSED_DATA_FILE
 
         df.to_csv(filepath, index=False)
+        if key is not None:
+            Path(filepath).with_suffix('.key').write_text(key)
         print(f"\n✓ Datos procesados guardados en: {filepath}")
 
-    def process_pipeline(self):
+    def save_feature_matrices(self, X_train, X_test, y_train, y_test, directory=None,
+                              key=None):
+        """
+        Guarda las matrices escaladas (float32) y las etiquetas (int8) como
+        archivos .npy para abrirlas como memmap
+
+        Args:
+            X_train, X_test, y_train, y_test: Salida de prepare_features
+            directory: Directorio destino (opcional, usa config.FEATURES_DIR)
+            key: Clave de la versión de los datos (se guarda en features.key)
+        """
+        if directory is None:
+            directory = config.FEATURES_DIR
+        os.makedirs(directory, exist_ok=True)
+
+        arrays = {
+            'X_train': np.ascontiguousarray(X_train, dtype=np.float32),
+            'X_test': np.ascontiguousarray(X_test, dtype=np.float32),
+            'y_train': np.asarray(y_train, dtype=np.int8),
+            'y_test': np.asarray(y_test, dtype=np.int8)
+        }
+        for name, array in arrays.items():
+            np.save(directory / f"{name}.npy", array)
+        if key is not None:
+            (directory / "features.key").write_text(key)
+        print(f"✓ Matrices de features guardadas en: {directory}")
+
+    def load_feature_matrices(self, directory=None, mmap_mode='r'):
+        """
+        Abre las matrices guardadas por save_feature_matrices
+
+        Args:
+            directory: Directorio (opcional, usa config.FEATURES_DIR)
+            mmap_mode: Modo de memmap ('r' = solo lectura, None = cargar en RAM)
+
+        Returns:
+            X_train, X_test, y_train, y_test
+        """
+        if directory is None:
+            directory = config.FEATURES_DIR
+        return tuple(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+                     for name in ('X_train', 'X_test', 'y_train', 'y_test'))
+
+    def stage_keys(self, filepath=None, explore=None):
+        """
+        Calcula las claves de caché de cada etapa del pipeline: huella del
+        CSV de entrada encadenada con la configuración que afecta a cada etapa
+        (los parámetros del modelo no intervienen)
+
+        La exploración no altera los datos, así que su clave no forma parte
+        de la cadena de limpieza/codificación/split.
+
+        Args:
+            filepath: Ruta al archivo CSV (opcional, usa config por defecto)
+            explore: Modo de exploración (default: config.EXPLORE_MODE)
+
+        Returns:
+            Diccionario {etapa: clave}
+        """
+        if filepath is None:
+            filepath = config.RAW_DATA_FILE
+        if explore is None:
+            explore = config.EXPLORE_MODE
+
+        fingerprint = dataset_fingerprint(filepath)
+        keys = {}
+        keys['explore'] = stage_key(fingerprint, 'explore', {
+            'categorical': config.CATEGORICAL_COLUMNS,
+            'mode': explore,
+            'sample_size': config.EXPLORE_SAMPLE_SIZE if explore == 'sample' else None
+        })
+        keys['clean'] = stage_key(fingerprint, 'clean', {
+            'numerical': config.NUMERICAL_COLUMNS,
+            'integer': config.INTEGER_COLUMNS,
+            'compact_dtypes': self.compact_dtypes
+        })
+        keys['encode'] = stage_key(keys['clean'], 'encode', {
+            'categorical': config.CATEGORICAL_COLUMNS,
+            'encoder': CategoricalEncoder.__name__
+        })
+        keys['split'] = stage_key(keys['encode'], 'split', {
+            'target': config.TARGET_COLUMN,
+            'test_size': config.TEST_SIZE,
+            'random_state': config.RANDOM_STATE
+        })
+        return keys
+
+    def _cached_stage(self, cache, name, key, compute):
+        """
+        Ejecuta una etapa solo si su salida no está en caché
+        """
+        with self.timer.stage(name):
+            result = cache.get(name, key)
+            if result is None:
+                result = compute()
+                cache.put(name, key, result)
+        return result
+
+    def process_pipeline(self, use_cache=True, explore=None, memmap=None):
         """
         Pipeline completo de procesamiento de datos
 
+        Las salidas de cada etapa se guardan en config.PIPELINE_CACHE_DIR y
+        se reutilizan mientras no cambien el CSV ni la configuración de datos.
+
+        Args:
+            use_cache: Si se usa el caché de etapas
+            explore: Modo de exploración: 'full', 'sample' (sobre
+                     config.EXPLORE_SAMPLE_SIZE filas) u 'off'
+                     (default: config.EXPLORE_MODE). El perfil se guarda en
+                     config.EXPLORE_REPORT_FILE
+            memmap: Si es True, las matrices se escriben en config.FEATURES_DIR
+                    y se retornan como memmaps de solo lectura
+                    (default: config.MEMMAP_FEATURES)
+
         Returns:
             X_train, X_test, y_train, y_test, df_clean
         """
@@ -274,24 +477,79 @@ class DataProcessor:
         print("PIPELINE DE PROCESAMIENTO DE DATOS")
         print("="*60)
 
-        # 1. Cargar datos
-        df = self.load_data()
-
-        # 2. Explorar datos
-        info = self.explore_data(df)
-        print(f"\nDataset inicial: {info['shape']}")
+        if explore is None:
+            explore = config.EXPLORE_MODE
+        if explore not in ('full', 'sample', 'off'):
+            raise ValueError(f"Modo de exploración desconocido: {explore}")
+
+        cache = StageCache(enabled=use_cache)
+        keys = self.stage_keys(explore=explore)
+        raw = {}
+
+        # 1. Cargar datos (solo si alguna etapa no está en caché)
+        def load():
+            if 'df' not in raw:
+                with self.timer.stage('load'):
+                    raw['df'] = self.load_data()
+            return raw['df']
+
+        # 2. Explorar datos (opcional o sobre una muestra)
+        def profile():
+            sample_size = config.EXPLORE_SAMPLE_SIZE if explore == 'sample' else None
+            info = self.explore_data(load(), sample_size=sample_size)
+            self.save_profile(info)
+            return info
+
+        if explore != 'off':
+            info = self._cached_stage(cache, 'explore', keys['explore'], profile)
+            print(f"\nDataset inicial: {info['shape']} "
+                  f"(perfil sobre {info['profiled_rows']} filas)")
 
         # 3. Limpiar datos
-        df_clean = self.clean_data(df)
+        df_clean = self._cached_stage(cache, 'clean', keys['clean'],
+                                      lambda: self.clean_data(load()))
 
         # 4. Codificar categóricas
-        df_encoded = self.encode_categorical(df_clean)
+        def encode():
+            df_encoded = self.encode_categorical(df_clean)
+            return {'df': df_encoded, 'label_encoders': self.label_encoders}
 
-        # 5. Guardar datos procesados
-        self.save_processed_data(df_encoded)
+        encoded = self._cached_stage(cache, 'encode', keys['encode'], encode)
+        df_encoded = encoded['df']
+        self.label_encoders = encoded['label_encoders']
+
+        # 5. Guardar datos procesados (se omite si el CSV ya es de esta versión)
+        key_file = config.PROCESSED_DATA_FILE.with_suffix('.key')
+        if not (config.PROCESSED_DATA_FILE.exists() and key_file.exists()
+                and key_file.read_text() == keys['encode']):
+            with self.timer.stage('save_data'):
+                self.save_processed_data(df_encoded, key=keys['encode'])
 
         # 6. Preparar features
-        X_train, X_test, y_train, y_test = self.prepare_features(df_encoded)
+        def split():
+            X_train, X_test, y_train, y_test = self.prepare_features(df_encoded)
+            return {
+                'arrays': (X_train, X_test, y_train, y_test),
+                'scaler': self.scaler,
+                'feature_names': self.feature_names,
+                'train_index': self.train_index
+            }
+
+        prepared = self._cached_stage(cache, 'split', keys['split'], split)
+        X_train, X_test, y_train, y_test = prepared['arrays']
+        self.scaler = prepared['scaler']
+        self.feature_names = prepared['feature_names']
+        self.train_index = prepared['train_index']
+
+        # 7. Matrices en disco compartidas como memmap (opcional)
+        if memmap is None:
+            memmap = config.MEMMAP_FEATURES
+        if memmap:
+            key_file = config.FEATURES_DIR / "features.key"
+            if not (key_file.exists() and key_file.read_text() == keys['split']):
+                self.save_feature_matrices(X_train, X_test, y_train, y_test,
+                                           key=keys['split'])
+            X_train, X_test, y_train, y_test = self.load_feature_matrices()
 
         print("\n" + "="*60)
         print("✓ PIPELINE COMPLETADO EXITOSAMENTE")
@@ -301,7 +559,8 @@ class DataProcessor:
 
     def save_encoders(self, filepath=None):
         """
-        Guarda los label encoders entrenados
+        Guarda los encoders entrenados como LabelEncoder de sklearn (formato
+        compatible de label_encoders.pkl)
 
         Args:
             filepath: Ruta donde guardar los encoders (opcional, usa config por defecto)
@@ -309,12 +568,15 @@ class DataProcessor:
         if filepath is None:
             filepath = config.ENCODERS_FILE
 
-        joblib.dump(self.label_encoders, filepath)
+        label_encoders = {col: encoder.to_label_encoder()
+                          for col, encoder in self.label_encoders.items()}
+        joblib.dump(label_encoders, filepath)
         print(f"✓ Label encoders guardados en: {filepath}")
 
     def load_encoders(self, filepath=None):
         """
-        Carga los label encoders previamente guardados
+        Carga los label encoders previamente guardados y los convierte a
+        CategoricalEncoder (mismas clases y códigos)
 
         Args:
             filepath: Ruta de los encoders a cargar (opcional, usa config por defecto)
@@ -322,9 +584,53 @@ class DataProcessor:
         if filepath is None:
             filepath = config.ENCODERS_FILE
 
-        self.label_encoders = joblib.load(filepath)
+        self.label_encoders = {
+            col: (encoder if isinstance(encoder, CategoricalEncoder)
+                  else CategoricalEncoder.from_label_encoder(encoder))
+            for col, encoder in joblib.load(filepath).items()
+        }
         print(f"✓ Label encoders cargados desde: {filepath}")
 
+    def transform_new_data(self, df, scaler):
+        """
+        Procesa un lote de registros nuevos con los encoders y el scaler ya
+        ajustados (sin reajustarlos), para el reentrenamiento incremental
+
+        Los registros con categorías no vistas en el entrenamiento se descartan.
+        Los outliers por IQR solo se eliminan si el lote tiene al menos
+        config.INCREMENTAL_OUTLIER_MIN_ROWS filas.
+
+        Args:
+            df: DataFrame raw con las features y la columna target
+            scaler: StandardScaler ajustado en el entrenamiento completo
+
+        Returns:
+            Tupla (X escalado, y)
+        """
+        remove_outliers = len(df) >= config.INCREMENTAL_OUTLIER_MIN_ROWS
+        if not remove_outliers:
+            print(f"⚠ Lote de {len(df)} filas: se omite la eliminación de outliers por IQR")
+        df_encoded = self.clean_data(df, remove_outliers=remove_outliers)
+
+        known = np.ones(len(df_encoded), dtype=bool)
+        for col in config.CATEGORICAL_COLUMNS:
+            if col in df_encoded.columns and col in self.label_encoders:
+                encoder = self.label_encoders[col]
+                codes = encoder.transform(df_encoded[col])
+                known &= codes != encoder.unknown_code
+                df_encoded[col] = codes
+        if not known.all():
+            print(f"⚠ Advertencia: {int((~known).sum())} registros con categorías no vistas descartados")
+            df_encoded = df_encoded[known]
+
+        X = df_encoded[self.feature_names]
+        y = df_encoded[config.TARGET_COLUMN]
+        if self.compact_dtypes:
+            X = X.astype(np.float32)
+        print(f"✓ Lote nuevo procesado: {len(X)} registros")
+
+        return scaler.transform(X), y
+
     def transform_single_input(self, features_dict):
         """
         Transforma un diccionario de features para predicción
@@ -336,22 +642,17 @@ class DataProcessor:
         Returns:
             DataFrame con las features transformadas y ordenadas
         """
-        # Crear DataFrame desde el diccionario
-        df = pd.DataFrame([features_dict])
+        row = dict(features_dict)
 
-        # Codificar variables categóricas
+        # Codificar variables categóricas (búsqueda en diccionario)
         for col in config.CATEGORICAL_COLUMNS:
-            if col in df.columns and col in self.label_encoders:
-                le = self.label_encoders[col]
-                try:
-                    df[col] = le.transform(df[col])
-                except ValueError as e:
-                    # Si el valor no existe en el encoder, usar el más común (0)
-                    print(f"⚠ Advertencia: Valor '{df[col].iloc[0]}' no reconocido en {col}, usando valor por defecto")
-                    df[col] = 0
+            if col in row and col in self.label_encoders:
+                encoder = self.label_encoders[col]
+                if not encoder.is_known(row[col]):
+                    print(f"⚠ Advertencia: Valor '{row[col]}' no reconocido en {col}, "
+                          f"usando el código de desconocido ({encoder.unknown_code})")
+                row[col] = encoder.encode(row[col])
 
         # Ordenar columnas en el orden correcto (mismo orden que en entrenamiento)
-        if self.feature_names is not None:
-            df = df[self.feature_names]
-
-        return df
+        columns = self.feature_names if self.feature_names is not None else list(row)
+        return pd.DataFrame([[row[col] for col in columns]], columns=columns)
@@ -2,21 +2,60 @@
 Estructuras de datos personalizadas para el sistema de Credit Risk
 Implementación de MinHeap y MaxHeap para manejo eficiente de datos
 """
+import operator
+from itertools import islice
 
+import numpy as np
+import config
 
-class MinHeap:
+
+class BinaryHeap:
     """
-    MinHeap - Estructura de datos donde el padre es menor que sus hijos
-    Útil para encontrar rápidamente las N mejores tasas de interés (más bajas)
+    Heap binario genérico almacenado en una lista
+
+    El orden lo define el comparador de la subclase (_before) aplicado a
+    los elementos o, si se indica key, a key(elemento). Los reacomodos son
+    iterativos y mueven un "hueco" en lugar de hacer intercambios, para
+    evitar llamadas por cada comparación.
 
     Complejidad:
     - Inserción: O(log n)
-    - Extracción del mínimo: O(log n)
-    - Obtener mínimo: O(1)
+    - Extracción de la raíz: O(log n)
+    - Obtener la raíz: O(1)
+    - Construcción desde un iterable (heapify de Floyd): O(n)
     """
 
-    def __init__(self):
+    _before = None
+
+    def __init__(self, key=None):
+        """
+        Args:
+            key: Función para extraer la clave de comparación (opcional)
+        """
         self.heap = []
+        self.key = key
+
+    @classmethod
+    def from_iterable(cls, iterable, key=None):
+        """
+        Construye un heap con todos los elementos en O(n) (heapify de Floyd)
+
+        Args:
+            iterable: Elementos a incluir
+            key: Función para extraer la clave de comparación (opcional)
+
+        Returns:
+            Heap con los elementos
+        """
+        heap = cls(key=key)
+        heap.heap = list(iterable)
+        heap.heapify()
+        return heap
+
+    def heapify(self):
+        """Restablece la propiedad de heap de abajo hacia arriba en O(n)"""
+        for i in range(len(self.heap) // 2 - 1, -1, -1):
+            self._heapify_down(i)
 
     def parent(self, i):
         """Retorna el índice del padre"""
@@ -45,51 +84,89 @@ class MinHeap:
 
     def _heapify_up(self, i):
         """Reorganiza el heap hacia arriba después de inserción"""
-        parent = self.parent(i)
-        if i > 0 and self.heap[i] < self.heap[parent]:
-            self.swap(i, parent)
-            self._heapify_up(parent)
+        heap = self.heap
+        before = self._before
+        key = self.key
+
+        item = heap[i]
+        item_key = key(item) if key else item
+        while i > 0:
+            parent = (i - 1) >> 1
+            parent_item = heap[parent]
+            if not before(item_key, key(parent_item) if key else parent_item):
+                break
+            heap[i] = parent_item
+            i = parent
+        heap[i] = item
 
-    def extract_min(self):
+    def _heapify_down(self, i):
+        """Reorganiza el heap hacia abajo después de extracción"""
+        heap = self.heap
+        before = self._before
+        key = self.key
+        size = len(heap)
+
+        item = heap[i]
+        item_key = key(item) if key else item
+        child = 2 * i + 1
+        while child < size:
+            child_key = key(heap[child]) if key else heap[child]
+            right = child + 1
+            if right < size:
+                right_key = key(heap[right]) if key else heap[right]
+                if before(right_key, child_key):
+                    child = right
+                    child_key = right_key
+            if not before(child_key, item_key):
+                break
+            heap[i] = heap[child]
+            i = child
+            child = 2 * i + 1
+        heap[i] = item
+
+    def pop(self):
         """
-        Extrae y retorna el elemento mínimo del heap
+        Extrae y retorna la raíz del heap
         Returns:
-            El elemento mínimo
+            El elemento de mayor prioridad
         Raises:
             IndexError: Si el heap está vacío
         """
         if len(self.heap) == 0:
             raise IndexError("Heap vacío")
 
-        if len(self.heap) == 1:
-            return self.heap.pop()
+        last = self.heap.pop()
+        if len(self.heap) == 0:
+            return last
 
-        min_val = self.heap[0]
-        self.heap[0] = self.heap.pop()
+        root = self.heap[0]
+        self.heap[0] = last
         self._heapify_down(0)
-        return min_val
-
-    def _heapify_down(self, i):
-        """Reorganiza el heap hacia abajo después de extracción"""
-        min_index = i
-        left = self.left_child(i)
-        right = self.right_child(i)
+        return root
 
-        if left < len(self.heap) and self.heap[left] < self.heap[min_index]:
-            min_index = left
-
-        if right < len(self.heap) and self.heap[right] < self.heap[min_index]:
-            min_index = right
+    def replace_top(self, key):
+        """
+        Extrae la raíz e inserta un nuevo elemento con un solo reacomodo
+        Args:
+            key: Elemento a insertar
+        Returns:
+            La raíz anterior
+        Raises:
+            IndexError: Si el heap está vacío
+        """
+        if len(self.heap) == 0:
+            raise IndexError("Heap vacío")
 
-        if min_index != i:
-            self.swap(i, min_index)
-            self._heapify_down(min_index)
+        root = self.heap[0]
+        self.heap[0] = key
+        self._heapify_down(0)
+        return root
 
     def peek(self):
         """
-        Retorna el elemento mínimo sin extraerlo
+        Retorna la raíz sin extraerla
         Returns:
-            El elemento mínimo
+            El elemento de mayor prioridad
         """
         if len(self.heap) == 0:
             raise IndexError("Heap vacío")
@@ -104,7 +181,31 @@ class MinHeap:
         return len(self.heap) == 0
 
 
-class MaxHeap:
+class MinHeap(BinaryHeap):
+    """
+    MinHeap - Estructura de datos donde el padre es menor que sus hijos
+    Útil para encontrar rápidamente las N mejores tasas de interés (más bajas)
+
+    Complejidad:
+    - Inserción: O(log n)
+    - Extracción del mínimo: O(log n)
+    - Obtener mínimo: O(1)
+    """
+
+    _before = staticmethod(operator.lt)
+
+    def extract_min(self):
+        """
+        Extrae y retorna el elemento mínimo del heap
+        Returns:
+            El elemento mínimo
+        Raises:
+            IndexError: Si el heap está vacío
+        """
+        return self.pop()
+
+
+class MaxHeap(BinaryHeap):
     """
     MaxHeap - Estructura de datos donde el padre es mayor que sus hijos
     Útil para encontrar rápidamente los N peores riesgos (más altos)
@@ -115,143 +216,489 @@ class MaxHeap:
     - Obtener máximo: O(1)
     """
 
-    def __init__(self):
+    _before = staticmethod(operator.gt)
+
+    def extract_max(self):
+        """
+        Extrae y retorna el elemento máximo del heap
+        Returns:
+            El elemento máximo
+        Raises:
+            IndexError: Si el heap está vacío
+        """
+        return self.pop()
+
+
+class IndexedPriorityQueue:
+    """
+    Cola de prioridad indexada por identificador (ej: id de cliente/préstamo)
+
+    Además del heap guarda la posición de cada id, lo que permite cambiar
+    la prioridad o eliminar un elemento arbitrario sin recorrer el heap.
+    No hereda de BinaryHeap: el heap guarda ids y la prioridad vive en un
+    diccionario aparte, por lo que su interfaz (push/pop por id) es otra.
+
+    Complejidad:
+    - push / update_priority / remove / pop: O(log n)
+    - contains / peek / get_priority: O(1)
+    """
+
+    def __init__(self, max_heap=True):
+        """
+        Args:
+            max_heap: Si True la raíz es la mayor prioridad, si no la menor
+        """
         self.heap = []
+        self.priorities = {}
+        self.data = {}
+        self._positions = {}
+        self._before = operator.gt if max_heap else operator.lt
 
-    def parent(self, i):
-        """Retorna el índice del padre"""
-        return (i - 1) // 2
+    def __contains__(self, item_id):
+        return item_id in self._positions
 
-    def left_child(self, i):
-        """Retorna el índice del hijo izquierdo"""
-        return 2 * i + 1
+    def __len__(self):
+        return len(self.heap)
 
-    def right_child(self, i):
-        """Retorna el índice del hijo derecho"""
-        return 2 * i + 2
+    def contains(self, item_id):
+        """Verifica si el id está en la cola"""
+        return item_id in self._positions
 
-    def swap(self, i, j):
-        """Intercambia dos elementos en el heap"""
-        self.heap[i], self.heap[j] = self.heap[j], self.heap[i]
+    def size(self):
+        """Retorna el número de ids en la cola"""
+        return len(self.heap)
 
-    def insert(self, key):
+    def is_empty(self):
+        """Verifica si la cola está vacía"""
+        return len(self.heap) == 0
+
+    def get_priority(self, item_id):
+        """Retorna la prioridad actual de un id"""
+        return self.priorities[item_id]
+
+    def push(self, item_id, priority, data=None):
         """
-        Inserta un nuevo elemento en el heap
+        Inserta un id o, si ya existe, actualiza su prioridad y datos
+
         Args:
-            key: Elemento a insertar (puede ser número o tupla)
+            item_id: Identificador único del elemento
+            priority: Prioridad (ej: probabilidad de default)
+            data: Información adicional asociada (opcional)
         """
-        self.heap.append(key)
+        if item_id in self._positions:
+            self.data[item_id] = data
+            self.update_priority(item_id, priority)
+            return
+
+        self.priorities[item_id] = priority
+        self.data[item_id] = data
+        self._positions[item_id] = len(self.heap)
+        self.heap.append(item_id)
         self._heapify_up(len(self.heap) - 1)
 
-    def _heapify_up(self, i):
-        """Reorganiza el heap hacia arriba después de inserción"""
-        parent = self.parent(i)
-        if i > 0 and self.heap[i] > self.heap[parent]:
-            self.swap(i, parent)
-            self._heapify_up(parent)
+    def update_priority(self, item_id, priority):
+        """
+        Cambia la prioridad de un id existente (decrease/increase-key)
 
-    def extract_max(self):
+        Raises:
+            KeyError: Si el id no está en la cola
         """
-        Extrae y retorna el elemento máximo del heap
+        i = self._positions[item_id]
+        self.priorities[item_id] = priority
+        self._heapify_up(i)
+        self._heapify_down(self._positions[item_id])
+
+    def remove(self, item_id):
+        """
+        Elimina un id arbitrario de la cola
+
         Returns:
-            El elemento máximo
+            Tupla (prioridad, data) del elemento eliminado
         Raises:
-            IndexError: Si el heap está vacío
+            KeyError: Si el id no está en la cola
+        """
+        i = self._positions.pop(item_id)
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self._positions[last] = i
+            self._heapify_up(i)
+            self._heapify_down(self._positions[last])
+        return self.priorities.pop(item_id), self.data.pop(item_id)
+
+    def pop(self):
+        """
+        Extrae el id de mayor prioridad
+
+        Returns:
+            Tupla (id, prioridad)
+        Raises:
+            IndexError: Si la cola está vacía
+        """
+        if len(self.heap) == 0:
+            raise IndexError("Heap vacío")
+        item_id = self.heap[0]
+        priority, _ = self.remove(item_id)
+        return item_id, priority
+
+    def peek(self):
+        """
+        Retorna (id, prioridad) de la raíz sin extraerla
         """
         if len(self.heap) == 0:
             raise IndexError("Heap vacío")
+        item_id = self.heap[0]
+        return item_id, self.priorities[item_id]
 
-        if len(self.heap) == 1:
-            return self.heap.pop()
+    def heapify(self):
+        """Reconstruye el heap y el índice de posiciones en O(n)"""
+        self._positions = {item_id: i for i, item_id in enumerate(self.heap)}
+        for i in range(len(self.heap) // 2 - 1, -1, -1):
+            self._heapify_down(i)
 
-        max_val = self.heap[0]
-        self.heap[0] = self.heap.pop()
-        self._heapify_down(0)
-        return max_val
+    def top(self, n):
+        """
+        Obtiene los n ids de mayor prioridad sin modificar la cola
 
-    def _heapify_down(self, i):
-        """Reorganiza el heap hacia abajo después de extracción"""
-        max_index = i
-        left = self.left_child(i)
-        right = self.right_child(i)
+        Returns:
+            Lista de tuplas (id, prioridad, data) en orden de prioridad
+        """
+        select = get_top_n_max if self._before is operator.gt else get_top_n_min
+        best = select(self.priorities.items(), n, key=lambda entry: entry[1])
+        return [(item_id, priority, self.data[item_id]) for item_id, priority in best]
 
-        if left < len(self.heap) and self.heap[left] > self.heap[max_index]:
-            max_index = left
+    def _heapify_up(self, i):
+        """Sube un id actualizando el índice de posiciones"""
+        heap = self.heap
+        positions = self._positions
+        priorities = self.priorities
+        before = self._before
+
+        item = heap[i]
+        item_priority = priorities[item]
+        while i > 0:
+            parent = (i - 1) >> 1
+            parent_item = heap[parent]
+            if not before(item_priority, priorities[parent_item]):
+                break
+            heap[i] = parent_item
+            positions[parent_item] = i
+            i = parent
+        heap[i] = item
+        positions[item] = i
 
-        if right < len(self.heap) and self.heap[right] > self.heap[max_index]:
-            max_index = right
+    def _heapify_down(self, i):
+        """Baja un id actualizando el índice de posiciones"""
+        heap = self.heap
+        positions = self._positions
+        priorities = self.priorities
+        before = self._before
+        size = len(heap)
+
+        item = heap[i]
+        item_priority = priorities[item]
+        child = 2 * i + 1
+        while child < size:
+            child_priority = priorities[heap[child]]
+            right = child + 1
+            if right < size and before(priorities[heap[right]], child_priority):
+                child = right
+                child_priority = priorities[heap[right]]
+            if not before(child_priority, item_priority):
+                break
+            heap[i] = heap[child]
+            positions[heap[i]] = i
+            i = child
+            child = 2 * i + 1
+        heap[i] = item
+        positions[item] = i
+
+
+class RiskWatchlist(IndexedPriorityQueue):
+    """
+    Lista de seguimiento de préstamos ordenada por probabilidad de default
 
-        if max_index != i:
-            self.swap(i, max_index)
-            self._heapify_down(max_index)
+    Se alimenta con los resultados de CreditRiskModel.predict_single: cada
+    nueva predicción de un préstamo ya seguido actualiza su posición en
+    O(log n).
+    """
 
-    def peek(self):
+    def __init__(self):
+        super().__init__(max_heap=True)
+
+    def track(self, loan_id, prediction):
         """
-        Retorna el elemento máximo sin extraerlo
-        Returns:
-            El elemento máximo
+        Agrega o actualiza un préstamo con el resultado de predict_single
+
+        Args:
+            loan_id: Identificador del préstamo o cliente
+            prediction: Diccionario retornado por predict_single
         """
-        if len(self.heap) == 0:
-            raise IndexError("Heap vacío")
-        return self.heap[0]
+        self.push(loan_id, prediction['probability_default'], prediction)
 
-    def size(self):
-        """Retorna el tamaño del heap"""
-        return len(self.heap)
+    def riskiest(self, n=10):
+        """
+        Obtiene los n préstamos con mayor probabilidad de default
 
-    def is_empty(self):
-        """Verifica si el heap está vacío"""
-        return len(self.heap) == 0
+        Returns:
+            Lista de tuplas (loan_id, probabilidad, predicción)
+        """
+        return self.top(n)
 
 
-def get_top_n_min(data, n):
+def get_top_n_min(data, n, key=None):
     """
-    Obtiene los N elementos más pequeños usando MinHeap
+    Obtiene los N elementos más pequeños con un heap acotado a N elementos
+
+    Mantiene un MaxHeap con los N mejores candidatos vistos; cada elemento
+    nuevo solo entra si es menor que el peor de ellos. Complejidad
+    O(len(data) log n) y memoria O(n). Si data es un array de NumPy y no
+    se indica key, se usa np.argpartition. Los valores (o claves) NaN se
+    descartan en ambos caminos.
 
     Args:
-        data: Lista de elementos
+        data: Iterable de elementos o array de NumPy
         n: Número de elementos a obtener
+        key: Función para extraer la clave de comparación (opcional)
 
     Returns:
-        Lista con los N elementos más pequeños
+        Lista con los N elementos más pequeños, en orden ascendente
     """
-    heap = MinHeap()
-    for item in data:
-        heap.insert(item)
-
-    result = []
-    for _ in range(min(n, heap.size())):
-        result.append(heap.extract_min())
+    if n <= 0:
+        return []
+
+    if isinstance(data, np.ndarray) and key is None:
+        if data.dtype.kind in 'fc':
+            data = data[~np.isnan(data)]
+        if n >= data.size:
+            return np.sort(data, axis=None).tolist()
+        candidates = data[np.argpartition(data, n - 1)[:n]]
+        return np.sort(candidates).tolist()
+
+    # Entradas (clave, posición, elemento): la posición desempata sin
+    # comparar los elementos y conserva los primeros ante empates
+    # Solo se construye la entrada si el elemento supera al peor candidato
+    heap = MaxHeap()
+    for i, item in enumerate(data):
+        item_key = key(item) if key else item
+        if item_key != item_key:  # NaN: no es comparable
+            continue
+        if heap.size() < n:
+            heap.insert((item_key, i, item))
+        elif item_key < heap.heap[0][0]:
+            heap.replace_top((item_key, i, item))
 
-    return result
+    return [item for _, _, item in sorted(heap.heap)]
 
 
-def get_top_n_max(data, n):
+def get_top_n_max(data, n, key=None):
     """
-    Obtiene los N elementos más grandes usando MaxHeap
+    Obtiene los N elementos más grandes con un heap acotado a N elementos
+
+    Mantiene un MinHeap con los N mejores candidatos vistos; cada elemento
+    nuevo solo entra si es mayor que el peor de ellos. Complejidad
+    O(len(data) log n) y memoria O(n). Si data es un array de NumPy y no
+    se indica key, se usa np.argpartition. Los valores (o claves) NaN se
+    descartan en ambos caminos.
 
     Args:
-        data: Lista de elementos
+        data: Iterable de elementos o array de NumPy
         n: Número de elementos a obtener
+        key: Función para extraer la clave de comparación (opcional)
 
     Returns:
-        Lista con los N elementos más grandes
+        Lista con los N elementos más grandes, en orden descendente
     """
-    heap = MaxHeap()
-    for item in data:
-        heap.insert(item)
+    if n <= 0:
+        return []
+
+    if isinstance(data, np.ndarray) and key is None:
+        if data.dtype.kind in 'fc':
+            data = data[~np.isnan(data)]
+        if n >= data.size:
+            return np.sort(data, axis=None)[::-1].tolist()
+        candidates = data[np.argpartition(data, data.size - n)[data.size - n:]]
+        return np.sort(candidates)[::-1].tolist()
+
+    # Entradas (clave, -posición, elemento): ante empates se conservan
+    # los primeros elementos vistos
+    heap = MinHeap()
+    for i, item in enumerate(data):
+        item_key = key(item) if key else item
+        if item_key != item_key:  # NaN: no es comparable
+            continue
+        if heap.size() < n:
+            heap.insert((item_key, -i, item))
+        elif item_key > heap.heap[0][0]:
+            heap.replace_top((item_key, -i, item))
+
+    return [item for _, _, item in sorted(heap.heap, reverse=True)]
+
+
+class StreamingRiskAggregator:
+    """
+    Agregador en streaming de scores (ej: probability_default) por lotes
+
+    Procesa la salida de un scoring por chunks manteniendo con memoria
+    acotada los k scores más altos (MinHeap de tamaño k) y los k más bajos
+    (MaxHeap de tamaño k), y retorna en cada lote los casos que superan el
+    umbral de alerta sin acumularlos.
+
+    Los empates se resuelven por id, así el resultado no depende del orden
+    de llegada y los parciales de varios workers se pueden combinar con
+    merge(). Los ids deben ser comparables entre sí (ej: todos int o str).
+    """
+
+    def __init__(self, k=10, threshold=None):
+        """
+        Args:
+            k: Cantidad de casos extremos a conservar por lado
+            threshold: Umbral de alerta (score >= threshold), opcional
+        """
+        self.k = k
+        self.threshold = threshold
+        self.count = 0
+        self.alert_count = 0
+        self._top = MinHeap()
+        self._bottom = MaxHeap()
+
+    def consume(self, ids, scores):
+        """
+        Procesa un lote de scores
+
+        Args:
+            ids: Secuencia de identificadores
+            scores: Secuencia paralela de scores
+
+        Returns:
+            Lista de tuplas (id, score) del lote con score >= threshold
+        """
+        ids = np.asarray(ids)
+        scores = np.asarray(scores, dtype=np.float64)
+        valid = ~np.isnan(scores)
+        if not valid.all():
+            ids = ids[valid]
+            scores = scores[valid]
+
+        self.count += len(scores)
+        if self.k > 0 and len(scores) > 0:
+            # Solo los k extremos del lote pueden entrar a cada heap
+            for i in self._extreme_positions(scores, largest=True):
+                self._offer_top(scores[i].item(), _to_python(ids[i]))
+            for i in self._extreme_positions(scores, largest=False):
+                self._offer_bottom(scores[i].item(), _to_python(ids[i]))
+
+        if self.threshold is None:
+            return []
+        mask = scores >= self.threshold
+        hits = list(zip(ids[mask].tolist(), scores[mask].tolist()))
+        self.alert_count += len(hits)
+        return hits
+
+    def consume_frame(self, df, score_column='probability_default', id_column=None):
+        """
+        Procesa un DataFrame de resultados (ej: un chunk de read_csv)
+
+        Args:
+            df: DataFrame con la columna de score
+            score_column: Columna con el score
+            id_column: Columna con el id (default: el índice del DataFrame)
+
+        Returns:
+            Lista de tuplas (id, score) del lote con score >= threshold
+        """
+        ids = df[id_column] if id_column is not None else df.index
+        return self.consume(ids.to_numpy(), df[score_column].to_numpy())
+
+    def merge(self, other):
+        """
+        Combina el resultado parcial de otro agregador (ej: de otro worker)
 
-    result = []
-    for _ in range(min(n, heap.size())):
-        result.append(heap.extract_max())
+        Args:
+            other: StreamingRiskAggregator con el mismo k
+
+        Returns:
+            self, con los extremos y conteos combinados
+        """
+        for score, item_id in other._top.heap:
+            self._offer_top(score, item_id)
+        for score, item_id in other._bottom.heap:
+            self._offer_bottom(score, item_id)
+        self.count += other.count
+        self.alert_count += other.alert_count
+        return self
+
+    def top(self):
+        """
+        Returns:
+            Lista de tuplas (id, score) con los k scores más altos, de mayor
+            a menor
+        """
+        return [(item_id, score) for score, item_id in sorted(self._top.heap, reverse=True)]
 
-    return result
+    def bottom(self):
+        """
+        Returns:
+            Lista de tuplas (id, score) con los k scores más bajos, de menor
+            a mayor
+        """
+        return [(item_id, score) for score, item_id in sorted(self._bottom.heap)]
+
+    def _extreme_positions(self, scores, largest):
+        """
+        Posiciones de los k scores extremos de un lote (np.partition),
+        incluyendo los empatados con el k-ésimo para desempatar por id
+        """
+        if len(scores) <= self.k:
+            return range(len(scores))
+        if largest:
+            kth = np.partition(scores, len(scores) - self.k)[len(scores) - self.k]
+            return np.flatnonzero(scores >= kth)
+        kth = np.partition(scores, self.k - 1)[self.k - 1]
+        return np.flatnonzero(scores <= kth)
+
+    def _offer_top(self, score, item_id):
+        entry = (score, item_id)
+        if self._top.size() < self.k:
+            self._top.insert(entry)
+        elif entry > self._top.heap[0]:
+            self._top.replace_top(entry)
+
+    def _offer_bottom(self, score, item_id):
+        entry = (score, item_id)
+        if self._bottom.size() < self.k:
+            self._bottom.insert(entry)
+        elif entry < self._bottom.heap[0]:
+            self._bottom.replace_top(entry)
+
+
+def _to_python(value):
+    """Convierte escalares de NumPy a tipos nativos de Python"""
+    return value.item() if isinstance(value, np.generic) else value
 
 
 # =============================================================================
 # ÁRBOLES BINARIOS DE BÚSQUEDA (BST)
 # =============================================================================
 
+def _range_cursor(after_key):
+    """
+    Normaliza un cursor de paginación a una tupla (key, seq)
+
+    Args:
+        after_key: None, una clave (equivale a pasar todas las secuencias
+                   de esa clave) o una tupla (key, seq)
+
+    Returns:
+        Tupla (key, seq) o None
+    """
+    if after_key is None:
+        return None
+    if isinstance(after_key, tuple):
+        return after_key
+    return after_key, float('inf')
+
+
 class TreeNode:
     """
     Nodo para el Árbol Binario de Búsqueda
@@ -259,13 +706,21 @@ class TreeNode:
     Attributes:
         key: Valor clave para ordenamiento (ej: score de riesgo, monto)
         data: Datos adicionales asociados al nodo (ej: info del cliente)
+        seq: Número de secuencia de inserción; ordena los nodos con la misma
+             clave y junto con ella forma el cursor de paginación
         left: Referencia al hijo izquierdo
         right: Referencia al hijo derecho
+
+    Usa __slots__ para no reservar un __dict__ por nodo: en árboles con
+    todo el dataset la sobrecarga por nodo se reduce a la mitad.
     """
 
-    def __init__(self, key, data=None):
+    __slots__ = ('key', 'data', 'seq', 'left', 'right')
+
+    def __init__(self, key, data=None, seq=0):
         self.key = key
         self.data = data
+        self.seq = seq
         self.left = None
         self.right = None
 
@@ -292,6 +747,7 @@ class BinarySearchTree:
     def __init__(self):
         self.root = None
         self._size = 0
+        self._next_seq = 0
 
     def insert(self, key, data=None):
         """
@@ -304,30 +760,32 @@ class BinarySearchTree:
         Returns:
             El nodo insertado
         """
-        new_node = TreeNode(key, data)
+        new_node = TreeNode(key, data, self._next_seq)
+        self._next_seq += 1
 
         if self.root is None:
             self.root = new_node
             self._size += 1
             return new_node
 
-        self._insert_recursive(self.root, new_node)
+        # Inserción iterativa: con claves repetidas el árbol puede ser más
+        # profundo que el límite de recursión de Python
+        current = self.root
+        while True:
+            if key < current.key:
+                if current.left is None:
+                    current.left = new_node
+                    break
+                current = current.left
+            else:
+                if current.right is None:
+                    current.right = new_node
+                    break
+                current = current.right
+
         self._size += 1
         return new_node
 
-    def _insert_recursive(self, current, new_node):
-        """Inserción recursiva en el subárbol"""
-        if new_node.key < current.key:
-            if current.left is None:
-                current.left = new_node
-            else:
-                self._insert_recursive(current.left, new_node)
-        else:
-            if current.right is None:
-                current.right = new_node
-            else:
-                self._insert_recursive(current.right, new_node)
-
     def search(self, key):
         """
         Busca un nodo por su clave
@@ -338,67 +796,62 @@ class BinarySearchTree:
         Returns:
             El nodo encontrado o None si no existe
         """
-        return self._search_recursive(self.root, key)
-
-    def _search_recursive(self, current, key):
-        """Búsqueda recursiva en el subárbol"""
-        if current is None:
-            return None
-
-        if key == current.key:
-            return current
-        elif key < current.key:
-            return self._search_recursive(current.left, key)
-        else:
-            return self._search_recursive(current.right, key)
+        current = self.root
+        while current is not None and key != current.key:
+            current = current.left if key < current.key else current.right
+        return current
 
     def delete(self, key):
         """
         Elimina un nodo del árbol
 
+        Iterativa, como insert: un árbol degenerado puede superar el límite
+        de recursión de Python
+
         Args:
             key: Valor del nodo a eliminar
 
         Returns:
             True si se eliminó, False si no se encontró
         """
-        if self.search(key) is None:
-            return False
-
-        self.root = self._delete_recursive(self.root, key)
-        self._size -= 1
-        return True
+        parent = None
+        current = self.root
+        while current is not None and key != current.key:
+            parent = current
+            current = current.left if key < current.key else current.right
 
-    def _delete_recursive(self, current, key):
-        """Eliminación recursiva en el subárbol"""
         if current is None:
-            return None
-
-        if key < current.key:
-            current.left = self._delete_recursive(current.left, key)
-        elif key > current.key:
-            current.right = self._delete_recursive(current.right, key)
-        else:
-            # Nodo encontrado - 3 casos
-
-            # Caso 1: Nodo sin hijos (hoja)
-            if current.left is None and current.right is None:
-                return None
-
-            # Caso 2: Nodo con un solo hijo
-            if current.left is None:
-                return current.right
-            if current.right is None:
-                return current.left
+            return False
 
-            # Caso 3: Nodo con dos hijos
-            # Encontrar el sucesor inorder (mínimo del subárbol derecho)
-            successor = self._find_min_node(current.right)
+        if current.left is not None and current.right is not None:
+            # Nodo con dos hijos: reemplazar por el sucesor inorder (mínimo
+            # del subárbol derecho) desenlazándolo directamente; con claves
+            # repetidas, buscarlo de nuevo por clave podría eliminar otro nodo
+            successor_parent = current
+            successor = current.right
+            while successor.left is not None:
+                successor_parent = successor
+                successor = successor.left
+
+            if successor_parent is current:
+                current.right = successor.right
+            else:
+                successor_parent.left = successor.right
             current.key = successor.key
             current.data = successor.data
-            current.right = self._delete_recursive(current.right, successor.key)
+            current.seq = successor.seq
+        else:
+            # Hoja o nodo con un solo hijo: el hijo ocupa su lugar
+            child = current.left if current.left is not None else current.right
+            if parent is None:
+                self.root = child
+            elif parent.left is current:
+                parent.left = child
+            else:
+                parent.right = child
 
-        return current
+        self._size -= 1
+        return True
 
     def find_min(self):
         """
@@ -444,16 +897,43 @@ class BinarySearchTree:
         Returns:
             Lista de tuplas (key, data) en orden ascendente
         """
-        result = []
-        self._inorder_recursive(self.root, result)
-        return result
+        return list(self.iter_inorder())
 
-    def _inorder_recursive(self, node, result):
-        """Recorrido inorder recursivo"""
-        if node is not None:
-            self._inorder_recursive(node.left, result)
-            result.append((node.key, node.data))
-            self._inorder_recursive(node.right, result)
+    def iter_inorder(self):
+        """
+        Recorrido Inorder perezoso (generador iterativo con pila explícita)
+        No construye la lista completa ni depende del límite de recursión
+
+        Yields:
+            Tuplas (key, data) en orden ascendente
+        """
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.key, node.data
+            node = node.right
+
+    def iter_reverse_inorder(self):
+        """
+        Recorrido Inorder inverso (derecha - raíz - izquierda) perezoso
+        Produce los elementos en orden descendente sin invertir una lista
+
+        Yields:
+            Tuplas (key, data) en orden descendente
+        """
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.key, node.data
+            node = node.left
 
     def preorder(self):
         """
@@ -463,16 +943,24 @@ class BinarySearchTree:
         Returns:
             Lista de tuplas (key, data) en preorder
         """
-        result = []
-        self._preorder_recursive(self.root, result)
-        return result
+        return list(self.iter_preorder())
+
+    def iter_preorder(self):
+        """
+        Recorrido Preorder perezoso (generador iterativo)
 
-    def _preorder_recursive(self, node, result):
-        """Recorrido preorder recursivo"""
-        if node is not None:
-            result.append((node.key, node.data))
-            self._preorder_recursive(node.left, result)
-            self._preorder_recursive(node.right, result)
+        Yields:
+            Tuplas (key, data) en preorder
+        """
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node.key, node.data
+            # Se apila primero la derecha para visitar antes la izquierda
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
 
     def postorder(self):
         """
@@ -482,16 +970,29 @@ class BinarySearchTree:
         Returns:
             Lista de tuplas (key, data) en postorder
         """
-        result = []
-        self._postorder_recursive(self.root, result)
-        return result
+        return list(self.iter_postorder())
 
-    def _postorder_recursive(self, node, result):
-        """Recorrido postorder recursivo"""
-        if node is not None:
-            self._postorder_recursive(node.left, result)
-            self._postorder_recursive(node.right, result)
-            result.append((node.key, node.data))
+    def iter_postorder(self):
+        """
+        Recorrido Postorder perezoso (generador iterativo)
+
+        Yields:
+            Tuplas (key, data) en postorder
+        """
+        stack = []
+        last_visited = None
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            peek = stack[-1]
+            # Visitar el subárbol derecho antes que la raíz
+            if peek.right is not None and last_visited is not peek.right:
+                node = peek.right
+            else:
+                yield peek.key, peek.data
+                last_visited = stack.pop()
 
     def height(self):
         """
@@ -500,15 +1001,14 @@ class BinarySearchTree:
         Returns:
             Altura del árbol (0 si está vacío)
         """
-        return self._height_recursive(self.root)
-
-    def _height_recursive(self, node):
-        """Cálculo recursivo de altura"""
-        if node is None:
-            return 0
-        left_height = self._height_recursive(node.left)
-        right_height = self._height_recursive(node.right)
-        return 1 + max(left_height, right_height)
+        # Recorrido por niveles: no depende del límite de recursión
+        height = 0
+        level = [self.root] if self.root is not None else []
+        while level:
+            height += 1
+            level = [child for node in level
+                     for child in (node.left, node.right) if child is not None]
+        return height
 
     def size(self):
         """Retorna el número de nodos en el árbol"""
@@ -518,39 +1018,95 @@ class BinarySearchTree:
         """Verifica si el árbol está vacío"""
         return self.root is None
 
-    def range_search(self, min_key, max_key):
+    def range_search(self, min_key, max_key, limit=None, after_key=None):
         """
         Busca todos los nodos dentro de un rango [min_key, max_key]
 
-        Útil para encontrar clientes con score de riesgo en un rango específico
+        Útil para encontrar clientes con score de riesgo en un rango específico.
+        Admite paginación por cursor (ver range_page).
 
         Args:
             min_key: Límite inferior del rango (inclusivo)
             max_key: Límite superior del rango (inclusivo)
+            limit: Tamaño máximo de la página (None = sin límite)
+            after_key: Cursor exclusivo (ver iter_range)
 
         Returns:
             Lista de tuplas (key, data) dentro del rango
         """
-        result = []
-        self._range_search_recursive(self.root, min_key, max_key, result)
-        return result
+        if limit is None:
+            return list(self.iter_range(min_key, max_key, after_key))
+        return self.range_page(min_key, max_key, limit, after_key)[0]
 
-    def _range_search_recursive(self, node, min_key, max_key, result):
-        """Búsqueda en rango recursiva"""
-        if node is None:
-            return
+    def range_page(self, min_key, max_key, limit, after_key=None):
+        """
+        Página de a lo sumo limit nodos en [min_key, max_key] y el cursor de
+        la siguiente
 
-        # Si el nodo actual es mayor que min_key, buscar en subárbol izquierdo
-        if node.key > min_key:
-            self._range_search_recursive(node.left, min_key, max_key, result)
+        El cursor es (key, seq) del último nodo de la página, así una página
+        puede cortar una racha de claves repetidas y la siguiente continúa
+        dentro de ella.
 
-        # Si el nodo está dentro del rango, agregarlo
-        if min_key <= node.key <= max_key:
-            result.append((node.key, node.data))
+        Args:
+            min_key: Límite inferior del rango (inclusivo)
+            max_key: Límite superior del rango (inclusivo)
+            limit: Tamaño máximo de la página
+            after_key: Cursor exclusivo (ver iter_range)
 
-        # Si el nodo actual es menor que max_key, buscar en subárbol derecho
-        if node.key < max_key:
-            self._range_search_recursive(node.right, min_key, max_key, result)
+        Returns:
+            Tupla (lista de tuplas (key, data), cursor de la siguiente página
+            o None si no quedan nodos)
+        """
+        nodes = self._iter_range_nodes(min_key, max_key, after_key)
+        page = list(islice(nodes, max(limit, 0)))
+        if not page or next(nodes, None) is None:
+            return [(node.key, node.data) for node in page], None
+        last = page[-1]
+        return [(node.key, node.data) for node in page], (last.key, last.seq)
+
+    def iter_range(self, min_key, max_key, after_key=None):
+        """
+        Búsqueda en rango perezosa: produce los nodos en [min_key, max_key]
+        en orden ascendente, visitando solo los subárboles necesarios
+
+        Args:
+            min_key: Límite inferior del rango (inclusivo)
+            max_key: Límite superior del rango (inclusivo)
+            after_key: Cursor exclusivo: una clave (solo claves mayores) o
+                       una tupla (key, seq) devuelta por range_page
+
+        Yields:
+            Tuplas (key, data) dentro del rango
+        """
+        for node in self._iter_range_nodes(min_key, max_key, after_key):
+            yield node.key, node.data
+
+    def _iter_range_nodes(self, min_key, max_key, after_key=None):
+        """Nodos en [min_key, max_key] posteriores al cursor, en orden"""
+        cursor = _range_cursor(after_key)
+
+        # Inorder el árbol queda ordenado por (key, seq): las claves iguales
+        # se insertan a la derecha, detrás de las existentes
+        def in_lower_bound(node):
+            return node.key >= min_key and (cursor is None or (node.key, node.seq) > cursor)
+
+        stack = []
+        node = self.root
+        while True:
+            while node is not None:
+                if in_lower_bound(node):
+                    stack.append(node)
+                    node = node.left
+                else:
+                    # El nodo y su subárbol izquierdo quedan fuera del rango
+                    node = node.right
+            if not stack:
+                return
+            node = stack.pop()
+            if node.key > max_key:
+                return
+            yield node
+            node = node.right
 
     def level_order(self):
         """
@@ -589,8 +1145,61 @@ class CreditRiskBST(BinarySearchTree):
 
     Extiende BinarySearchTree con métodos específicos para el dominio
     de análisis de riesgo crediticio.
+
+    Mantiene contadores por banda de riesgo (bajo/medio/alto) que se
+    actualizan en cada inserción y eliminación, de modo que la
+    distribución de riesgo se obtiene en O(1).
     """
 
+    def __init__(self, low_threshold=None, high_threshold=None):
+        """
+        Args:
+            low_threshold: Score máximo de la banda 'bajo'
+                           (default: config.RISK_LOW_THRESHOLD)
+            high_threshold: Score máximo de la banda 'medio'
+                            (default: config.RISK_HIGH_THRESHOLD)
+        """
+        super().__init__()
+        if low_threshold is None:
+            low_threshold = config.RISK_LOW_THRESHOLD
+        if high_threshold is None:
+            high_threshold = config.RISK_HIGH_THRESHOLD
+        if low_threshold > high_threshold:
+            raise ValueError("low_threshold no puede ser mayor que high_threshold")
+
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self._band_counts = {'bajo': 0, 'medio': 0, 'alto': 0}
+
+    def risk_band(self, risk_score):
+        """
+        Clasifica un score en su banda de riesgo
+
+        Args:
+            risk_score: Score de riesgo del cliente
+
+        Returns:
+            'bajo', 'medio' o 'alto'
+        """
+        if risk_score <= self.low_threshold:
+            return 'bajo'
+        if risk_score <= self.high_threshold:
+            return 'medio'
+        return 'alto'
+
+    def insert(self, key, data=None):
+        """Inserta un nodo y actualiza el contador de su banda de riesgo"""
+        node = super().insert(key, data)
+        self._band_counts[self.risk_band(key)] += 1
+        return node
+
+    def delete(self, key):
+        """Elimina un nodo y actualiza el contador de su banda de riesgo"""
+        removed = super().delete(key)
+        if removed:
+            self._band_counts[self.risk_band(key)] -= 1
+        return removed
+
     def insert_client(self, risk_score, client_info):
         """
         Inserta un cliente ordenado por su score de riesgo
@@ -601,67 +1210,76 @@ class CreditRiskBST(BinarySearchTree):
         """
         return self.insert(risk_score, client_info)
 
-    def find_high_risk_clients(self, threshold=70):
+    def find_high_risk_clients(self, threshold=None, limit=None, after_key=None):
         """
         Encuentra todos los clientes con alto riesgo
 
         Args:
-            threshold: Umbral de riesgo (default: 70)
+            threshold: Umbral de riesgo (default: high_threshold del árbol)
+            limit: Tamaño máximo de la página (None = sin límite)
+            after_key: Cursor de paginación (ver BinarySearchTree.range_page)
 
         Returns:
             Lista de clientes con score >= threshold
         """
-        return self.range_search(threshold, 100)
+        if threshold is None:
+            threshold = self.high_threshold
+        return self.range_search(threshold, 100, limit=limit, after_key=after_key)
+
+    def iter_high_risk_clients(self, threshold=None):
+        """
+        Versión perezosa de find_high_risk_clients
+
+        Args:
+            threshold: Umbral de riesgo (default: high_threshold del árbol)
+
+        Yields:
+            Tuplas (score, client_info) con score >= threshold
+        """
+        if threshold is None:
+            threshold = self.high_threshold
+        return self.iter_range(threshold, 100)
 
-    def find_low_risk_clients(self, threshold=30):
+    def find_low_risk_clients(self, threshold=None):
         """
         Encuentra todos los clientes con bajo riesgo
 
         Args:
-            threshold: Umbral de riesgo (default: 30)
+            threshold: Umbral de riesgo (default: low_threshold del árbol)
 
         Returns:
             Lista de clientes con score <= threshold
         """
+        if threshold is None:
+            threshold = self.low_threshold
         return self.range_search(0, threshold)
 
-    def find_medium_risk_clients(self, low=30, high=70):
+    def find_medium_risk_clients(self, low=None, high=None):
         """
         Encuentra todos los clientes con riesgo medio
 
         Args:
-            low: Límite inferior (default: 30)
-            high: Límite superior (default: 70)
+            low: Límite inferior (default: low_threshold del árbol)
+            high: Límite superior (default: high_threshold del árbol)
 
         Returns:
             Lista de clientes con score entre low y high
         """
+        if low is None:
+            low = self.low_threshold
+        if high is None:
+            high = self.high_threshold
         return self.range_search(low, high)
 
     def get_risk_distribution(self):
         """
-        Obtiene la distribución de riesgo de todos los clientes
+        Obtiene la distribución de riesgo de todos los clientes en O(1)
+        a partir de los contadores mantenidos en insert/delete
 
         Returns:
             Diccionario con conteo por categoría de riesgo
         """
-        all_clients = self.inorder()
-
-        distribution = {
-            'bajo': 0,      # 0-30
-            'medio': 0,     # 31-70
-            'alto': 0       # 71-100
-        }
-
-        for score, _ in all_clients:
-            if score <= 30:
-                distribution['bajo'] += 1
-            elif score <= 70:
-                distribution['medio'] += 1
-            else:
-                distribution['alto'] += 1
-
-        return distribution
+        return dict(self._band_counts)
 
     def get_clients_sorted_by_risk(self, ascending=True):
         """
@@ -673,10 +1291,521 @@ class CreditRiskBST(BinarySearchTree):
         Returns:
             Lista de clientes ordenados
         """
-        clients = self.inorder()
+        return list(self.iter_clients_sorted_by_risk(ascending))
+
+    def iter_clients_sorted_by_risk(self, ascending=True):
+        """
+        Versión perezosa de get_clients_sorted_by_risk
+        El orden descendente usa el recorrido inorder inverso
+
+        Args:
+            ascending: Si True, orden ascendente (menor a mayor riesgo)
+
+        Returns:
+            Generador de tuplas (score, client_info)
+        """
+        if ascending:
+            return self.iter_inorder()
+        return self.iter_reverse_inorder()
+
+
+class SortedRiskIndex:
+    """
+    Índice estático de scores de riesgo sobre arrays de NumPy ordenados
+
+    Alternativa a CreditRiskBST para snapshots de solo lectura: guarda los
+    scores ordenados en un array contiguo con un array paralelo de row ids
+    (posición de la fila en el DataFrame de origen). Ofrece la misma API de
+    consulta que CreditRiskBST; el payload de cada resultado es el row id.
+    La secuencia de cada score es su posición en scores, así los cursores
+    (key, seq) coinciden con los de build_balanced_credit_bst.
+
+    Complejidad:
+    - Construcción: O(n log n) (un argsort vectorizado)
+    - Búsqueda en rango: O(log n + k)
+    - Conteos, distribución y percentiles: O(log n) / O(1)
+    """
+
+    def __init__(self, scores, row_ids=None, low_threshold=None, high_threshold=None):
+        """
+        Args:
+            scores: Secuencia o array de scores de riesgo
+            row_ids: Array paralelo de row ids (default: 0..n-1)
+            low_threshold: Score máximo de la banda 'bajo'
+                           (default: config.RISK_LOW_THRESHOLD)
+            high_threshold: Score máximo de la banda 'medio'
+                            (default: config.RISK_HIGH_THRESHOLD)
+        """
+        scores = np.asarray(scores)
+        if row_ids is None:
+            row_ids = np.arange(len(scores), dtype=np.int64)
+        order = np.argsort(scores, kind='stable')
+        self.keys = scores[order]
+        self.row_ids = np.asarray(row_ids)[order]
+        self.seqs = order  # creciente dentro de cada racha de claves iguales
+
+        self.low_threshold = (config.RISK_LOW_THRESHOLD
+                              if low_threshold is None else low_threshold)
+        self.high_threshold = (config.RISK_HIGH_THRESHOLD
+                               if high_threshold is None else high_threshold)
+
+    def size(self):
+        """Retorna el número de clientes indexados"""
+        return len(self.keys)
+
+    def is_empty(self):
+        """Verifica si el índice está vacío"""
+        return len(self.keys) == 0
+
+    def find_min(self):
+        """Retorna (score, row_id) del menor score o None si está vacío"""
+        if self.is_empty():
+            return None
+        return self.keys[0].item(), self.row_ids[0].item()
+
+    def find_max(self):
+        """Retorna (score, row_id) del mayor score o None si está vacío"""
+        if self.is_empty():
+            return None
+        return self.keys[-1].item(), self.row_ids[-1].item()
+
+    def _bounds(self, min_key, max_key, after_key=None):
+        """Posiciones [lo, hi) de las claves en el rango posteriores al cursor"""
+        lo = int(np.searchsorted(self.keys, min_key, side='left'))
+        cursor = _range_cursor(after_key)
+        if cursor is not None:
+            key, seq = cursor
+            start = int(np.searchsorted(self.keys, key, side='left'))
+            end = int(np.searchsorted(self.keys, key, side='right'))
+            after = start + int(np.searchsorted(self.seqs[start:end], seq, side='right'))
+            lo = max(lo, after)
+        hi = int(np.searchsorted(self.keys, max_key, side='right'))
+        return lo, max(lo, hi)
+
+    def range_arrays(self, min_key, max_key):
+        """
+        Vistas (sin copia) de los scores y row ids en [min_key, max_key]
+
+        Returns:
+            Tupla (scores, row_ids) de arrays de NumPy
+        """
+        lo, hi = self._bounds(min_key, max_key)
+        return self.keys[lo:hi], self.row_ids[lo:hi]
+
+    def range_search(self, min_key, max_key, limit=None, after_key=None):
+        """
+        Busca todos los clientes dentro de un rango [min_key, max_key]
+
+        Misma semántica que BinarySearchTree.range_search, incluida la
+        paginación por cursor con after_key.
+
+        Returns:
+            Lista de tuplas (score, row_id) en orden ascendente
+        """
+        if limit is not None:
+            return self.range_page(min_key, max_key, limit, after_key)[0]
+        lo, hi = self._bounds(min_key, max_key, after_key)
+        return list(zip(self.keys[lo:hi].tolist(), self.row_ids[lo:hi].tolist()))
+
+    def range_page(self, min_key, max_key, limit, after_key=None):
+        """
+        Página de a lo sumo limit clientes y el cursor (key, seq) de la
+        siguiente (misma semántica que BinarySearchTree.range_page)
+
+        Returns:
+            Tupla (lista de tuplas (score, row_id), cursor o None)
+        """
+        lo, hi = self._bounds(min_key, max_key, after_key)
+        end = min(hi, lo + max(limit, 0))
+        page = list(zip(self.keys[lo:end].tolist(), self.row_ids[lo:end].tolist()))
+        if lo == end or end == hi:
+            return page, None
+        return page, (self.keys[end - 1].item(), self.seqs[end - 1].item())
+
+    def iter_range(self, min_key, max_key, after_key=None):
+        """
+        Versión perezosa de range_search
+
+        Yields:
+            Tuplas (score, row_id) dentro del rango
+        """
+        lo, hi = self._bounds(min_key, max_key, after_key)
+        for i in range(lo, hi):
+            yield self.keys[i].item(), self.row_ids[i].item()
+
+    def count_range(self, min_key, max_key):
+        """Cuenta los clientes con score en [min_key, max_key] en O(log n)"""
+        lo, hi = self._bounds(min_key, max_key)
+        return hi - lo
+
+    def rank(self, score):
+        """Cuenta los clientes con score <= score en O(log n)"""
+        return int(np.searchsorted(self.keys, score, side='right'))
+
+    def percentile(self, q):
+        """
+        Percentil q (0-100) de los scores con interpolación lineal, en O(1)
+        (equivalente a np.percentile sobre los scores)
+        """
+        if self.is_empty():
+            raise IndexError("Índice vacío")
+        position = q / 100 * (len(self.keys) - 1)
+        lower = int(np.floor(position))
+        upper = min(lower + 1, len(self.keys) - 1)
+        fraction = position - lower
+        return float(self.keys[lower] + (self.keys[upper] - self.keys[lower]) * fraction)
+
+    def find_high_risk_clients(self, threshold=None, limit=None, after_key=None):
+        """
+        Encuentra todos los clientes con alto riesgo
+
+        Returns:
+            Lista de tuplas (score, row_id) con score >= threshold
+        """
+        if threshold is None:
+            threshold = self.high_threshold
+        return self.range_search(threshold, 100, limit=limit, after_key=after_key)
+
+    def iter_high_risk_clients(self, threshold=None):
+        """Versión perezosa de find_high_risk_clients"""
+        if threshold is None:
+            threshold = self.high_threshold
+        return self.iter_range(threshold, 100)
+
+    def find_low_risk_clients(self, threshold=None):
+        """
+        Encuentra todos los clientes con bajo riesgo
+
+        Returns:
+            Lista de tuplas (score, row_id) con score <= threshold
+        """
+        if threshold is None:
+            threshold = self.low_threshold
+        return self.range_search(0, threshold)
+
+    def find_medium_risk_clients(self, low=None, high=None):
+        """
+        Encuentra todos los clientes con riesgo medio
+
+        Returns:
+            Lista de tuplas (score, row_id) con score entre low y high
+        """
+        if low is None:
+            low = self.low_threshold
+        if high is None:
+            high = self.high_threshold
+        return self.range_search(low, high)
+
+    def get_risk_distribution(self):
+        """
+        Obtiene la distribución de riesgo con dos búsquedas binarias
+
+        Returns:
+            Diccionario con conteo por categoría de riesgo
+        """
+        low = self.rank(self.low_threshold)
+        medium = self.rank(self.high_threshold) - low
+        return {
+            'bajo': low,
+            'medio': medium,
+            'alto': len(self.keys) - low - medium
+        }
+
+    def inorder(self):
+        """Retorna todos los (score, row_id) en orden ascendente"""
+        return list(zip(self.keys.tolist(), self.row_ids.tolist()))
+
+    def get_clients_sorted_by_risk(self, ascending=True):
+        """
+        Obtiene todos los clientes ordenados por riesgo
+
+        Returns:
+            Lista de tuplas (score, row_id)
+        """
+        return list(self.iter_clients_sorted_by_risk(ascending))
+
+    def iter_clients_sorted_by_risk(self, ascending=True):
+        """Versión perezosa de get_clients_sorted_by_risk"""
+        positions = range(len(self.keys))
         if not ascending:
-            clients.reverse()
-        return clients
+            positions = reversed(positions)
+        for i in positions:
+            yield self.keys[i].item(), self.row_ids[i].item()
+
+
+class KDTreeIndex:
+    """
+    Árbol k-d para consultas multidimensionales sobre columnas numéricas
+    (ej: person_income, loan_amnt, loan_int_rate)
+
+    Los puntos se reordenan en un único array de NumPy y cada nodo guarda
+    el rango [inicio, fin) de sus puntos y su caja envolvente. Los nodos se
+    dividen por la mediana de la dimensión con mayor extensión hasta tener
+    leaf_size puntos.
+
+    Las consultas recorren el árbol nivel por nivel procesando todos los
+    nodos de un nivel con operaciones vectorizadas:
+    - Consulta por rangos: descarta los nodos cuya caja no intersecta la
+      consulta y acepta completos los que quedan contenidos.
+    - k vecinos más cercanos: el radio inicial sale del nodo que contiene
+      al punto; luego solo se visitan los nodos cuya caja está dentro de
+      ese radio. La distancia es euclidiana sobre columnas estandarizadas
+      (si scale=True) para que ninguna unidad domine.
+
+    Complejidad típica: construcción O(n log n), consultas ~O(log n + k)
+    """
+
+    def __init__(self, points, row_ids=None, columns=None, leaf_size=64, scale=True):
+        """
+        Args:
+            points: Array (n, d) con las coordenadas (sin NaN)
+            row_ids: Array paralelo de row ids (default: 0..n-1)
+            columns: Nombres de las d columnas (para consultas por nombre)
+            leaf_size: Máximo de puntos por hoja
+            scale: Si True, kNN usa columnas divididas por su desviación
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2:
+            raise ValueError("points debe ser un array (n, d)")
+        if row_ids is None:
+            row_ids = np.arange(len(points), dtype=np.int64)
+
+        self.columns = list(columns) if columns is not None else None
+        self.leaf_size = max(1, leaf_size)
+        self.points = points.copy()
+        self.row_ids = np.asarray(row_ids).copy()
+
+        std = self.points.std(axis=0) if len(points) else np.ones(points.shape[1])
+        self.scale = np.where(std > 0, std, 1.0) if scale else np.ones(points.shape[1])
+
+        self._build()
+        self._scaled = self.points / self.scale
+        self._scaled_mins = self._mins / self.scale
+        self._scaled_maxs = self._maxs / self.scale
+
+    @classmethod
+    def from_dataframe(cls, df, columns=None, **kwargs):
+        """
+        Construye el índice sobre columnas numéricas de un DataFrame
+
+        Las filas con valores faltantes en esas columnas se omiten; los
+        row ids son las posiciones de las filas en df (usar df.iloc[ids]).
+
+        Args:
+            df: DataFrame de clientes
+            columns: Columnas a indexar (default: config.NUMERICAL_COLUMNS)
+
+        Returns:
+            KDTreeIndex construido
+        """
+        if columns is None:
+            columns = [col for col in config.NUMERICAL_COLUMNS if col in df.columns]
+        values = df[columns].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values).any(axis=1)
+        return cls(values[valid], np.flatnonzero(valid), columns=columns, **kwargs)
+
+    def _build(self):
+        """Construye los nodos de forma iterativa reordenando self.points"""
+        points = self.points
+        row_ids = self.row_ids
+        dims = points.shape[1]
+        starts, ends, lefts, rights = [], [], [], []
+        split_dims, split_values, mins, maxs = [], [], [], []
+
+        def new_node(start, end):
+            segment = points[start:end]
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            split_dims.append(0)
+            split_values.append(0.0)
+            if end > start:
+                mins.append(segment.min(axis=0))
+                maxs.append(segment.max(axis=0))
+            else:
+                mins.append(np.full(dims, np.inf))
+                maxs.append(np.full(dims, -np.inf))
+            return len(starts) - 1
+
+        stack = [new_node(0, len(points))]
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            dim = int(np.argmax(maxs[node] - mins[node]))
+            mid = (start + end) // 2
+            order = np.argpartition(points[start:end, dim], mid - start) + start
+            points[start:end] = points[order]
+            row_ids[start:end] = row_ids[order]
+
+            split_dims[node] = dim
+            split_values[node] = points[mid, dim]
+            lefts[node] = new_node(start, mid)
+            rights[node] = new_node(mid, end)
+            stack.append(lefts[node])
+            stack.append(rights[node])
+
+        self._starts = np.asarray(starts, dtype=np.int64)
+        self._ends = np.asarray(ends, dtype=np.int64)
+        self._lefts = np.asarray(lefts, dtype=np.int64)
+        self._rights = np.asarray(rights, dtype=np.int64)
+        self._split_dims = np.asarray(split_dims, dtype=np.int64)
+        self._split_values = np.asarray(split_values, dtype=np.float64)
+        self._mins = np.asarray(mins).reshape(-1, dims)
+        self._maxs = np.asarray(maxs).reshape(-1, dims)
+
+    def size(self):
+        """Retorna el número de puntos indexados"""
+        return len(self.points)
+
+    def _query_bounds(self, bounds):
+        """Convierte bounds (dict por columna o lista por dimensión) a arrays"""
+        dims = self.points.shape[1]
+        lower = np.full(dims, -np.inf)
+        upper = np.full(dims, np.inf)
+        if isinstance(bounds, dict):
+            if self.columns is None:
+                raise ValueError("El índice no tiene nombres de columnas")
+            items = ((self.columns.index(col), rng) for col, rng in bounds.items())
+        else:
+            items = enumerate(bounds)
+        for dim, rng in items:
+            if rng is None:
+                continue
+            lo, hi = rng
+            if lo is not None:
+                lower[dim] = lo
+            if hi is not None:
+                upper[dim] = hi
+        return lower, upper
+
+    def _positions_of(self, nodes):
+        """Concatena las posiciones [inicio, fin) de varios nodos"""
+        starts = self._starts[nodes]
+        lengths = self._ends[nodes] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(total)
+
+    def _range_positions(self, bounds):
+        """Posiciones (en self.points) de los puntos dentro de bounds"""
+        lower, upper = self._query_bounds(bounds)
+        accepted, scanned = [], []
+        frontier = np.zeros(1 if len(self.points) else 0, dtype=np.int64)
+        while frontier.size:
+            node_mins = self._mins[frontier]
+            node_maxs = self._maxs[frontier]
+            overlap = ~((node_maxs < lower).any(axis=1) | (node_mins > upper).any(axis=1))
+            contained = ((node_mins >= lower) & (node_maxs <= upper)).all(axis=1)
+            is_leaf = self._lefts[frontier] == -1
+
+            accepted.append(frontier[overlap & contained])
+            scanned.append(frontier[overlap & ~contained & is_leaf])
+            split = frontier[overlap & ~contained & ~is_leaf]
+            frontier = np.concatenate([self._lefts[split], self._rights[split]])
+
+        inside = self._positions_of(np.concatenate(accepted)) if accepted else np.empty(0, dtype=np.int64)
+        candidates = self._positions_of(np.concatenate(scanned)) if scanned else np.empty(0, dtype=np.int64)
+        if candidates.size:
+            values = self.points[candidates]
+            mask = ((values >= lower) & (values <= upper)).all(axis=1)
+            inside = np.concatenate([inside, candidates[mask]])
+        return inside
+
+    def range_query(self, bounds):
+        """
+        Busca los puntos dentro de un hiper-rectángulo (límites inclusivos)
+
+        Args:
+            bounds: Dict {columna: (min, max)} o lista de (min, max) por
+                    dimensión; None en un límite deja ese lado abierto
+
+        Returns:
+            Array de row ids ordenado
+        """
+        return np.sort(self.row_ids[self._range_positions(bounds)])
+
+    def count_range(self, bounds):
+        """Cuenta los puntos dentro de bounds"""
+        return len(self._range_positions(bounds))
+
+    def nearest(self, point, k=5):
+        """
+        Busca los k puntos más cercanos
+
+        Args:
+            point: Coordenadas como lista/array de d valores o dict por columna
+            k: Número de vecinos
+
+        Returns:
+            Lista de tuplas (row_id, distancia) de menor a mayor distancia
+        """
+        if isinstance(point, dict):
+            point = [point[col] for col in self.columns]
+        point = np.asarray(point, dtype=np.float64)
+        if k <= 0 or len(self.points) == 0:
+            return []
+        k = min(k, len(self.points))
+        query = point / self.scale
+
+        # 1. Radio inicial: k-ésima distancia dentro del nodo más profundo
+        #    que contiene al punto y tiene al menos k puntos
+        node = 0
+        while self._lefts[node] != -1:
+            if point[self._split_dims[node]] < self._split_values[node]:
+                child = self._lefts[node]
+            else:
+                child = self._rights[node]
+            if self._ends[child] - self._starts[child] < k:
+                break
+            node = child
+        local = np.arange(self._starts[node], self._ends[node])
+        local_distances = np.sqrt(((self._scaled[local] - query) ** 2).sum(axis=1))
+        radius = np.partition(local_distances, k - 1)[k - 1]
+
+        # 2. Visitar por niveles solo los nodos cuya caja está dentro del radio
+        leaves, leaf_gaps = [], []
+        frontier = np.zeros(1, dtype=np.int64)
+        while frontier.size:
+            gap = np.maximum(self._scaled_mins[frontier] - query, 0)
+            gap = np.maximum(gap, query - self._scaled_maxs[frontier])
+            box_distances = np.sqrt((gap * gap).sum(axis=1))
+            near = box_distances <= radius
+            frontier = frontier[near]
+            box_distances = box_distances[near]
+            is_leaf = self._lefts[frontier] == -1
+            leaves.append(frontier[is_leaf])
+            leaf_gaps.append(box_distances[is_leaf])
+            split = frontier[~is_leaf]
+            frontier = np.concatenate([self._lefts[split], self._rights[split]])
+
+        # 3. Recorrer las hojas de la más cercana a la más lejana por lotes,
+        #    achicando el radio hasta que ninguna hoja restante pueda mejorar
+        leaves = np.concatenate(leaves)
+        leaf_gaps = np.concatenate(leaf_gaps)
+        order = np.argsort(leaf_gaps, kind='stable')
+        leaves, leaf_gaps = leaves[order], leaf_gaps[order]
+
+        best_positions = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float64)
+        batch = 8
+        for first in range(0, len(leaves), batch):
+            if len(best_distances) == k and leaf_gaps[first] > best_distances[-1]:
+                break
+            candidates = self._positions_of(leaves[first:first + batch])
+            distances = np.sqrt(((self._scaled[candidates] - query) ** 2).sum(axis=1))
+            best_positions = np.concatenate([best_positions, candidates])
+            best_distances = np.concatenate([best_distances, distances])
+            keep = np.argsort(best_distances, kind='stable')[:k]
+            best_positions, best_distances = best_positions[keep], best_distances[keep]
+
+        return [(self.row_ids[position].item(), float(distance))
+                for position, distance in zip(best_positions, best_distances)]
 
 
 def build_bst_from_list(data, key_func=None):
@@ -703,22 +1832,81 @@ def build_bst_from_list(data, key_func=None):
     return bst
 
 
-def build_credit_bst_from_dataframe(df, score_column='risk_score'):
+def build_credit_bst_from_dataframe(df, score_column='risk_score', row_ids=False):
     """
     Construye un CreditRiskBST a partir de un DataFrame de pandas
 
+    Inserta fila por fila: con scores ordenados o muy repetidos el árbol
+    degenera en una cadena de altura O(n). Para el dataset completo usar
+    build_balanced_credit_bst.
+
     Args:
         df: DataFrame con datos de clientes
         score_column: Nombre de la columna con el score de riesgo
+        row_ids: Si True, cada nodo guarda solo la posición de la fila en df
+                 (resolver con df.iloc[ids]) en lugar de un dict por fila.
+                 Es la representación compacta para árboles grandes.
 
     Returns:
         CreditRiskBST con los clientes insertados
     """
     bst = CreditRiskBST()
+    scores = df[score_column].tolist()
+
+    if row_ids:
+        payloads = range(len(df))
+    else:
+        payloads = df.to_dict('records')
 
-    for idx, row in df.iterrows():
-        risk_score = row[score_column]
-        client_info = row.to_dict()
+    for risk_score, client_info in zip(scores, payloads):
         bst.insert_client(risk_score, client_info)
 
     return bst
+
+
+def build_balanced_credit_bst(scores, payloads, low_threshold=None, high_threshold=None):
+    """
+    Construye un CreditRiskBST balanceado enlazando los nodos directamente
+    desde los datos ordenados (sin inserciones sucesivas)
+
+    Cada subrango se divide por su mediana, así la altura es O(log n) aun
+    con muchas claves repetidas (que por inserción formarían cadenas).
+    Las claves iguales a la de un nodo pueden quedar en ambos subárboles;
+    búsqueda, rango y eliminación solo asumen izquierda <= nodo <= derecha.
+
+    Args:
+        scores: Secuencia de scores de riesgo
+        payloads: Secuencia paralela con la información de cada cliente
+        low_threshold: Umbral de la banda 'bajo' (opcional)
+        high_threshold: Umbral de la banda 'medio' (opcional)
+
+    Returns:
+        CreditRiskBST balanceado con los clientes
+    """
+    order = sorted(range(len(scores)), key=scores.__getitem__)
+    keys = [scores[i] for i in order]
+    data = [payloads[i] for i in order]
+
+    bst = CreditRiskBST(low_threshold, high_threshold)
+    stack = [(0, len(keys), None, False)]
+    while stack:
+        lo, hi, parent, is_left = stack.pop()
+        if lo >= hi:
+            continue
+        mid = (lo + hi) // 2
+        node = TreeNode(keys[mid], data[mid], order[mid])
+        if parent is None:
+            bst.root = node
+        elif is_left:
+            parent.left = node
+        else:
+            parent.right = node
+        stack.append((lo, mid, node, True))
+        stack.append((mid + 1, hi, node, False))
+
+    bst._size = len(keys)
+    bst._next_seq = len(keys)
+    for key in keys:
+        bst._band_counts[bst.risk_band(key)] += 1
+
+    return bst
@@ -0,0 +1,184 @@
+"""
+Destilación del Random Forest en un scorer liviano
+Un árbol de regresión poco profundo aprende la probabilidad de default que
+asigna el bosque (el "maestro"). Al servir se usa en cascada: responde el
+scorer cuando su probabilidad está lejos del umbral de decisión y el bosque
+solo se consulta cerca de la frontera.
+"""
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeRegressor
+
+import config
+
+
+class DistilledScorer:
+    """
+    Árbol de regresión entrenado sobre predict_proba del bosque
+
+    margin es la distancia mínima al umbral de decisión para que el scorer
+    responda solo; se calibra para que la cascada coincida con el bosque en
+    al menos target_agreement de las decisiones de validación.
+    fallback_version es la huella del archivo del bosque de respaldo con el
+    que se calibró: con otro bosque el margen no es válido.
+    """
+
+    def __init__(self, max_depth=None, min_samples_leaf=None):
+        """
+        Args:
+            max_depth: Profundidad del árbol (default: config.DISTILL_MAX_DEPTH)
+            min_samples_leaf: Muestras mínimas por hoja
+                              (default: config.DISTILL_MIN_SAMPLES_LEAF)
+        """
+        self.model = DecisionTreeRegressor(
+            max_depth=max_depth or config.DISTILL_MAX_DEPTH,
+            min_samples_leaf=min_samples_leaf or config.DISTILL_MIN_SAMPLES_LEAF,
+            random_state=config.RANDOM_STATE
+        )
+        self.margin = None
+        self.fallback_version = None
+
+    def fit(self, X, teacher_proba):
+        """
+        Ajusta el scorer a las probabilidades de default del maestro
+
+        Args:
+            X: Features (las mismas que recibe el bosque)
+            teacher_proba: Probabilidad de default del bosque para cada fila
+
+        Returns:
+            self
+        """
+        self.model.fit(X, teacher_proba)
+        return self
+
+    def predict_default(self, X):
+        """
+        Probabilidad de default estimada por el scorer
+
+        Returns:
+            Array (n_filas,) con valores en [0, 1]
+        """
+        return np.clip(self.model.predict(X), 0.0, 1.0)
+
+    def predict_proba(self, X):
+        """
+        Probabilidades [no default, default] como el bosque
+
+        Returns:
+            Array (n_filas, 2)
+        """
+        p1 = self.predict_default(X)
+        return np.column_stack([1 - p1, p1])
+
+    def is_confident(self, p1, threshold):
+        """
+        Indica qué probabilidades están lo bastante lejos del umbral para no
+        consultar al bosque
+
+        Args:
+            p1: Probabilidades de default del scorer
+            threshold: Umbral de decisión del modelo
+
+        Returns:
+            Array booleano
+        """
+        if self.margin is None:
+            raise ValueError("El margen de la cascada no ha sido calibrado")
+        return np.abs(np.asarray(p1) - threshold) >= self.margin
+
+    def calibrate_margin(self, X_valid, teacher_proba, threshold, target_agreement=None):
+        """
+        Elige el menor margen con el que la cascada coincide con las
+        decisiones del bosque en al menos target_agreement de las filas
+
+        Args:
+            X_valid: Features de validación
+            teacher_proba: Probabilidad de default del bosque en X_valid
+            threshold: Umbral de decisión del modelo
+            target_agreement: Coincidencia mínima
+                              (default: config.DISTILL_TARGET_AGREEMENT)
+
+        Returns:
+            Margen elegido
+        """
+        if target_agreement is None:
+            target_agreement = config.DISTILL_TARGET_AGREEMENT
+        teacher_proba = np.asarray(teacher_proba)
+        student = self.predict_default(X_valid)
+        teacher_label = teacher_proba >= threshold
+        distance = np.abs(student - threshold)
+
+        # Con margen m responde el scorer en las filas a distancia >= m: al
+        # ordenar por distancia decreciente son un prefijo y sus desacuerdos
+        # una suma acumulada, así que se evalúan todos los márgenes a la vez
+        order = np.argsort(-distance, kind='stable')
+        distance = distance[order]
+        wrong = np.cumsum((student >= threshold)[order] != teacher_label[order])
+        allowed = (1 - target_agreement) * len(student)
+
+        # Solo cortes al final de un grupo de distancias empatadas
+        group_end = np.r_[distance[1:] < distance[:-1], True]
+        ok = np.flatnonzero(group_end & (wrong <= allowed))
+        self.margin = float(distance[ok[-1]]) if len(ok) else float(np.nextafter(distance[0], np.inf))
+        return self.margin
+
+    def agreement_report(self, X, teacher_proba, threshold, y=None):
+        """
+        Coincidencia del scorer y de la cascada con el bosque
+
+        Args:
+            X: Features
+            teacher_proba: Probabilidad de default del bosque en X
+            threshold: Umbral de decisión del modelo
+            y: Target real (opcional, agrega la accuracy de cada uno)
+
+        Returns:
+            Diccionario con las métricas
+        """
+        teacher_proba = np.asarray(teacher_proba)
+        student = self.predict_default(X)
+        confident = self.is_confident(student, threshold)
+        cascade = np.where(confident, student, teacher_proba)
+
+        teacher_label = teacher_proba >= threshold
+        report = {
+            'student_agreement': float(np.mean((student >= threshold) == teacher_label)),
+            'student_mae': float(np.mean(np.abs(student - teacher_proba))),
+            'cascade_agreement': float(np.mean((cascade >= threshold) == teacher_label)),
+            'fallback_rate': float(1 - confident.mean()),
+            'margin': self.margin
+        }
+        if y is not None:
+            y = np.asarray(y)
+            report['teacher_accuracy'] = float(np.mean(teacher_label == y))
+            report['student_accuracy'] = float(np.mean((student >= threshold) == y))
+            report['cascade_accuracy'] = float(np.mean((cascade >= threshold) == y))
+        return report
+
+    def save(self, filepath=None):
+        """
+        Guarda el scorer
+
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+        """
+        if filepath is None:
+            filepath = config.DISTILLED_MODEL_FILE
+        joblib.dump(self, filepath)
+        print(f"✓ Scorer destilado guardado en: {filepath}")
+
+    @staticmethod
+    def load(filepath=None):
+        """
+        Carga un scorer guardado con save
+
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+
+        Returns:
+            DistilledScorer
+        """
+        if filepath is None:
+            filepath = config.DISTILLED_MODEL_FILE
+        return joblib.load(filepath)
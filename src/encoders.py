@@ -0,0 +1,150 @@
+"""
+Codificación de variables categóricas
+Reemplaza a los LabelEncoder de sklearn por un encoder compacto con
+búsqueda por diccionario para valores sueltos y codificación vectorizada
+para lotes, manteniendo el formato de label_encoders.pkl
+"""
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+import config
+
+
+class CategoricalEncoder:
+    """
+    Mapea categorías a códigos enteros 0..n-1 en orden alfabético (los
+    mismos códigos que LabelEncoder)
+
+    Las categorías no vistas en el ajuste reciben unknown_code en lugar de
+    lanzar una excepción.
+    """
+
+    def __init__(self, classes=None, unknown_code=None):
+        """
+        Args:
+            classes: Categorías conocidas (opcional, se ordenan)
+            unknown_code: Código para categorías desconocidas
+                          (default: config.UNKNOWN_CATEGORY_CODE)
+        """
+        self.unknown_code = (config.UNKNOWN_CATEGORY_CODE
+                             if unknown_code is None else unknown_code)
+        self.classes_ = None
+        self._mapping = {}
+        if classes is not None:
+            self._set_classes(np.unique(np.asarray(classes)))
+
+    def _set_classes(self, classes):
+        self.classes_ = classes
+        self._mapping = {value: code for code, value in enumerate(classes.tolist())}
+
+    def fit(self, values):
+        """
+        Ajusta el encoder con las categorías presentes en values
+
+        Args:
+            values: Serie, array o lista de categorías
+
+        Returns:
+            self
+        """
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Solo las categorías presentes, igual que LabelEncoder
+            present = values.cat.remove_unused_categories().cat.categories
+            self._set_classes(np.sort(np.asarray(present)))
+        else:
+            self._set_classes(np.unique(np.asarray(values)))
+        return self
+
+    def encode(self, value):
+        """
+        Codifica un único valor con una búsqueda en diccionario
+
+        Args:
+            value: Categoría
+
+        Returns:
+            Código entero (unknown_code si la categoría no es conocida)
+        """
+        return self._mapping.get(value, self.unknown_code)
+
+    def is_known(self, value):
+        """Indica si una categoría fue vista en el ajuste"""
+        return value in self._mapping
+
+    def transform(self, values):
+        """
+        Codifica un lote de valores de forma vectorizada
+
+        Args:
+            values: Serie (incluida dtype category), array o lista
+
+        Returns:
+            Array int32 de códigos (unknown_code para categorías desconocidas)
+        """
+        if self.classes_ is None:
+            raise ValueError("El encoder no ha sido ajustado")
+
+        if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+            # Recodificar las categorías del dtype (pocas) y aplicar a los códigos
+            category_codes = np.array(
+                [self.encode(value) for value in values.cat.categories.tolist()] + [self.unknown_code],
+                dtype=np.int32
+            )
+            return category_codes[values.cat.codes.to_numpy()]  # código -1 (NaN) -> desconocido
+
+        values = np.asarray(values)
+        if values.dtype.kind in 'iufb':
+            # Categorías numéricas: búsqueda binaria sobre las clases ordenadas
+            positions = np.searchsorted(self.classes_, values)
+            positions = np.minimum(positions, len(self.classes_) - 1)
+            known = self.classes_[positions] == values
+            return np.where(known, positions, self.unknown_code).astype(np.int32)
+
+        # Strings/objetos: pd.Categorical usa una tabla hash (-1 = desconocido)
+        codes = pd.Categorical(values, categories=self.classes_).codes.astype(np.int32)
+        if self.unknown_code != -1:
+            codes[codes == -1] = self.unknown_code
+        return codes
+
+    def fit_transform(self, values):
+        """Ajusta el encoder y codifica values"""
+        return self.fit(values).transform(values)
+
+    def inverse_transform(self, codes):
+        """
+        Convierte códigos de vuelta a categorías
+
+        Raises:
+            ValueError: Si algún código es desconocido o está fuera de rango
+        """
+        codes = np.asarray(codes)
+        if codes.size and (codes.min() < 0 or codes.max() >= len(self.classes_)):
+            raise ValueError("Códigos fuera del rango de categorías conocidas")
+        return self.classes_[codes]
+
+    @classmethod
+    def from_label_encoder(cls, label_encoder, unknown_code=None):
+        """
+        Crea un encoder equivalente a un LabelEncoder ajustado
+
+        Args:
+            label_encoder: LabelEncoder de sklearn ajustado
+            unknown_code: Código para categorías desconocidas (opcional)
+
+        Returns:
+            CategoricalEncoder con las mismas clases y códigos
+        """
+        encoder = cls(unknown_code=unknown_code)
+        encoder._set_classes(np.asarray(label_encoder.classes_))
+        return encoder
+
+    def to_label_encoder(self):
+        """
+        Exporta el encoder como LabelEncoder (formato de label_encoders.pkl)
+
+        Returns:
+            LabelEncoder de sklearn con las mismas clases
+        """
+        label_encoder = LabelEncoder()
+        label_encoder.classes_ = self.classes_.copy()
+        return label_encoder
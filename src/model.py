@@ -5,18 +5,19 @@ Maneja el entrenamiento, evaluación y predicción del modelo
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    confusion_matrix,
-    classification_report,
-    roc_auc_score,
-    roc_curve
-)
+from sklearn.model_selection import train_test_split
+import io
+import os
+import re
+import time
 import joblib
 import config
+from src.compact_forest import CompactForest
+from src.data_structures import KDTreeIndex
+from src.distillation import DistilledScorer
+from src.permutation_importance import permutation_importance
+from src.pipeline_cache import dataset_fingerprint
+from src.timing import StageTimer
 
 
 class CreditRiskModel:
@@ -24,60 +25,92 @@ class CreditRiskModel:
     Clase para entrenar y usar el modelo de predicción de riesgo crediticio
     """
 
-    def __init__(self):
+    def __init__(self, timer=None):
+        self.timer = timer if timer is not None else StageTimer()
         self.model = None
         self.metrics = {}
         self.feature_importance = None
+        self.neighbor_index = None
+        self.threshold_sweep = None
+        self.decision_threshold = config.DECISION_THRESHOLD
+        self.scorer = None
+        self.model_file = None
 
-    def train(self, X_train, y_train):
+    def train(self, X_train, y_train, n_jobs=None):
         """
         Entrena el modelo de Random Forest
 
         Args:
             X_train: Features de entrenamiento
             y_train: Target de entrenamiento
+            n_jobs: Núcleos para entrenar los árboles (default: config.N_JOBS);
+                    el modelo entrenado queda con n_jobs=None para servir
 
         Returns:
             Modelo entrenado
         """
+        if n_jobs is None:
+            n_jobs = config.N_JOBS
+
         print("\n=== Entrenando modelo Random Forest ===")
-        print(f"Parámetros: {config.MODEL_PARAMS}")
+        print(f"Parámetros: {config.MODEL_PARAMS} (n_jobs={n_jobs})")
 
-        self.model = RandomForestClassifier(**config.MODEL_PARAMS)
+        self.model = RandomForestClassifier(**config.MODEL_PARAMS, n_jobs=n_jobs)
         self.model.fit(X_train, y_train)
+        self.model_file = None  # aún no guardado
+        # Con n_jobs=-1 cada predicción de una fila levantaría un pool de
+        # joblib: el paralelismo se usa solo dentro de train/evaluate/update
+        self.model.set_params(n_jobs=None)
 
         print("✓ Modelo entrenado exitosamente")
         return self.model
 
-    def evaluate(self, X_test, y_test):
+    def evaluate(self, X_test, y_test, n_jobs=None):
         """
         Evalúa el modelo en el conjunto de prueba
 
         Args:
             X_test: Features de prueba
             y_test: Target de prueba
+            n_jobs: Núcleos para las predicciones (default: config.EVAL_N_JOBS)
 
         Returns:
-            Diccionario con las métricas de evaluación
+            Diccionario con las métricas de evaluación (incluye los umbrales
+            óptimos por F1 y por costo del barrido de umbrales)
         """
         if self.model is None:
             raise ValueError("El modelo no ha sido entrenado")
+        if n_jobs is None:
+            n_jobs = config.EVAL_N_JOBS
 
         print("\n=== Evaluando modelo ===")
 
-        # Predicciones
-        y_pred = self.model.predict(X_test)
-        y_pred_proba = self.model.predict_proba(X_test)[:, 1]
+        # Una sola pasada del bosque (paralela por árbol)
+        serving_n_jobs = self.model.n_jobs
+        self.model.n_jobs = n_jobs
+        try:
+            y_pred_proba = self.model.predict_proba(X_test)[:, 1]
+        finally:
+            self.model.n_jobs = serving_n_jobs
+
+        # Misma regla que predict_single: default si probabilidad >= umbral
+        y_test = np.asarray(y_test)
+        y_pred = (y_pred_proba >= self.decision_threshold).astype(np.int64)
+
+        # Todas las métricas salen de un único conteo de la matriz de confusión
+        tn, fp, fn, tp = confusion_counts(y_test, y_pred)
+        self.threshold_sweep = threshold_sweep(y_test, y_pred_proba)
+        sweep = self.threshold_sweep
 
-        # Calcular métricas
         self.metrics = {
-            'accuracy': accuracy_score(y_test, y_pred),
-            'precision': precision_score(y_test, y_pred),
-            'recall': recall_score(y_test, y_pred),
-            'f1_score': f1_score(y_test, y_pred),
-            'roc_auc': roc_auc_score(y_test, y_pred_proba),
-            'confusion_matrix': confusion_matrix(y_test, y_pred).tolist(),
-            'classification_report': classification_report(y_test, y_pred)
+            **metrics_from_confusion(tn, fp, fn, tp),
+            'roc_auc': sweep['roc_auc'],
+            'confusion_matrix': [[tn, fp], [fn, tp]],
+            'classification_report': classification_report_from_confusion(tn, fp, fn, tp),
+            'decision_threshold': self.decision_threshold,
+            'n_samples': int(len(y_test)),
+            'best_threshold_f1': float(sweep['thresholds'][np.argmax(sweep['f1'])]),
+            'best_threshold_cost': float(sweep['thresholds'][np.argmin(sweep['cost'])])
         }
 
         # Mostrar métricas
@@ -93,26 +126,94 @@ class CreditRiskModel:
         print(f"  TN: {cm[0][0]:<6} FP: {cm[0][1]:<6}")
         print(f"  FN: {cm[1][0]:<6} TP: {cm[1][1]:<6}")
 
+        print("\n Umbrales de decisión (barrido):")
+        print(f"  • Máximo F1:    {self.metrics['best_threshold_f1']:.4f}")
+        print(f"  • Mínimo costo: {self.metrics['best_threshold_cost']:.4f} "
+              f"(FP={config.COST_FALSE_POSITIVE}, FN={config.COST_FALSE_NEGATIVE})")
+
         return self.metrics
 
-    def get_feature_importance(self, feature_names):
+    def select_threshold(self, strategy=None, X_valid=None, y_valid=None):
+        """
+        Elige el umbral de decisión con un barrido de umbrales: sobre X_valid,
+        y_valid si se indican o, si no, el de la última evaluación
+
+        Para que las métricas reportadas no sean optimistas, el umbral debe
+        elegirse con datos distintos de los que se usan para evaluar.
+
+        Args:
+            strategy: 'default' (config.DECISION_THRESHOLD), 'f1' (máximo F1)
+                      o 'cost' (mínimo costo) (default: config.THRESHOLD_STRATEGY)
+            X_valid, y_valid: Datos para elegir el umbral (opcional)
+
+        Returns:
+            Umbral elegido
+
+        Raises:
+            ValueError: Si la estrategia es desconocida o no se ha evaluado el modelo
+        """
+        if strategy is None:
+            strategy = config.THRESHOLD_STRATEGY
+
+        if strategy == 'default':
+            self.decision_threshold = config.DECISION_THRESHOLD
+            return self.decision_threshold
+        if strategy not in ('f1', 'cost'):
+            raise ValueError(f"Estrategia de umbral desconocida: {strategy}")
+        if X_valid is not None:
+            sweep = threshold_sweep(y_valid, self.predict_proba(X_valid)[:, 1])
+        elif self.threshold_sweep is not None:
+            sweep = self.threshold_sweep
+        else:
+            raise ValueError("El modelo no ha sido evaluado")
+
+        best = np.argmax(sweep['f1']) if strategy == 'f1' else np.argmin(sweep['cost'])
+        self.decision_threshold = float(sweep['thresholds'][best])
+
+        print(f"\n✓ Umbral de decisión ({strategy}): {self.decision_threshold:.4f} "
+              f"(precision {sweep['precision'][best]:.4f}, recall {sweep['recall'][best]:.4f}, "
+              f"F1 {sweep['f1'][best]:.4f})")
+        return self.decision_threshold
+
+    def get_feature_importance(self, feature_names, method='impurity', X=None, y=None,
+                               n_repeats=None, n_jobs=None, use_cache=True):
         """
         Obtiene la importancia de las features
 
         Args:
             feature_names: Lista con nombres de las features
+            method: 'impurity' (feature_importances_ del bosque) o
+                    'permutation' (caída del ROC-AUC en X, y; el caché se
+                    indexa por el archivo del modelo y no se usa si el
+                    modelo en memoria no está guardado)
+            X, y: Datos de prueba para 'permutation'
+            n_repeats: Permutaciones por feature (default: config.PERMUTATION_N_REPEATS)
+            n_jobs: Procesos para 'permutation' (default: config.N_JOBS)
+            use_cache: Si se reutiliza la importancia calculada para el mismo modelo
 
         Returns:
-            DataFrame con las importancias ordenadas
+            DataFrame con las importancias ordenadas (con columna 'std' en 'permutation')
         """
         if self.model is None:
             raise ValueError("El modelo no ha sido entrenado")
 
-        importances = self.model.feature_importances_
-        self.feature_importance = pd.DataFrame({
-            'feature': feature_names,
-            'importance': importances
-        }).sort_values('importance', ascending=False)
+        if method == 'permutation':
+            if X is None or y is None:
+                raise ValueError("La importancia por permutación requiere X e y")
+            if isinstance(self.model, CompactForest):
+                raise ValueError("La importancia por permutación usa el bosque completo: "
+                                 "cargue el modelo con compact=False")
+            self.feature_importance = permutation_importance(
+                self.model, X, y, feature_names, model_path=self.model_file,
+                n_repeats=n_repeats, n_jobs=n_jobs, use_cache=use_cache
+            )
+        elif method == 'impurity':
+            self.feature_importance = pd.DataFrame({
+                'feature': feature_names,
+                'importance': self.model.feature_importances_
+            }).sort_values('importance', ascending=False)
+        else:
+            raise ValueError(f"Método de importancia desconocido: {method}")
 
         print("\n Top 5 Features más importantes:")
         for idx, row in self.feature_importance.head().iterrows():
@@ -120,6 +221,58 @@ class CreditRiskModel:
 
         return self.feature_importance
 
+    def update(self, X_new, y_new, new_trees=None, max_trees=None, n_jobs=None):
+        """
+        Reentrenamiento incremental: agrega al bosque árboles entrenados solo
+        con los datos nuevos (warm_start), sin reentrenar los existentes
+
+        Args:
+            X_new: Features del lote nuevo (procesadas con los encoders/scaler existentes)
+            y_new: Target del lote nuevo
+            new_trees: Árboles a agregar (default: config.INCREMENTAL_NEW_TREES)
+            max_trees: Máximo de árboles; si se supera se retiran los más
+                       antiguos (default: config.INCREMENTAL_MAX_TREES, None = sin límite)
+            n_jobs: Núcleos para entrenar (default: config.N_JOBS)
+
+        Returns:
+            Modelo actualizado
+
+        Raises:
+            ValueError: Si no hay modelo cargado o el lote no contiene todas las clases
+        """
+        if self.model is None:
+            raise ValueError("El modelo no ha sido entrenado")
+        if new_trees is None:
+            new_trees = config.INCREMENTAL_NEW_TREES
+        if max_trees is None:
+            max_trees = config.INCREMENTAL_MAX_TREES
+        if n_jobs is None:
+            n_jobs = config.N_JOBS
+
+        # Los árboles nuevos deben ver las mismas clases que el bosque
+        if not np.array_equal(np.unique(y_new), self.model.classes_):
+            raise ValueError("El lote nuevo debe contener todas las clases del modelo")
+
+        n_existing = len(self.model.estimators_)
+        print(f"\n=== Reentrenamiento incremental ({len(y_new)} registros nuevos) ===")
+        print(f"Árboles existentes: {n_existing}, nuevos: {new_trees}")
+
+        self.model.set_params(warm_start=True, n_estimators=n_existing + new_trees,
+                              n_jobs=n_jobs)
+        self.model.fit(X_new, y_new)
+        self.model.set_params(warm_start=False, n_jobs=None)
+        self.model_file = None  # el archivo guardado ya no corresponde
+
+        # Retirar los árboles más antiguos si se supera el límite
+        if max_trees is not None and len(self.model.estimators_) > max_trees:
+            retired = len(self.model.estimators_) - max_trees
+            self.model.estimators_ = self.model.estimators_[retired:]
+            self.model.set_params(n_estimators=max_trees)
+            print(f"✓ Retirados {retired} árboles antiguos (límite: {max_trees})")
+
+        print(f"✓ Modelo actualizado: {len(self.model.estimators_)} árboles")
+        return self.model
+
     def predict(self, X):
         """
         Realiza predicciones con el modelo entrenado
@@ -150,7 +303,29 @@ class CreditRiskModel:
 
         return self.model.predict_proba(X)
 
-    def predict_single(self, features_dict, processor, scaler):
+    def cascade_proba(self, X):
+        """
+        Probabilidades en cascada: el scorer destilado responde las filas
+        lejos del umbral de decisión y el bosque solo las cercanas
+
+        Sin scorer cargado equivale a predict_proba.
+
+        Args:
+            X: Features para predecir
+
+        Returns:
+            Array con probabilidades [prob_no_default, prob_default]
+        """
+        if self.scorer is None:
+            return self.predict_proba(X)
+
+        proba = self.scorer.predict_proba(X)
+        uncertain = ~self.scorer.is_confident(proba[:, 1], self.decision_threshold)
+        if uncertain.any():
+            proba[uncertain] = self.predict_proba(X[uncertain])
+        return proba
+
+    def predict_single(self, features_dict, processor, scaler, probability_only=False):
         """
         Predice para una única solicitud de crédito
 
@@ -159,6 +334,9 @@ class CreditRiskModel:
             processor: Instancia de DataProcessor para transformar las features
             scaler: Scaler para normalizar las features
 
+            probability_only: Si es True solo retorna la probabilidad de
+                              default (sin etiqueta ni confianza)
+
         Returns:
             Diccionario con la predicción y probabilidades
         """
@@ -168,21 +346,109 @@ class CreditRiskModel:
         # Escalar las features
         X = scaler.transform(df_transformed)
 
-        # Predecir
-        prediction = self.predict(X)[0]
-        proba = self.predict_proba(X)[0]
+        # Scorer destilado, o el bosque si la solicitud está cerca del umbral
+        proba = self.cascade_proba(X)[0]
+        if probability_only:
+            return {'probability_default': float(proba[1])}
 
+        prediction = int(proba[1] >= self.decision_threshold)
         risk_level = "ALTO RIESGO" if prediction == 1 else "BAJO RIESGO"
         confidence = proba[1] if prediction == 1 else proba[0]
 
         return {
-            'prediction': int(prediction),
+            'prediction': prediction,
             'risk_level': risk_level,
             'probability_default': float(proba[1]),
             'probability_no_default': float(proba[0]),
             'confidence': float(confidence)
         }
 
+    def build_neighbor_index(self, X_train, y_train, reference_df):
+        """
+        Construye el índice de préstamos similares sobre el espacio de
+        features escalado del entrenamiento
+
+        Args:
+            X_train: Features de entrenamiento ya escaladas
+            y_train: Target de entrenamiento
+            reference_df: DataFrame con los datos originales de las mismas
+                          filas y en el mismo orden que X_train
+
+        Returns:
+            Diccionario con el árbol k-d, los resultados y los préstamos
+        """
+        print("\n=== Construyendo índice de préstamos similares ===")
+        columns = [col for col in config.SIMILAR_LOANS_COLUMNS if col in reference_df.columns]
+
+        self.neighbor_index = {
+            'tree': KDTreeIndex(X_train, scale=False),
+            'outcomes': np.asarray(y_train),
+            'loans': reference_df[columns].reset_index(drop=True)
+        }
+
+        print(f"✓ Índice construido con {len(self.neighbor_index['outcomes'])} préstamos")
+        return self.neighbor_index
+
+    def find_similar_loans(self, features_dict, processor, scaler, k=None):
+        """
+        Busca los préstamos históricos más parecidos a una solicitud
+
+        Args:
+            features_dict: Diccionario con las features de la solicitud
+            processor: Instancia de DataProcessor para transformar las features
+            scaler: Scaler para normalizar las features
+            k: Número de préstamos (default: config.SIMILAR_LOANS_K)
+
+        Returns:
+            Diccionario con los préstamos similares (con su loan_status y
+            distancia) y la tasa de default entre ellos
+        """
+        if self.neighbor_index is None:
+            raise ValueError("El índice de préstamos similares no ha sido construido")
+        if k is None:
+            k = config.SIMILAR_LOANS_K
+
+        X = scaler.transform(processor.transform_single_input(features_dict))
+        matches = self.neighbor_index['tree'].nearest(X[0], k)
+
+        outcomes = self.neighbor_index['outcomes']
+        loans_df = self.neighbor_index['loans']
+        loans = []
+        for row_id, distance in matches:
+            loan = loans_df.iloc[row_id].to_dict()
+            loan['loan_status'] = int(outcomes[row_id])
+            loan['distance'] = distance
+            loans.append(loan)
+
+        default_rate = float(np.mean([loan['loan_status'] for loan in loans])) if loans else 0.0
+        return {'loans': loans, 'default_rate': default_rate}
+
+    def save_neighbor_index(self, filepath=None):
+        """
+        Guarda el índice de préstamos similares
+
+        Args:
+            filepath: Ruta donde guardar el índice
+        """
+        if filepath is None:
+            filepath = config.NEIGHBORS_FILE
+
+        joblib.dump(self.neighbor_index, filepath)
+        print(f"✓ Índice de préstamos similares guardado en: {filepath}")
+
+    def load_neighbor_index(self, filepath=None):
+        """
+        Carga un índice de préstamos similares previamente guardado
+
+        Args:
+            filepath: Ruta del índice a cargar
+        """
+        if filepath is None:
+            filepath = config.NEIGHBORS_FILE
+
+        self.neighbor_index = joblib.load(filepath)
+        print(f"✓ Índice de préstamos similares cargado desde: {filepath}")
+
     def save_model(self, filepath=None):
         """
         Guarda el modelo entrenado
@@ -194,22 +460,335 @@ class CreditRiskModel:
             filepath = config.MODEL_FILE
 
         joblib.dump(self.model, filepath)
+        self.model_file = filepath
         print(f"\n✓ Modelo guardado en: {filepath}")
+        self.save_threshold()
+
+        # El bosque compacto y el scorer derivan del anterior: ya no corresponden
+        if filepath == config.MODEL_FILE:
+            for derived in (config.COMPACT_MODEL_FILE, config.DISTILLED_MODEL_FILE):
+                if os.path.exists(derived):
+                    os.remove(derived)
+                    print(f"✓ Artefacto derivado anterior eliminado: {derived}")
+
+    def save_threshold(self, filepath=None):
+        """
+        Guarda el umbral de decisión junto a los artefactos del modelo
+
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+        """
+        if filepath is None:
+            filepath = config.THRESHOLD_FILE
+
+        joblib.dump({'decision_threshold': self.decision_threshold}, filepath)
+        print(f"✓ Umbral de decisión ({self.decision_threshold:.4f}) guardado en: {filepath}")
+
+    def load_threshold(self, filepath=None):
+        """
+        Carga el umbral de decisión guardado (si no existe se usa
+        config.DECISION_THRESHOLD)
 
-    def load_model(self, filepath=None):
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+        """
+        if filepath is None:
+            filepath = config.THRESHOLD_FILE
+
+        if os.path.exists(filepath):
+            self.decision_threshold = joblib.load(filepath)['decision_threshold']
+        else:
+            self.decision_threshold = config.DECISION_THRESHOLD
+
+    def save_version(self, versions_dir=None):
+        """
+        Guarda el modelo como una nueva versión numerada (credit_risk_model_vNNN.pkl)
+
+        Args:
+            versions_dir: Directorio de versiones (opcional, usa config por defecto)
+
+        Returns:
+            Ruta del archivo de la versión guardada
+        """
+        if versions_dir is None:
+            versions_dir = config.MODEL_VERSIONS_DIR
+        os.makedirs(versions_dir, exist_ok=True)
+
+        versions = [int(m.group(1)) for name in os.listdir(versions_dir)
+                    if (m := re.fullmatch(r'credit_risk_model_v(\d+)\.pkl', name))]
+        version = max(versions, default=0) + 1
+
+        filepath = versions_dir / f"credit_risk_model_v{version:03d}.pkl"
+        joblib.dump(self.model, filepath)
+        print(f"✓ Versión {version} del modelo guardada en: {filepath}")
+        return filepath
+
+    def compact(self, X_valid, y_valid, X_report=None, y_report=None, tolerance=None,
+                merge_tolerance=None, prune=True, filepath=None):
+        """
+        Compacta el bosque para inferencia: fusiona hojas hermanas con
+        probabilidades equivalentes, descarta árboles que aportan poco al AUC
+        de validación y guarda umbrales/valores en float32 e índices en int16
+
+        Si la fusión de hojas supera la tolerancia por sí sola, se reintenta
+        con la mitad de merge_tolerance (hasta no fusionar). Si el bosque
+        podado no cumple la tolerancia en los datos del reporte, se guarda el
+        bosque sin podar (solo fusión de hojas y tipos compactos).
+
+        Args:
+            X_valid, y_valid: Datos para elegir árboles y verificar la tolerancia
+            X_report, y_report: Datos para el reporte antes/después (default: validación)
+            tolerance: Pérdida máxima de AUC y accuracy (default: config.COMPACT_TOLERANCE)
+            merge_tolerance: Tolerancia de fusión de hojas (default: config.COMPACT_MERGE_TOLERANCE)
+            prune: Si se descartan árboles (conserva al menos config.COMPACT_MIN_TREES)
+            filepath: Ruta del .npz (opcional, usa config por defecto)
+
+        Returns:
+            Diccionario con el reporte de tamaño, carga, latencia y métricas
+            (accepted indica si se cumplió la tolerancia y se guardó el bosque;
+            variant si se guardó el bosque 'podado' o solo 'fusionado')
+        """
+        if self.model is None:
+            raise ValueError("El modelo no ha sido entrenado")
+        if tolerance is None:
+            tolerance = config.COMPACT_TOLERANCE
+        if merge_tolerance is None:
+            merge_tolerance = config.COMPACT_MERGE_TOLERANCE
+        if filepath is None:
+            filepath = config.COMPACT_MODEL_FILE
+        if X_report is None:
+            X_report, y_report = X_valid, y_valid
+
+        print("\n=== Compactando bosque ===")
+        y_valid = np.asarray(y_valid)
+        y_report = np.asarray(y_report)
+
+        def scores(model, X, y):
+            proba = model.predict_proba(X)[:, 1]
+            tn, fp, fn, tp = confusion_counts(y, proba >= self.decision_threshold)
+            return threshold_sweep(y, proba)['roc_auc'], metrics_from_confusion(tn, fp, fn, tp)['accuracy']
+
+        base_auc, base_acc = scores(self.model, X_valid, y_valid)
+
+        # 1. Fusión de hojas (se reduce la tolerancia si pierde demasiado)
+        while True:
+            compact = CompactForest.from_random_forest(self.model, merge_tolerance)
+            auc, acc = scores(compact, X_valid, y_valid)
+            if merge_tolerance == 0 or (auc >= base_auc - tolerance and acc >= base_acc - tolerance):
+                break
+            merge_tolerance = merge_tolerance / 2 if merge_tolerance > 1e-4 else 0.0
+        n_nodes = sum(estimator.tree_.node_count for estimator in self.model.estimators_)
+        print(f"✓ Hojas fusionadas (tolerancia {merge_tolerance:g}): "
+              f"{n_nodes} -> {compact.n_nodes} nodos")
+
+        # 2. Poda de árboles por AUC de validación
+        candidates = [('fusionado', compact)]
+        if prune:
+            pruned, kept = compact.prune_trees(X_valid, y_valid, tolerance, self.decision_threshold,
+                                               min_trees=config.COMPACT_MIN_TREES)
+            print(f"✓ Árboles conservados: {len(kept)} de {len(self.model.estimators_)}")
+            candidates.insert(0, ('podado', pruned))
+
+        # 3. Reporte antes/después (en memoria): tamaño, carga, latencia y métricas
+        def timed(fn, repeat):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            return (time.perf_counter() - start) / repeat
+
+        row = np.asarray(X_report[:1])
+
+        def measure(model, data, load):
+            auc, acc = scores(model, X_report, y_report)
+            return {
+                'size_mb': len(data) / 1024 ** 2,
+                'load_ms': timed(lambda: load(io.BytesIO(data)), 3) * 1e3,
+                'latency_single_ms': timed(lambda: model.predict_proba(row), 20) * 1e3,
+                'latency_batch_ms': timed(lambda: model.predict_proba(X_report), 3) * 1e3,
+                'roc_auc': auc,
+                'accuracy': acc
+            }
+
+        buffer = io.BytesIO()
+        joblib.dump(self.model, buffer)
+        forest_report = measure(self.model, buffer.getvalue(), joblib.load)
+
+        # 4. La tolerancia se verifica también en los datos del reporte (no
+        # usados para podar): si el podado la supera se prueba el fusionado,
+        # y si ninguno la cumple el bosque compacto no se guarda
+        for variant, candidate in candidates:
+            buffer = io.BytesIO()
+            candidate.save(buffer)
+            compact_bytes = buffer.getvalue()
+            report = {'forest': forest_report,
+                      'compact': measure(candidate, compact_bytes, CompactForest.load),
+                      'variant': variant,
+                      'n_trees': candidate.n_trees}
+
+            print(f"\n  {'':<26} {'bosque':>10} {variant:>10}")
+            for key, label in (('size_mb', 'Tamaño (MB)'), ('load_ms', 'Carga (ms)'),
+                               ('latency_single_ms', 'Latencia 1 fila (ms)'),
+                               ('latency_batch_ms', f'Latencia {len(y_report)} filas (ms)'),
+                               ('roc_auc', 'ROC-AUC'), ('accuracy', 'Accuracy')):
+                print(f"  {label:<26} {report['forest'][key]:>10.4f} {report['compact'][key]:>10.4f}")
+
+            report['accepted'] = (
+                report['compact']['roc_auc'] >= report['forest']['roc_auc'] - tolerance and
+                report['compact']['accuracy'] >= report['forest']['accuracy'] - tolerance
+            )
+            if report['accepted']:
+                break
+            print(f"\n⚠ Advertencia: el bosque {variant} pierde más de {tolerance} de AUC o "
+                  f"accuracy en los datos del reporte")
+
+        if report['accepted']:
+            with open(filepath, 'wb') as f:
+                f.write(compact_bytes)
+            print(f"\n✓ Bosque compacto ({report['variant']}, {report['n_trees']} árboles) "
+                  f"guardado en: {filepath}")
+        else:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            print("⚠ Advertencia: el bosque compacto no se guarda")
+        return report
+
+    def serving_model(self):
+        """
+        Modelo con el que load_model serviría las predicciones: el bosque
+        compacto si está habilitado y existe, si no el bosque guardado
+
+        Returns:
+            Tupla (modelo, ruta de su archivo)
+        """
+        if config.USE_COMPACT_MODEL and os.path.exists(config.COMPACT_MODEL_FILE):
+            return CompactForest.load(config.COMPACT_MODEL_FILE), config.COMPACT_MODEL_FILE
+        return self.model, config.MODEL_FILE
+
+    def distill(self, X_train, X_valid, X_report=None, y_report=None, target_agreement=None):
+        """
+        Destila el bosque en un árbol de regresión liviano y calibra el
+        margen de la cascada
+
+        El maestro y el margen son los del modelo que respaldará a la cascada
+        al servir (serving_model), que debe estar guardado.
+
+        Args:
+            X_train: Features donde el scorer imita al bosque
+            X_valid: Features de validación para calibrar el margen
+            X_report, y_report: Datos para el reporte (default: validación;
+                                con y_report se agregan las accuracies)
+            target_agreement: Coincidencia mínima de la cascada con el bosque
+                              (default: config.DISTILL_TARGET_AGREEMENT)
+
+        Returns:
+            Diccionario con el reporte de coincidencia y latencia
+        """
+        if self.model is None:
+            raise ValueError("El modelo no ha sido entrenado")
+
+        print("\n=== Destilando scorer liviano ===")
+        fallback, fallback_file = self.serving_model()
+        fallback_name = "bosque compacto" if isinstance(fallback, CompactForest) else "bosque"
+        print(f"✓ Modelo de respaldo de la cascada: {fallback_file}")
+
+        teacher_train = fallback.predict_proba(X_train)[:, 1]
+        teacher_valid = fallback.predict_proba(X_valid)[:, 1]
+        if X_report is None:
+            X_report, teacher_report = X_valid, teacher_valid
+        else:
+            teacher_report = fallback.predict_proba(X_report)[:, 1]
+
+        scorer = DistilledScorer().fit(X_train, teacher_train)
+        margin = scorer.calibrate_margin(X_valid, teacher_valid, self.decision_threshold,
+                                         target_agreement)
+        scorer.fallback_version = dataset_fingerprint(fallback_file)
+        report = scorer.agreement_report(X_report, teacher_report, self.decision_threshold,
+                                         y_report)
+
+        # Con el bosque compacto de respaldo, coincidencia también con el completo
+        if fallback is not self.model and isinstance(self.model, RandomForestClassifier):
+            student = scorer.predict_default(X_report)
+            cascade = np.where(scorer.is_confident(student, self.decision_threshold),
+                               student, teacher_report)
+            forest = self.predict_proba(X_report)[:, 1]
+            report['forest_agreement'] = float(np.mean(
+                (cascade >= self.decision_threshold) == (forest >= self.decision_threshold)
+            ))
+        print(f"✓ Árbol de profundidad {scorer.model.get_depth()} con "
+              f"{scorer.model.get_n_leaves()} hojas")
+        print(f"✓ Margen de la cascada: ±{margin:.4f} alrededor del umbral "
+              f"{self.decision_threshold:.4f}")
+
+        # Latencia de una solicitud: scorer solo, bosque solo
+        row = np.asarray(X_report[:1])
+        for name, fn in (('student', scorer.predict_proba), ('teacher', fallback.predict_proba)):
+            start = time.perf_counter()
+            for _ in range(20):
+                fn(row)
+            report[f'{name}_latency_ms'] = (time.perf_counter() - start) / 20 * 1e3
+
+        print(f"\n  Respaldo: {fallback_name}")
+        print(f"  Coincidencia del scorer con el respaldo:   {report['student_agreement']:.4f} "
+              f"(MAE de probabilidad {report['student_mae']:.4f})")
+        print(f"  Coincidencia de la cascada con el respaldo: {report['cascade_agreement']:.4f}")
+        if 'forest_agreement' in report:
+            print(f"  Coincidencia de la cascada con el bosque:   {report['forest_agreement']:.4f}")
+        print(f"  Solicitudes que consultan al respaldo:     {report['fallback_rate']:.2%}")
+        if y_report is not None:
+            print(f"  Accuracy respaldo/scorer/cascada:          {report['teacher_accuracy']:.4f} / "
+                  f"{report['student_accuracy']:.4f} / {report['cascade_accuracy']:.4f}")
+        print(f"  Latencia 1 fila scorer/respaldo (ms):      {report['student_latency_ms']:.3f} / "
+              f"{report['teacher_latency_ms']:.3f}")
+        if report['student_latency_ms'] >= report['teacher_latency_ms']:
+            print(f"⚠ Advertencia: el {fallback_name} ya es más rápido que el scorer; "
+                  f"la cascada no reduce la latencia")
+
+        scorer.save()
+        self.scorer = scorer
+        return report
+
+    def load_model(self, filepath=None, compact=None):
         """
         Carga un modelo previamente entrenado
 
         Args:
             filepath: Ruta del modelo a cargar
+            compact: Si se sirve con el bosque compacto cuando existe
+                     (default: config.USE_COMPACT_MODEL, desactivado); el
+                     bosque compacto no admite reentrenamiento incremental
         """
         if filepath is None:
             filepath = config.MODEL_FILE
-
-        self.model = joblib.load(filepath)
-        print(f"✓ Modelo cargado desde: {filepath}")
-
-    def train_and_evaluate_pipeline(self, X_train, X_test, y_train, y_test, feature_names):
+        if compact is None:
+            compact = config.USE_COMPACT_MODEL
+
+        if compact and os.path.exists(config.COMPACT_MODEL_FILE):
+            self.model = CompactForest.load(config.COMPACT_MODEL_FILE)
+            self.model_file = config.COMPACT_MODEL_FILE
+            self.load_threshold()
+            print(f"✓ Bosque compacto cargado desde: {config.COMPACT_MODEL_FILE} "
+                  f"({self.model.n_trees} árboles, umbral {self.decision_threshold:.4f})")
+        else:
+            self.model = joblib.load(filepath)
+            # Modelos guardados antes de train/update con n_jobs=None
+            self.model.n_jobs = None
+            self.model_file = filepath
+            self.load_threshold()
+            print(f"✓ Modelo cargado desde: {filepath} (umbral {self.decision_threshold:.4f})")
+
+        # La cascada solo es válida con el modelo con el que se calibró el margen
+        self.scorer = None
+        if config.USE_DISTILLED_SCORER and os.path.exists(config.DISTILLED_MODEL_FILE):
+            scorer = DistilledScorer.load()
+            if getattr(scorer, 'fallback_version', None) == dataset_fingerprint(self.model_file):
+                self.scorer = scorer
+                print(f"✓ Scorer destilado cargado (cascada con margen ±{scorer.margin:.4f})")
+            else:
+                print("⚠ Advertencia: el scorer destilado se calibró con otro modelo; "
+                      "se sirve sin cascada")
+
+    def train_and_evaluate_pipeline(self, X_train, X_test, y_train, y_test, feature_names,
+                                    n_jobs=None, eval_n_jobs=None, threshold_strategy=None):
         """
         Pipeline completo de entrenamiento y evaluación
 
@@ -219,6 +798,10 @@ class CreditRiskModel:
             y_train: Target de entrenamiento
             y_test: Target de prueba
             feature_names: Nombres de las features
+            n_jobs: Núcleos para entrenar (default: config.N_JOBS)
+            eval_n_jobs: Núcleos para evaluar (default: config.EVAL_N_JOBS)
+            threshold_strategy: Estrategia del umbral de decisión
+                                (default: config.THRESHOLD_STRATEGY)
 
         Returns:
             Diccionario con métricas
@@ -228,16 +811,29 @@ class CreditRiskModel:
         print("="*60)
 
         # 1. Entrenar
-        self.train(X_train, y_train)
-
-        # 2. Evaluar
-        metrics = self.evaluate(X_test, y_test)
+        with self.timer.stage('fit'):
+            self.train(X_train, y_train, n_jobs=n_jobs)
+
+        # 2. Umbral de decisión y evaluación: con 'f1'/'cost' el umbral se
+        # elige en una mitad del test y las métricas (con ese umbral, el que
+        # se sirve) se calculan en la otra mitad
+        if threshold_strategy is None:
+            threshold_strategy = config.THRESHOLD_STRATEGY
+        with self.timer.stage('evaluate'):
+            if threshold_strategy == 'default':
+                self.select_threshold('default')
+                metrics = self.evaluate(X_test, y_test, n_jobs=eval_n_jobs)
+            else:
+                X_select, X_report, y_select, y_report = holdout_halves(X_test, y_test)
+                self.select_threshold(threshold_strategy, X_select, y_select)
+                metrics = self.evaluate(X_report, y_report, n_jobs=eval_n_jobs)
 
         # 3. Feature importance
         self.get_feature_importance(feature_names)
 
         # 4. Guardar modelo
-        self.save_model()
+        with self.timer.stage('save'):
+            self.save_model()
 
         print("\n" + "="*60)
         print("✓ PIPELINE DE ENTRENAMIENTO COMPLETADO")
@@ -272,3 +868,140 @@ def calculate_risk_metrics(df):
         metrics['default_by_intent'] = df.groupby('loan_intent')['loan_status'].mean().to_dict()
 
     return metrics
+
+
+def holdout_halves(X, y):
+    """
+    Divide un conjunto en dos mitades estratificadas y deterministas: una
+    para ajustar decisiones (umbral, árboles, margen) y otra para reportar
+
+    Returns:
+        Tupla (X_select, X_report, y_select, y_report)
+    """
+    return train_test_split(X, y, test_size=0.5, stratify=y,
+                            random_state=config.RANDOM_STATE)
+
+
+def confusion_counts(y_true, y_pred):
+    """
+    Cuenta TN, FP, FN y TP de una clasificación binaria en una sola pasada
+
+    Args:
+        y_true: Etiquetas reales (0/1)
+        y_pred: Etiquetas predichas (0/1)
+
+    Returns:
+        Tupla de enteros (tn, fp, fn, tp)
+    """
+    counts = np.bincount(2 * np.asarray(y_true, dtype=np.int64) +
+                         np.asarray(y_pred, dtype=np.int64), minlength=4)
+    tn, fp, fn, tp = (int(c) for c in counts[:4])
+    return tn, fp, fn, tp
+
+
+def metrics_from_confusion(tn, fp, fn, tp):
+    """
+    Calcula accuracy, precision, recall y F1 a partir de los conteos de la
+    matriz de confusión (0 cuando el denominador es 0, como zero_division=0)
+
+    Returns:
+        Diccionario con accuracy, precision, recall y f1_score
+    """
+    total = tn + fp + fn + tp
+    return {
+        'accuracy': (tp + tn) / total if total else 0.0,
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'f1_score': 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0
+    }
+
+
+def classification_report_from_confusion(tn, fp, fn, tp, digits=2):
+    """
+    Genera el reporte de clasificación (formato de sklearn) desde los conteos
+
+    Returns:
+        String con precision, recall, f1 y soporte por clase y promedios
+    """
+    # Por clase: la clase 0 es la "positiva" con los conteos invertidos
+    rows = {
+        '0': metrics_from_confusion(tp, fn, fp, tn),
+        '1': metrics_from_confusion(tn, fp, fn, tp)
+    }
+    support = {'0': tn + fp, '1': fn + tp}
+    total = tn + fp + fn + tp
+
+    width = 12
+    fmt = f"{{:>{width}}} {{:>9}} {{:>9}} {{:>9}} {{:>9}}\n"
+    value = f"{{:.{digits}f}}"
+    report = fmt.format('', 'precision', 'recall', 'f1-score', 'support') + "\n"
+    for label, row in rows.items():
+        report += fmt.format(label, value.format(row['precision']), value.format(row['recall']),
+                             value.format(row['f1_score']), support[label])
+    report += "\n" + fmt.format('accuracy', '', '', value.format((tn + tp) / total if total else 0.0), total)
+    for name, weights in (('macro avg', {'0': 0.5, '1': 0.5}),
+                          ('weighted avg', {k: v / total if total else 0.0 for k, v in support.items()})):
+        averages = [sum(weights[k] * rows[k][m] for k in rows)
+                    for m in ('precision', 'recall', 'f1_score')]
+        report += fmt.format(name, *(value.format(a) for a in averages), total)
+    return report
+
+
+def threshold_sweep(y_true, y_score, cost_fp=None, cost_fn=None):
+    """
+    Barrido vectorizado de umbrales: precision, recall, F1 y costo para cada
+    corte posible (predecir default si score >= umbral) a partir de un solo
+    ordenamiento de los scores; también retorna el ROC-AUC
+
+    Args:
+        y_true: Etiquetas reales (0/1)
+        y_score: Probabilidad de default predicha
+        cost_fp: Costo de un falso positivo (default: config.COST_FALSE_POSITIVE)
+        cost_fn: Costo de un falso negativo (default: config.COST_FALSE_NEGATIVE)
+
+    Returns:
+        Diccionario con arrays thresholds (descendentes), tp, fp, fn, tn,
+        precision, recall, f1 y cost, y el escalar roc_auc
+    """
+    if cost_fp is None:
+        cost_fp = config.COST_FALSE_POSITIVE
+    if cost_fn is None:
+        cost_fn = config.COST_FALSE_NEGATIVE
+
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=np.float64)
+
+    order = np.argsort(-y_score, kind='mergesort')
+    scores = y_score[order]
+    truth = y_true[order]
+
+    # Último índice de cada grupo de scores iguales
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(truth)[last]
+    fp = last + 1 - tp
+    positives, negatives = int(truth.sum()), len(truth) - int(truth.sum())
+    fn = positives - tp
+    tn = negatives - fp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(positives > 0, tp / max(positives, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+
+    # ROC-AUC por trapecios sobre los mismos conteos acumulados
+    tpr = np.r_[0.0, tp / positives] if positives else np.zeros(len(tp) + 1)
+    fpr = np.r_[0.0, fp / negatives] if negatives else np.zeros(len(fp) + 1)
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    return {
+        'thresholds': scores[last],
+        'tp': tp,
+        'fp': fp,
+        'fn': fn,
+        'tn': tn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'cost': fp * cost_fp + fn * cost_fn,
+        'roc_auc': roc_auc
+    }
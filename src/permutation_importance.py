@@ -0,0 +1,130 @@
+"""
+Importancia de features por permutación
+Mide cuánto cae el ROC-AUC de prueba al permutar cada feature. La
+predicción base se calcula una sola vez, la grilla feature x repetición se
+reparte en un pool de procesos que comparten la matriz de prueba como
+memmap y los resultados se guardan por versión del modelo
+"""
+import copy
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+import config
+from src.pipeline_cache import (WORKER_DATA, dataset_fingerprint, init_worker, load_json_cache,
+                                save_json_cache, shared_array_path)
+
+
+def importance_key(model_path, X, y, n_repeats):
+    """
+    Clave de caché: versión del modelo (hash del archivo), datos de prueba y
+    número de repeticiones
+    """
+    data = hashlib.sha1(np.ascontiguousarray(X, dtype=np.float32).tobytes())
+    data.update(np.asarray(y, dtype=np.int8).tobytes())
+    payload = {
+        'model': dataset_fingerprint(model_path),
+        'data': data.hexdigest(),
+        'n_repeats': n_repeats,
+        'random_state': config.RANDOM_STATE
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _permute_feature(feature, repeat):
+    """
+    Permuta una feature con una semilla propia de (feature, repetición)
+
+    Returns:
+        Caída del ROC-AUC respecto de la predicción base
+    """
+    X, y, model = WORKER_DATA['X'], WORKER_DATA['y'], WORKER_DATA['model']
+    rng = np.random.default_rng([config.RANDOM_STATE, feature, repeat])
+
+    X_permuted = np.array(X)  # copia privada; el memmap compartido no se modifica
+    X_permuted[:, feature] = X[rng.permutation(len(X)), feature]
+    proba = model.predict_proba(X_permuted)[:, 1]
+    return WORKER_DATA['baseline'] - roc_auc_score(y, proba)
+
+
+def permutation_importance(model, X, y, feature_names, model_path=None, n_repeats=None,
+                           n_jobs=None, use_cache=True):
+    """
+    Importancia por permutación: caída media del ROC-AUC de prueba al
+    permutar cada feature
+
+    Args:
+        model: Modelo ajustado con predict_proba (se envía a cada proceso)
+        X, y: Datos de prueba (X puede ser un memmap de save_feature_matrices)
+        feature_names: Nombres de las columnas de X
+        model_path: Archivo guardado de model, que define su versión en el
+                    caché (None = modelo sin guardar, no se usa el caché)
+        n_repeats: Permutaciones por feature (default: config.PERMUTATION_N_REPEATS)
+        n_jobs: Procesos del pool (default: config.N_JOBS, -1 = todos)
+        use_cache: Si se reutilizan resultados de la misma versión del modelo
+
+    Returns:
+        DataFrame con columnas 'feature', 'importance' y 'std' ordenado por importancia
+    """
+    if n_repeats is None:
+        n_repeats = config.PERMUTATION_N_REPEATS
+    n_jobs = config.N_JOBS if n_jobs is None else n_jobs
+    n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+
+    # Sin archivo no hay versión del modelo con qué indexar el caché
+    use_cache = use_cache and model_path is not None
+    key = importance_key(model_path, X, y, n_repeats) if use_cache else None
+    cache = load_json_cache(config.PERMUTATION_RESULTS_FILE) if use_cache else {}
+    if key in cache:
+        print("✓ Importancia por permutación recuperada del caché")
+        result = cache[key]
+    else:
+        # Predicción base: una sola vez para toda la grilla
+        baseline_score = roc_auc_score(y, model.predict_proba(X)[:, 1])
+
+        # Un núcleo por proceso: el paralelismo lo da el pool
+        worker_model = copy.copy(model)
+        if hasattr(worker_model, 'n_jobs'):
+            worker_model.n_jobs = 1
+
+        # Los memmap de save_feature_matrices se comparten tal cual; si no,
+        # la matriz se guarda una vez en un .npy temporal
+        if not isinstance(X, np.memmap):
+            X = np.ascontiguousarray(X, dtype=np.float32)
+        if not isinstance(y, np.memmap):
+            y = np.asarray(y, dtype=np.int8)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            arrays = {'X': shared_array_path(X, tmp_dir, 'X_test'),
+                      'y': shared_array_path(y, tmp_dir, 'y_test')}
+            grid = [(feature, repeat) for feature in range(len(feature_names))
+                    for repeat in range(n_repeats)]
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker,
+                                     initargs=(arrays, {'model': worker_model,
+                                                        'baseline': baseline_score})) as executor:
+                drops = list(executor.map(_permute_feature, *zip(*grid)))
+
+        drops = np.array(drops).reshape(len(feature_names), n_repeats)
+        result = {
+            'features': list(feature_names),
+            'baseline_score': float(baseline_score),
+            'importance_mean': drops.mean(axis=1).tolist(),
+            'importance_std': drops.std(axis=1).tolist(),
+            'n_repeats': n_repeats
+        }
+        if use_cache:
+            cache[key] = result
+            save_json_cache(cache, config.PERMUTATION_RESULTS_FILE)
+            print(f"✓ Importancia por permutación guardada en: {config.PERMUTATION_RESULTS_FILE}")
+
+    return pd.DataFrame({
+        'feature': result['features'],
+        'importance': result['importance_mean'],
+        'std': result['importance_std']
+    }).sort_values('importance', ascending=False)
@@ -0,0 +1,161 @@
+"""
+Caché de artefactos por etapa del pipeline de procesamiento
+Cada etapa se guarda bajo un hash de la huella de su entrada más la
+configuración que la afecta, de modo que las etapas sin cambios se omiten.
+Incluye también los cachés JSON de resultados y la inicialización de los
+pools de procesos que comparten matrices como memmap (búsqueda de
+hiperparámetros, importancia por permutación)
+"""
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import config
+
+
+# Datos de cada proceso de un pool, cargados por init_worker
+WORKER_DATA = {}
+
+
+def dataset_fingerprint(filepath):
+    """
+    Calcula la versión de un dataset como el SHA-1 de su contenido
+
+    Args:
+        filepath: Ruta al archivo de datos
+
+    Returns:
+        String hexadecimal con el hash
+    """
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_key(parent_key, stage, params=None):
+    """
+    Calcula la clave de una etapa encadenando la clave de su entrada
+
+    Args:
+        parent_key: Clave (o huella) de la entrada de la etapa
+        stage: Nombre de la etapa
+        params: Configuración que afecta a la salida de la etapa
+
+    Returns:
+        String hexadecimal con el hash
+    """
+    payload = {'parent': parent_key, 'stage': stage, 'params': params or {}}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class StageCache:
+    """
+    Almacén en disco (joblib) de las salidas de las etapas del pipeline
+
+    Solo se conserva la última salida de cada etapa: al guardar una nueva
+    clave se eliminan las anteriores de la misma etapa.
+    """
+
+    def __init__(self, cache_dir=None, enabled=True):
+        """
+        Args:
+            cache_dir: Directorio del caché (opcional, usa config por defecto)
+            enabled: Si es False, get nunca encuentra nada y put no guarda
+        """
+        self.cache_dir = cache_dir if cache_dir is not None else config.PIPELINE_CACHE_DIR
+        self.enabled = enabled
+
+    def _path(self, stage, key):
+        return self.cache_dir / f"{stage}-{key[:16]}.pkl"
+
+    def get(self, stage, key):
+        """
+        Retorna la salida guardada de una etapa, o None si no está en caché
+        """
+        if not self.enabled:
+            return None
+        filepath = self._path(stage, key)
+        if not os.path.exists(filepath):
+            return None
+        print(f"✓ Etapa '{stage}' recuperada del caché")
+        return joblib.load(filepath)
+
+    def put(self, stage, key, value):
+        """
+        Guarda la salida de una etapa y descarta las versiones anteriores
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        filepath = self._path(stage, key)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{stage}-") and name != filepath.name:
+                os.remove(self.cache_dir / name)
+        joblib.dump(value, filepath)
+
+
+def load_json_cache(filepath):
+    """
+    Carga un caché de resultados en JSON
+
+    Args:
+        filepath: Ruta del archivo
+
+    Returns:
+        Diccionario {clave: resultado} (vacío si el archivo no existe)
+    """
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def save_json_cache(results, filepath):
+    """
+    Guarda un caché de resultados en JSON
+
+    Args:
+        results: Diccionario {clave: resultado}
+        filepath: Ruta del archivo
+    """
+    with open(filepath, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def shared_array_path(array, directory, name):
+    """
+    Ruta de un .npy para abrir array como memmap en los procesos de un pool:
+    el archivo del memmap si ya lo es; si no, se guarda en directory
+
+    Args:
+        array: Array o memmap
+        directory: Directorio para guardar el array si hace falta
+        name: Nombre del archivo (sin extensión)
+
+    Returns:
+        String con la ruta
+    """
+    if isinstance(array, np.memmap) and array.filename is not None:
+        return str(array.filename)
+    filepath = os.path.join(directory, f"{name}.npy")
+    np.save(filepath, np.asarray(array))
+    return filepath
+
+
+def init_worker(arrays, extra=None):
+    """
+    Inicializa cada proceso de un pool en WORKER_DATA: las rutas .npy se
+    abren como memmap de solo lectura (páginas compartidas entre procesos);
+    los arrays se usan tal cual (cada proceso recibe su propia copia)
+
+    Args:
+        arrays: Diccionario {nombre: array o ruta .npy}
+        extra: Otros valores para los procesos (opcional)
+    """
+    for name, value in arrays.items():
+        WORKER_DATA[name] = np.load(value, mmap_mode='r') if isinstance(value, str) else value
+    WORKER_DATA.update(extra or {})
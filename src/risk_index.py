@@ -0,0 +1,356 @@
+"""
+Índice persistente de scores de riesgo
+Mantiene un CreditRiskBST "caliente" con todo el dataset, construido una vez
+por versión del dataset, guardado en disco y actualizado incrementalmente
+con los nuevos solicitantes evaluados por la API
+"""
+import bisect
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import config
+from src.data_structures import build_balanced_credit_bst
+from src.pipeline_cache import dataset_fingerprint
+
+
+def compute_risk_scores(df, seed=42):
+    """
+    Calcula scores de riesgo simulados (0-100, mayor = más riesgo) a partir
+    de loan_status, la tasa de interés y el porcentaje del ingreso
+
+    Vectorizado: el ruido se genera como un solo array con la misma
+    secuencia que producían las llamadas por fila con np.random.seed(seed).
+
+    Args:
+        df: DataFrame con loan_status, loan_int_rate y loan_percent_income
+        seed: Semilla para la variación aleatoria
+
+    Returns:
+        Array de scores enteros, uno por fila de df
+    """
+    rng = np.random.RandomState(seed)
+
+    base_score = df['loan_status'].to_numpy(dtype=np.float64) * 50  # 0 o 50 segun default
+    # Ajustar por tasa de interes (normalizada)
+    interest_factor = np.minimum(df['loan_int_rate'].to_numpy(dtype=np.float64) / 25 * 30, 30)
+    # Ajustar por porcentaje de ingreso
+    income_factor = np.minimum(df['loan_percent_income'].to_numpy(dtype=np.float64) * 50, 20)
+    # Agregar variacion aleatoria
+    noise = rng.uniform(-5, 5, size=len(df))
+
+    scores = base_score + interest_factor + income_factor + noise
+    return np.clip(scores, 0, 100).astype(np.int64)  # Limitar entre 0 y 100
+
+
+def score_applicant(features, probability_default):
+    """
+    Calcula el score de riesgo de un nuevo solicitante
+
+    Usa la probabilidad de default predicha por el modelo en lugar de
+    loan_status (desconocido para un solicitante) y no agrega ruido.
+
+    Args:
+        features: Diccionario con loan_int_rate y loan_percent_income
+        probability_default: Probabilidad de default predicha (0-1)
+
+    Returns:
+        Score entero entre 0 y 100
+    """
+    base_score = probability_default * 50
+    interest_factor = min(float(features['loan_int_rate']) / 25 * 30, 30)
+    income_factor = min(float(features['loan_percent_income']) * 50, 20)
+
+    score = base_score + interest_factor + income_factor
+    return int(max(0, min(100, score)))
+
+
+def scoring_data_file():
+    """
+    Archivo del dataset a indexar: los datos procesados si existen, si no
+    los datos raw
+
+    Returns:
+        Ruta del archivo
+
+    Raises:
+        FileNotFoundError: Si no existe ningún archivo de datos
+    """
+    if os.path.exists(config.PROCESSED_DATA_FILE):
+        return config.PROCESSED_DATA_FILE
+    if os.path.exists(config.RAW_DATA_FILE):
+        return config.RAW_DATA_FILE
+    raise FileNotFoundError("No se encontraron archivos de datos")
+
+
+def load_scoring_data(data_file=None):
+    """
+    Carga el dataset a indexar; a los datos raw se les quitan las filas
+    con valores nulos
+
+    Args:
+        data_file: Ruta del archivo (default: scoring_data_file())
+
+    Returns:
+        Tupla (DataFrame, ruta del archivo leído)
+
+    Raises:
+        FileNotFoundError: Si no existe ningún archivo de datos
+    """
+    if data_file is None:
+        data_file = scoring_data_file()
+    df = pd.read_csv(data_file)
+    if data_file != config.PROCESSED_DATA_FILE:
+        df = df.dropna()
+    return df, data_file
+
+
+class RiskScoreIndex:
+    """
+    Índice de clientes por score de riesgo respaldado por un CreditRiskBST
+
+    Se guarda en disco en formato columnar (arrays NumPy en un .npz) y se
+    reconstruye como un árbol balanceado al cargarlo. Las altas de la API
+    se insertan en el árbol en O(log n) y se persisten cada
+    config.RISK_INDEX_SAVE_EVERY altas. Una lista ordenada de los scores
+    responde los conteos en rango con dos búsquedas binarias.
+
+    Las altas y las consultas toman el mismo lock: la API inserta mientras
+    otras peticiones leen el árbol.
+    """
+
+    def __init__(self, scores=None, payloads=None, dataset_version=None):
+        """
+        Args:
+            scores: Lista de scores de riesgo
+            payloads: Lista paralela de diccionarios con info del cliente
+            dataset_version: Huella del dataset con el que se construyó
+        """
+        self.scores = list(scores) if scores is not None else []
+        self.payloads = list(payloads) if payloads is not None else []
+        self.dataset_version = dataset_version
+        self.bst = build_balanced_credit_bst(self.scores, self.payloads)
+        self._sorted_scores = sorted(self.scores)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, df, dataset_version=None):
+        """
+        Construye el índice a partir de un DataFrame de clientes
+
+        Args:
+            df: DataFrame con las columnas usadas por compute_risk_scores
+            dataset_version: Huella del dataset (opcional)
+
+        Returns:
+            RiskScoreIndex con todos los clientes
+        """
+        scores = compute_risk_scores(df).tolist()
+        payloads = [
+            {'index': int(idx), 'loan_amnt': float(amount), 'income': float(income)}
+            for idx, (amount, income) in enumerate(
+                zip(df['loan_amnt'].tolist(), df['person_income'].tolist())
+            )
+        ]
+        return cls(scores, payloads, dataset_version)
+
+    def size(self):
+        """Retorna el número de clientes indexados"""
+        return self.bst.size()
+
+    def _insert(self, score, client_info):
+        """Agrega un cliente al árbol y a las listas (sin tomar el lock)"""
+        self.bst.insert_client(score, client_info)
+        bisect.insort(self._sorted_scores, score)
+        self.scores.append(score)
+        self.payloads.append(client_info)
+
+    def add_applicant(self, features, probability_default):
+        """
+        Agrega incrementalmente un solicitante evaluado por el modelo
+
+        Args:
+            features: Diccionario con las features del solicitante
+            probability_default: Probabilidad de default predicha
+
+        Returns:
+            Score de riesgo asignado
+        """
+        score = score_applicant(features, probability_default)
+        client_info = {
+            'index': None,
+            'loan_amnt': float(features['loan_amnt']),
+            'income': float(features['person_income'])
+        }
+
+        with self._lock:
+            self._insert(score, client_info)
+            self._pending += 1
+            should_save = self._pending >= config.RISK_INDEX_SAVE_EVERY
+
+        if should_save:
+            self.save()
+        return score
+
+    def range_search(self, min_score, max_score, limit=None, after_key=None):
+        """
+        Busca clientes con score en [min_score, max_score] (ver
+        BinarySearchTree.range_search para la paginación por cursor)
+
+        Returns:
+            Lista de tuplas (score, client_info)
+        """
+        with self._lock:
+            return self.bst.range_search(min_score, max_score,
+                                         limit=limit, after_key=after_key)
+
+    def range_page(self, min_score, max_score, limit, after_key=None):
+        """
+        Página de clientes con score en [min_score, max_score] y el cursor
+        (score, seq) de la siguiente (ver BinarySearchTree.range_page)
+
+        Returns:
+            Tupla (lista de tuplas (score, client_info), cursor o None)
+        """
+        with self._lock:
+            return self.bst.range_page(min_score, max_score, limit, after_key=after_key)
+
+    def count_range(self, min_score, max_score):
+        """Cuenta los clientes con score en [min_score, max_score] en O(log n)"""
+        with self._lock:
+            return max(0, bisect.bisect_right(self._sorted_scores, max_score)
+                       - bisect.bisect_left(self._sorted_scores, min_score))
+
+    def sample(self, size, seed=42):
+        """
+        Muestra aleatoria de clientes sin reemplazo
+
+        Args:
+            size: Número máximo de clientes
+            seed: Semilla de la muestra
+
+        Returns:
+            Lista de tuplas (score, client_info)
+        """
+        with self._lock:
+            rng = np.random.RandomState(seed)
+            n = len(self.scores)
+            indices = rng.choice(n, min(size, n), replace=False)
+            return [(self.scores[i], self.payloads[i]) for i in indices]
+
+    def get_risk_distribution(self):
+        """Retorna la distribución de riesgo de todo el índice en O(1)"""
+        with self._lock:
+            return self.bst.get_risk_distribution()
+
+    def save(self, filepath=None):
+        """
+        Guarda el índice en formato columnar comprimido
+
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+        """
+        if filepath is None:
+            filepath = config.RISK_INDEX_FILE
+
+        with self._lock:
+            n = len(self.scores)
+            row_ids = np.full(n, -1, dtype=np.int32)
+            loan_amnt = np.empty(n, dtype=np.float64)
+            income = np.empty(n, dtype=np.float64)
+            for i, info in enumerate(self.payloads):
+                if info['index'] is not None:
+                    row_ids[i] = info['index']
+                loan_amnt[i] = info['loan_amnt']
+                income[i] = info['income']
+
+            np.savez_compressed(
+                filepath,
+                scores=np.asarray(self.scores, dtype=np.int16),
+                row_ids=row_ids,
+                loan_amnt=loan_amnt,
+                income=income,
+                dataset_version=np.array(self.dataset_version or '')
+            )
+            self._pending = 0
+
+        print(f"✓ Índice de riesgo guardado en: {filepath}")
+
+    def flush(self):
+        """Guarda el índice solo si hay altas sin persistir"""
+        if self._pending > 0:
+            self.save()
+
+    @classmethod
+    def load(cls, filepath=None):
+        """
+        Carga un índice previamente guardado
+
+        Args:
+            filepath: Ruta del archivo (opcional, usa config por defecto)
+
+        Returns:
+            RiskScoreIndex reconstruido como árbol balanceado
+        """
+        if filepath is None:
+            filepath = config.RISK_INDEX_FILE
+
+        with np.load(filepath) as arrays:
+            scores = arrays['scores'].tolist()
+            payloads = [
+                {
+                    'index': row_id if row_id >= 0 else None,
+                    'loan_amnt': amount,
+                    'income': income
+                }
+                for row_id, amount, income in zip(
+                    arrays['row_ids'].tolist(),
+                    arrays['loan_amnt'].tolist(),
+                    arrays['income'].tolist()
+                )
+            ]
+            dataset_version = str(arrays['dataset_version']) or None
+
+        print(f"✓ Índice de riesgo cargado desde: {filepath}")
+        return cls(scores, payloads, dataset_version)
+
+    @classmethod
+    def load_or_build(cls, filepath=None):
+        """
+        Carga el índice guardado si corresponde a la versión actual del
+        dataset; si no, lo reconstruye conservando los solicitantes de la API
+
+        Args:
+            filepath: Ruta del archivo del índice (opcional)
+
+        Returns:
+            RiskScoreIndex listo para consultas
+        """
+        if filepath is None:
+            filepath = config.RISK_INDEX_FILE
+
+        # La huella del archivo basta para validar el índice: el CSV solo se
+        # parsea si hay que reconstruirlo
+        data_file = scoring_data_file()
+        version = dataset_fingerprint(data_file)
+
+        previous = None
+        if os.path.exists(filepath):
+            previous = cls.load(filepath)
+            if previous.dataset_version == version:
+                return previous
+
+        print("Construyendo índice de riesgo para la versión actual del dataset...")
+        df, _ = load_scoring_data(data_file)
+        index = cls.build(df, dataset_version=version)
+
+        # Conservar los solicitantes agregados desde la API
+        if previous is not None:
+            for score, info in zip(previous.scores, previous.payloads):
+                if info['index'] is None:
+                    index._insert(score, info)
+
+        index.save(filepath)
+        return index
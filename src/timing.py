@@ -0,0 +1,47 @@
+"""
+Medición de tiempos por etapa de los pipelines
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Acumula el tiempo de reloj (wall time) de cada etapa de un pipeline
+
+    Uso:
+        timer = StageTimer()
+        with timer.stage('load'):
+            ...
+        timer.report()
+    """
+
+    def __init__(self):
+        self.times = {}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mide el tiempo de un bloque y lo acumula bajo el nombre de la etapa
+
+        Args:
+            name: Nombre de la etapa (ej: 'load', 'fit')
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.times[name] = self.times.get(name, 0.0) + elapsed
+            print(f"⏱ {name}: {elapsed:.3f} s")
+
+    def total(self):
+        """Retorna la suma de los tiempos de todas las etapas"""
+        return sum(self.times.values())
+
+    def report(self):
+        """Imprime una tabla con el tiempo de cada etapa"""
+        print("\nTiempos por etapa:")
+        for name, elapsed in self.times.items():
+            print(f"  • {name:<10} {elapsed:8.3f} s")
+        print(f"  • {'total':<10} {self.total():8.3f} s")
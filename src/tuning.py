@@ -0,0 +1,245 @@
+"""
+Búsqueda de hiperparámetros del Random Forest
+Preprocesa el dataset una sola vez (arrays del caché de etapas del pipeline),
+evalúa cada configuración con validación cruzada estratificada en un pool de
+procesos y reutiliza los resultados ya calculados desde un caché local
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import (ParameterGrid, ParameterSampler, StratifiedKFold,
+                                     train_test_split)
+
+import config
+from src.data_processing import DataProcessor
+from src.pipeline_cache import WORKER_DATA, init_worker, load_json_cache, save_json_cache
+
+
+def load_training_arrays(use_cache=True, memmap=False):
+    """
+    Retorna los arrays de entrenamiento codificados y escalados; con el
+    caché de etapas, process_pipeline no vuelve a procesar el CSV
+
+    Args:
+        use_cache: Si se usa el caché de etapas del pipeline
+        memmap: Si se retornan memmaps de los .npy de config.FEATURES_DIR
+
+    Returns:
+        Tupla (X_train, y_train, clave de los datos)
+    """
+    processor = DataProcessor()
+    X_train, _, y_train, _, _ = processor.process_pipeline(use_cache=use_cache,
+                                                           memmap=memmap)
+    if not memmap:
+        # float32: el dtype que usan internamente los árboles
+        X_train = np.ascontiguousarray(X_train, dtype=np.float32)
+        y_train = np.asarray(y_train)
+    return X_train, y_train, processor.stage_keys()['split']
+
+
+def trial_key(params, data_key, cv, n_samples):
+    """
+    Clave de caché de un trial: hiperparámetros, datos, folds y muestras
+    """
+    payload = {
+        'params': params,
+        'data': data_key,
+        'cv': cv,
+        'n_samples': n_samples,
+        'random_state': config.RANDOM_STATE
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _fit_fold(params, train_idx, valid_idx):
+    """
+    Entrena y valida un fold en un proceso del pool
+
+    Returns:
+        Tupla (ROC-AUC de validación, tiempo de fit en segundos)
+    """
+    X, y = WORKER_DATA['X'], WORKER_DATA['y']
+    model = RandomForestClassifier(**params, random_state=config.RANDOM_STATE, n_jobs=1)
+
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+
+    proba = model.predict_proba(X[valid_idx])[:, 1]
+    return roc_auc_score(y[valid_idx], proba), fit_time
+
+
+def _subsample(y, n_samples):
+    """Índices estratificados y deterministas de n_samples filas"""
+    if n_samples >= len(y):
+        return np.arange(len(y))
+    idx, _ = train_test_split(np.arange(len(y)), train_size=n_samples, stratify=y,
+                              random_state=config.RANDOM_STATE)
+    return np.sort(idx)
+
+
+class HyperparameterSearch:
+    """
+    Búsqueda de hiperparámetros con validación cruzada estratificada
+
+    Estrategias: 'grid' (todas las combinaciones), 'random' (n_iter
+    combinaciones) y 'halving' (successive halving sobre el número de
+    muestras: todas las combinaciones con pocas filas y solo las mejores
+    1/eta pasan a la siguiente ronda con eta veces más filas).
+    """
+
+    def __init__(self, param_grid=None, cv=None, n_jobs=None, use_cache=True,
+                 memmap=None):
+        """
+        Args:
+            param_grid: Diccionario {parámetro: lista de valores}
+                        (default: config.TUNING_PARAM_GRID)
+            cv: Número de folds (default: config.TUNING_CV_FOLDS)
+            n_jobs: Procesos del pool (default: config.N_JOBS, -1 = todos)
+            use_cache: Si se reutilizan arrays y resultados en caché
+            memmap: Si los procesos comparten las matrices como memmap
+                    (default: config.MEMMAP_FEATURES)
+        """
+        self.param_grid = param_grid or config.TUNING_PARAM_GRID
+        self.cv = cv or config.TUNING_CV_FOLDS
+        n_jobs = config.N_JOBS if n_jobs is None else n_jobs
+        self.n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+        self.use_cache = use_cache
+        self.memmap = config.MEMMAP_FEATURES if memmap is None else memmap
+        self.trials = []
+
+    def candidates(self, search='grid', n_iter=10):
+        """
+        Genera las configuraciones a evaluar
+
+        Args:
+            search: 'grid', 'random' o 'halving'
+            n_iter: Número de combinaciones para la búsqueda aleatoria
+
+        Returns:
+            Lista de diccionarios de hiperparámetros
+        """
+        if search == 'random':
+            sampler = ParameterSampler(self.param_grid, n_iter=n_iter,
+                                       random_state=config.RANDOM_STATE)
+            params = list(sampler)
+        elif search in ('grid', 'halving'):
+            params = list(ParameterGrid(self.param_grid))
+        else:
+            raise ValueError(f"Estrategia de búsqueda desconocida: {search}")
+        # Tipos nativos para poder serializar a JSON
+        return [{k: v.item() if hasattr(v, 'item') else v for k, v in p.items()}
+                for p in params]
+
+    def _evaluate(self, executor, candidates, X, y, data_key, n_samples, cache):
+        """
+        Evalúa un conjunto de candidatos con CV, reutilizando el caché
+
+        Returns:
+            Lista de resultados (uno por candidato, en el mismo orden)
+        """
+        rows = _subsample(y, n_samples)
+        folds = list(StratifiedKFold(n_splits=self.cv, shuffle=True,
+                                     random_state=config.RANDOM_STATE)
+                     .split(rows, y[rows]))
+
+        results = [None] * len(candidates)
+        pending = {}
+        for i, params in enumerate(candidates):
+            key = trial_key(params, data_key, self.cv, len(rows))
+            if key in cache:
+                results[i] = dict(cache[key], cached=True)
+                continue
+            pending[i] = (key, [
+                executor.submit(_fit_fold, params, rows[train], rows[valid])
+                for train, valid in folds
+            ])
+
+        for i, (key, futures) in pending.items():
+            scores, fit_times = zip(*(future.result() for future in futures))
+            result = {
+                'params': candidates[i],
+                'n_samples': len(rows),
+                'mean_score': float(np.mean(scores)),
+                'std_score': float(np.std(scores)),
+                'mean_fit_time': float(np.mean(fit_times))
+            }
+            cache[key] = result
+            results[i] = dict(result, cached=False)
+
+        for result in results:
+            tag = " (caché)" if result['cached'] else ""
+            print(f"  AUC {result['mean_score']:.4f} ± {result['std_score']:.4f}  "
+                  f"fit {result['mean_fit_time']:.2f} s  n={result['n_samples']}  "
+                  f"{result['params']}{tag}")
+        return results
+
+    def run(self, search='grid', n_iter=10, eta=3, min_samples=None):
+        """
+        Ejecuta la búsqueda
+
+        Args:
+            search: 'grid', 'random' o 'halving'
+            n_iter: Combinaciones a muestrear en la búsqueda aleatoria
+            eta: Factor de reducción de candidatos en successive halving
+            min_samples: Filas de la primera ronda de halving
+                         (default: las necesarias para llegar al total)
+
+        Returns:
+            Diccionario con el mejor resultado
+        """
+        print("\n" + "="*60)
+        print(f"BÚSQUEDA DE HIPERPARÁMETROS ({search}, {self.cv} folds, "
+              f"{self.n_jobs} procesos)")
+        print("="*60)
+
+        X, y, data_key = load_training_arrays(use_cache=self.use_cache,
+                                              memmap=self.memmap)
+        cache = load_json_cache(config.TUNING_RESULTS_FILE) if self.use_cache else {}
+        candidates = self.candidates(search, n_iter)
+        self.trials = []
+
+        # Con memmap los procesos abren los .npy (páginas compartidas)
+        arrays = ({'X': str(X.filename), 'y': str(y.filename)} if self.memmap
+                  else {'X': X, 'y': y})
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=init_worker,
+                                 initargs=(arrays,)) as executor:
+            if search == 'halving':
+                rounds = int(np.ceil(np.log(max(len(candidates), 1)) / np.log(eta)))
+                n_samples = min_samples or max(len(y) // eta ** rounds, self.cv * 20)
+                n_samples = min(n_samples, len(y))
+                while True:
+                    print(f"\nRonda: {len(candidates)} candidatos con {n_samples} muestras")
+                    results = self._evaluate(executor, candidates, X, y, data_key,
+                                             n_samples, cache)
+                    self.trials.extend(results)
+                    if len(candidates) == 1 or n_samples >= len(y):
+                        break
+                    order = np.argsort([-r['mean_score'] for r in results], kind='stable')
+                    keep = max(1, len(candidates) // eta)
+                    candidates = [candidates[i] for i in order[:keep]]
+                    # La última ronda (un solo candidato, o sin lugar para
+                    # otra multiplicación por eta) usa todas las filas
+                    n_samples *= eta
+                    if keep == 1 or n_samples * eta > len(y):
+                        n_samples = len(y)
+                final = results
+            else:
+                final = self._evaluate(executor, candidates, X, y, data_key,
+                                       len(y), cache)
+                self.trials.extend(final)
+
+        if self.use_cache:
+            save_json_cache(cache, config.TUNING_RESULTS_FILE)
+            print(f"\n✓ Resultados guardados en: {config.TUNING_RESULTS_FILE}")
+
+        best = max(final, key=lambda r: r['mean_score'])
+        print(f"\n✓ Mejor configuración: {best['params']} "
+              f"(AUC {best['mean_score']:.4f})")
+        return best
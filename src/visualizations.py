@@ -230,13 +230,18 @@ class CreditRiskVisualizer:
 
         return fig
 
-    def plot_feature_importance(self, feature_importance_df, top_n=10):
+    def plot_feature_importance(self, feature_importance_df, top_n=10, title=None,
+                                xaxis_title="Importancia"):
         """
         Gráfico de barras de importancia de features
 
         Args:
             feature_importance_df: DataFrame con columnas 'feature' e 'importance'
+                                   (y opcionalmente 'std', que se dibuja como
+                                   barras de error, ej: importancia por permutación)
             top_n: Número de features top a mostrar
+            title: Título del gráfico (opcional)
+            xaxis_title: Título del eje de importancia
 
         Returns:
             Objeto figura de Plotly
@@ -245,16 +250,21 @@ class CreditRiskVisualizer:
 
         fig = go.Figure()
 
+        error_x = None
+        if 'std' in top_features.columns:
+            error_x = dict(type='data', array=top_features['std'], visible=True)
+
         fig.add_trace(go.Bar(
             x=top_features['importance'],
             y=top_features['feature'],
             orientation='h',
-            marker_color='steelblue'
+            marker_color='steelblue',
+            error_x=error_x
         ))
 
         fig.update_layout(
-            title=f"Top {top_n} Features más Importantes",
-            xaxis_title="Importancia",
+            title=title or f"Top {top_n} Features más Importantes",
+            xaxis_title=xaxis_title,
             yaxis_title="Feature",
             template=self.template,
             height=self.height,
@@ -2,43 +2,161 @@
 Script para entrenar el modelo de Credit Risk Prediction
 Ejecuta el pipeline completo de procesamiento y entrenamiento
 """
+import argparse
+
 from src.data_processing import DataProcessor
-from src.model import CreditRiskModel
+from src.model import CreditRiskModel, holdout_halves
+from src.timing import StageTimer
 import joblib
 import config
 
 
+def parse_args():
+    """
+    Lee las opciones de línea de comandos del entrenamiento
+    """
+    parser = argparse.ArgumentParser(description="Entrena el modelo de Credit Risk")
+    parser.add_argument('--n-jobs', type=int, default=config.N_JOBS,
+                        help="Núcleos para entrenar el bosque (-1 = todos)")
+    parser.add_argument('--eval-n-jobs', type=int, default=config.EVAL_N_JOBS,
+                        help="Núcleos para evaluar el modelo (-1 = todos)")
+    parser.add_argument('--threshold', choices=['default', 'f1', 'cost'],
+                        default=config.THRESHOLD_STRATEGY,
+                        help="Umbral de decisión: fijo, máximo F1 o mínimo costo del barrido")
+    parser.add_argument('--compact', action='store_true',
+                        help="Genera el bosque compacto (poda y cuantización) para servir")
+    parser.add_argument('--permutation-importance', action='store_true',
+                        help="Calcula la importancia por permutación en el set de prueba")
+    parser.add_argument('--distill', action='store_true',
+                        help="Destila el bosque en un scorer liviano para servir en cascada")
+    parser.add_argument('--explore', choices=['full', 'sample', 'off'],
+                        default=config.EXPLORE_MODE,
+                        help="Exploración de datos: completa, sobre una muestra o desactivada")
+    parser.add_argument('--memmap', action='store_true', default=config.MEMMAP_FEATURES,
+                        help="Comparte las matrices de features como memmap (.npy en data/processed)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Reprocesa todas las etapas ignorando el caché del pipeline")
+    parser.add_argument('--incremental', metavar='CSV',
+                        help="Actualiza el modelo existente solo con los registros nuevos del CSV")
+    parser.add_argument('--new-trees', type=int, default=config.INCREMENTAL_NEW_TREES,
+                        help="Árboles a agregar en modo incremental")
+    parser.add_argument('--max-trees', type=int, default=config.INCREMENTAL_MAX_TREES,
+                        help="Máximo de árboles en modo incremental (retira los más antiguos)")
+    return parser.parse_args()
+
+
+def incremental_update(args, timer):
+    """
+    Reentrenamiento incremental: procesa solo los registros nuevos con los
+    encoders/scaler existentes y agrega árboles al bosque guardado
+    """
+    print("="*70)
+    print("CREDIT RISK PREDICTION SYSTEM - REENTRENAMIENTO INCREMENTAL")
+    print("="*70)
+
+    # 1. Cargar modelo y preprocesadores existentes
+    print("\n[1/3] Cargando modelo y preprocesadores...")
+    with timer.stage('load'):
+        model = CreditRiskModel(timer=timer)
+        model.load_model(compact=False)
+        processor = DataProcessor(timer=timer)
+        processor.load_encoders()
+        processor.feature_names = joblib.load(config.FEATURE_NAMES_FILE)
+        scaler = joblib.load(config.SCALER_FILE)
+        df_new = processor.load_data(args.incremental)
+
+    # 2. Procesar el lote nuevo y evaluar el modelo actual sobre él
+    print("\n[2/3] Procesando registros nuevos...")
+    with timer.stage('transform'):
+        X_new, y_new = processor.transform_new_data(df_new, scaler)
+    with timer.stage('evaluate'):
+        metrics = model.evaluate(X_new, y_new, n_jobs=args.eval_n_jobs)
+
+    # 3. Agregar árboles y guardar una nueva versión
+    print("\n[3/3] Actualizando el bosque...")
+    with timer.stage('fit'):
+        model.update(X_new, y_new, new_trees=args.new_trees,
+                     max_trees=args.max_trees, n_jobs=args.n_jobs)
+    with timer.stage('save'):
+        model.save_version()
+        model.save_model()
+
+    print("\n" + "="*70)
+    print("RESUMEN DEL REENTRENAMIENTO")
+    print("="*70)
+    print(f"Registros nuevos: {len(y_new)}")
+    print(f"ROC-AUC del modelo anterior en el lote nuevo: {metrics['roc_auc']:.4f}")
+    print(f"Árboles en el modelo: {len(model.model.estimators_)}")
+    timer.report()
+
+
 def main():
     """
     Pipeline completo de entrenamiento
     """
+    args = parse_args()
+    timer = StageTimer()
+
+    if args.incremental:
+        incremental_update(args, timer)
+        return
+
     print("="*70)
     print("CREDIT RISK PREDICTION SYSTEM - ENTRENAMIENTO")
     print("="*70)
 
     # 1. Procesar datos
-    print("\n[1/3] Procesando datos...")
-    processor = DataProcessor()
-    X_train, X_test, y_train, y_test, df_clean = processor.process_pipeline()
+    print("\n[1/4] Procesando datos...")
+    processor = DataProcessor(timer=timer)
+    X_train, X_test, y_train, y_test, df_clean = processor.process_pipeline(
+        use_cache=not args.no_cache, explore=args.explore, memmap=args.memmap
+    )
 
     # 2. Entrenar modelo
-    print("\n[2/3] Entrenando modelo...")
-    model = CreditRiskModel()
+    print("\n[2/4] Entrenando modelo...")
+    model = CreditRiskModel(timer=timer)
     metrics = model.train_and_evaluate_pipeline(
         X_train, X_test, y_train, y_test,
-        feature_names=processor.feature_names
+        feature_names=processor.feature_names,
+        n_jobs=args.n_jobs,
+        eval_n_jobs=args.eval_n_jobs,
+        threshold_strategy=args.threshold
     )
 
-    # 3. Guardar scaler y encoders
-    print("\n[3/3] Guardando scaler y encoders...")
+    # 3. Indice de prestamos similares
+    print("\n[3/4] Construyendo índice de préstamos similares...")
+    with timer.stage('neighbors'):
+        model.build_neighbor_index(X_train, y_train, df_clean.loc[processor.train_index])
+        model.save_neighbor_index()
+
+    # Importancia por permutación sobre el modelo guardado
+    if args.permutation_importance:
+        with timer.stage('permutation'):
+            model.get_feature_importance(processor.feature_names, method='permutation',
+                                         X=X_test, y=y_test, n_jobs=args.n_jobs,
+                                         use_cache=not args.no_cache)
+
+    # Artefactos de serving: la mitad del test ajusta (árboles a conservar,
+    # margen de la cascada) y la otra mitad reporta
+    if args.compact or args.distill:
+        X_select, X_report, y_select, y_report = holdout_halves(X_test, y_test)
+    if args.compact:
+        with timer.stage('compact'):
+            model.compact(X_select, y_select, X_report, y_report)
+    if args.distill:
+        with timer.stage('distill'):
+            model.distill(X_train, X_select, X_report, y_report)
+
+    # 4. Guardar scaler y encoders
+    print("\n[4/4] Guardando scaler y encoders...")
     joblib.dump(processor.scaler, config.SCALER_FILE)
     print(f"✓ Scaler guardado en: {config.SCALER_FILE}")
 
     processor.save_encoders()
 
     # También guardar feature_names para referencia
-    joblib.dump(processor.feature_names, config.MODELS_DIR / "feature_names.pkl")
-    print(f"✓ Feature names guardados en: {config.MODELS_DIR / 'feature_names.pkl'}")
+    joblib.dump(processor.feature_names, config.FEATURE_NAMES_FILE)
+    print(f"✓ Feature names guardados en: {config.FEATURE_NAMES_FILE}")
 
     # Resumen final
     print("\n" + "="*70)
@@ -46,12 +164,14 @@ def main():
     print("="*70)
     print(f"Datos de entrenamiento: {len(X_train)} muestras")
     print(f"Datos de prueba: {len(X_test)} muestras")
-    print(f"\nMétricas del Modelo:")
+    print(f"\nMétricas del Modelo (umbral {model.decision_threshold:.4f}, "
+          f"{metrics['n_samples']} muestras de prueba):")
     print(f"  • Accuracy:  {metrics['accuracy']:.4f}")
     print(f"  • Precision: {metrics['precision']:.4f}")
     print(f"  • Recall:    {metrics['recall']:.4f}")
     print(f"  • F1-Score:  {metrics['f1_score']:.4f}")
     print(f"  • ROC-AUC:   {metrics['roc_auc']:.4f}")
+    timer.report()
     print("\n" + "="*70)
     print("✓ ENTRENAMIENTO COMPLETADO EXITOSAMENTE")
     print("="*70)
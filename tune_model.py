@@ -0,0 +1,54 @@
+"""
+Script para buscar hiperparámetros del modelo de Credit Risk Prediction
+Preprocesa una sola vez y evalúa las configuraciones en paralelo con
+validación cruzada estratificada
+"""
+import argparse
+
+from src.tuning import HyperparameterSearch
+import config
+
+
+def parse_args():
+    """
+    Lee las opciones de línea de comandos de la búsqueda
+    """
+    parser = argparse.ArgumentParser(description="Búsqueda de hiperparámetros")
+    parser.add_argument('--search', choices=['grid', 'random', 'halving'], default='grid',
+                        help="Estrategia de búsqueda")
+    parser.add_argument('--n-iter', type=int, default=10,
+                        help="Combinaciones a muestrear con --search random")
+    parser.add_argument('--cv', type=int, default=config.TUNING_CV_FOLDS,
+                        help="Número de folds estratificados")
+    parser.add_argument('--n-jobs', type=int, default=config.N_JOBS,
+                        help="Procesos en paralelo (-1 = todos)")
+    parser.add_argument('--memmap', action='store_true', default=config.MEMMAP_FEATURES,
+                        help="Comparte las matrices de features como memmap (.npy en data/processed)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignorar los arrays y resultados en caché")
+    return parser.parse_args()
+
+
+def main():
+    """
+    Ejecuta la búsqueda e imprime la configuración sugerida
+    """
+    args = parse_args()
+
+    search = HyperparameterSearch(cv=args.cv, n_jobs=args.n_jobs,
+                                  use_cache=not args.no_cache, memmap=args.memmap)
+    best = search.run(search=args.search, n_iter=args.n_iter)
+
+    print("\n" + "="*70)
+    print("RESUMEN DE LA BÚSQUEDA")
+    print("="*70)
+    print(f"Trials evaluados: {len(search.trials)} "
+          f"({sum(t['cached'] for t in search.trials)} desde caché)")
+    print(f"Mejor ROC-AUC (CV): {best['mean_score']:.4f} ± {best['std_score']:.4f}")
+    print("\nPara usarla, actualiza MODEL_PARAMS en config.py:")
+    for name, value in best['params'].items():
+        print(f"  '{name}': {value!r},")
+
+
+if __name__ == "__main__":
+    main()